@@ -1,18 +1,39 @@
 # src/agents/decision_agent.py
-from typing import Dict
+from typing import Dict, List, Optional
 
 # Simple rule parameters (tune as needed)
 BUY_THRESHOLD = 0.20    # agg sentiment above this -> buy
 SELL_THRESHOLD = -0.20  # agg sentiment below this -> sell
 POSITION_FRACTION = 0.001  # fraction of capital to use per buy (0.001 -> 0.1%)
+SELL_FRACTION = 0.5     # fraction of holdings sold on a sell signal
 
-def decide(agg_sentiment: float, last_price: float, portfolio_cash: float, current_qty: float) -> Dict:
+# Optional price-based filters using the indicator values (src/utils/indicators.py).
+# None disables a filter; a missing indicator (still warming up) never blocks a trade.
+RSI_OVERBOUGHT = None   # e.g. 70: skip buys while rsi >= this
+RSI_OVERSOLD = None     # e.g. 30: skip sells while rsi <= this
+
+def decide(agg_sentiment: float, last_price: float, portfolio_cash: float, current_qty: float,
+           buy_threshold: Optional[float] = None, sell_threshold: Optional[float] = None,
+           position_fraction: Optional[float] = None, sell_fraction: Optional[float] = None,
+           indicators: Optional[Dict] = None) -> Dict:
     """
     Returns a decision dict: {"action":"buy"/"sell"/"hold", "qty": <float>}
     - qty is asset units (not USD)
     - portfolio_cash: available cash in USD (virtual)
     - current_qty: current holding quantity (asset units)
+    - buy_threshold / sell_threshold / position_fraction / sell_fraction override
+      the module constants (backtests, parameter sweeps)
+    - indicators: optional {"ema", "rsi", "atr", "volatility"} for the symbol;
+      rsi is checked against RSI_OVERBOUGHT / RSI_OVERSOLD
     """
+    buy_threshold = BUY_THRESHOLD if buy_threshold is None else buy_threshold
+    sell_threshold = SELL_THRESHOLD if sell_threshold is None else sell_threshold
+    position_fraction = POSITION_FRACTION if position_fraction is None else position_fraction
+    sell_fraction = SELL_FRACTION if sell_fraction is None else sell_fraction
+    rsi = (indicators or {}).get("rsi")
+    overbought = rsi is not None and RSI_OVERBOUGHT is not None and rsi >= RSI_OVERBOUGHT
+    oversold = rsi is not None and RSI_OVERSOLD is not None and rsi <= RSI_OVERSOLD
+
     # default
     action = "hold"
     qty = 0.0
@@ -22,19 +43,110 @@ def decide(agg_sentiment: float, last_price: float, portfolio_cash: float, curre
         return {"action": "hold", "qty": 0.0, "reason": "no_price"}
 
     # If sentiment strongly positive and we have cash, buy a small fraction
-    if agg_sentiment >= BUY_THRESHOLD:
-        usd_to_use = portfolio_cash * POSITION_FRACTION
+    if agg_sentiment >= buy_threshold and not overbought:
+        usd_to_use = portfolio_cash * position_fraction
         qty = usd_to_use / last_price
         if qty > 0:
             action = "buy"
             return {"action": action, "qty": round(qty, 8), "reason": f"agg_sentiment={agg_sentiment}"}
 
     # If sentiment strongly negative and we have position, sell some or all
-    if agg_sentiment <= SELL_THRESHOLD and current_qty > 0:
+    if agg_sentiment <= sell_threshold and current_qty > 0 and not oversold:
         # Sell a fraction of holdings (e.g., 50%)
-        sell_frac = 0.5
+        sell_frac = sell_fraction
         qty = current_qty * sell_frac
         action = "sell"
         return {"action": action, "qty": round(qty, 8), "reason": f"agg_sentiment={agg_sentiment}"}
 
     return {"action": "hold", "qty": 0.0, "reason": "no_signal"}
+
+
+# --- vectorized form of decide() for a whole universe of tickers
+
+def _round8(x):
+    """
+    Elementwise round(x, 8) with Python's semantics. rint(x * 1e8) / 1e8 agrees
+    with round() except right at a .5 tie or beyond 2**53 / 1e8, where the
+    scalar round() is used instead.
+    """
+    import numpy as np
+
+    scaled = x * 1e8
+    out = np.rint(scaled) / 1e8
+    frac = np.abs(scaled - np.floor(scaled) - 0.5)
+    redo = np.flatnonzero(np.isfinite(x) & ((frac < 1e-6) | (np.abs(x) >= 2.0 ** 53 / 1e8)))
+    for i in redo:
+        out[i] = round(float(x[i]), 8)
+    return out
+
+
+class DecisionTable:
+    """
+    Column-oriented result of decide_batch(): `action` ("buy"/"sell"/"hold"),
+    `qty` (float64, asset units) and `reason` ("no_price"/"no_signal"/"signal")
+    arrays aligned with the inputs. table[i] / to_dicts() give exactly the dicts
+    decide() returns.
+    """
+
+    def __init__(self, action, qty, reason, agg_sentiment):
+        self.action = action
+        self.qty = qty
+        self.reason = reason
+        self.agg_sentiment = agg_sentiment
+
+    def __len__(self) -> int:
+        return len(self.action)
+
+    def __getitem__(self, i: int) -> Dict:
+        reason = self.reason[i]
+        if reason == "signal":
+            reason = f"agg_sentiment={float(self.agg_sentiment[i])}"
+        return {"action": str(self.action[i]), "qty": float(self.qty[i]), "reason": str(reason)}
+
+    def to_dicts(self) -> List[Dict]:
+        return [self[i] for i in range(len(self))]
+
+
+def decide_batch(agg_sentiment, last_price, portfolio_cash, current_qty,
+                 buy_threshold: Optional[float] = None, sell_threshold: Optional[float] = None,
+                 position_fraction: Optional[float] = None, sell_fraction: Optional[float] = None,
+                 rsi=None) -> DecisionTable:
+    """
+    decide() over arrays (one element per ticker; scalars broadcast). A missing
+    price is NaN. The rule parameters default to the module constants and can be
+    overridden per call (used by backtests / parameter sweeps). rsi is the
+    indicators' "rsi" per ticker (NaN while warming up).
+    """
+    import numpy as np
+
+    buy_threshold = BUY_THRESHOLD if buy_threshold is None else buy_threshold
+    sell_threshold = SELL_THRESHOLD if sell_threshold is None else sell_threshold
+    position_fraction = POSITION_FRACTION if position_fraction is None else position_fraction
+    sell_fraction = SELL_FRACTION if sell_fraction is None else sell_fraction
+
+    rsi = np.nan if rsi is None else rsi
+    agg, price, cash, cur, rsi = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in
+                                                       (agg_sentiment, last_price, portfolio_cash, current_qty, rsi)))
+    agg, price, cash, cur, rsi = (np.atleast_1d(a) for a in (agg, price, cash, cur, rsi))
+    n = agg.shape[0]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        has_price = price > 0  # False for NaN as well
+        buy_qty = cash * position_fraction / price
+        buy = has_price & (agg >= buy_threshold) & (buy_qty > 0)
+        if RSI_OVERBOUGHT is not None:
+            buy &= ~(rsi >= RSI_OVERBOUGHT)
+        sell = has_price & ~buy & (agg <= sell_threshold) & (cur > 0)
+        if RSI_OVERSOLD is not None:
+            sell &= ~(rsi <= RSI_OVERSOLD)
+        sell_qty = cur * sell_fraction
+
+    action = np.full(n, "hold", dtype="<U4")
+    action[buy] = "buy"
+    action[sell] = "sell"
+    qty = np.zeros(n, dtype=np.float64)
+    qty[buy] = _round8(buy_qty[buy])
+    qty[sell] = _round8(sell_qty[sell])
+    reason = np.where(has_price, "no_signal", "no_price").astype("<U9")
+    reason[buy | sell] = "signal"
+    return DecisionTable(action, qty, reason, agg)
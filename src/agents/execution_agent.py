@@ -446,7 +446,8 @@ This version:
  - falls back to market price if broker response contains no fill price,
  - updates trades, portfolio and account via src.utils.db_utils_sqlite helpers,
  - computes realized PnL on sell and updates trade.pnl,
- - caps buy quantity if insufficient cash and updates trade row accordingly.
+ - caps buy quantity if insufficient cash and updates trade row accordingly,
+ - records all of a fill's rows in one transaction (db_utils_sqlite.transaction()).
 """
 
 import os
@@ -458,6 +459,8 @@ import hashlib
 import requests
 from typing import Optional, Dict, Any
 
+from src.utils import http_client
+
 # config (ensure src is in sys.path or run from project root with -m)
 from src.utils.config import GEMINI_API_KEY, GEMINI_API_SECRET, MOCK_EXECUTION
 
@@ -520,7 +523,7 @@ def _call_gemini_api(payload: Dict[str, Any]) -> Dict[str, Any]:
     }
 
     url = GEMINI_BASE + "/v1/order/new"
-    r = requests.post(url, headers=headers, timeout=20)
+    r = http_client.post(url, headers=headers)
     r.raise_for_status()
     return r.json()
 
@@ -577,18 +580,11 @@ def place_order(symbol: str, side: str, amount: float, price: Optional[float] =
     """
     Place an order via Gemini sandbox (or mock) and update DB/account/portfolio.
     Returns the broker response dict or an error dict {"error": True, "message": "..."}.
+    A fill the broker accepted but that could not be recorded is an error dict with
+    "status": "unrecorded" and the broker response under "resp".
     """
     # local imports to avoid circular imports at module import time
-    from src.utils.db_utils_sqlite import (
-        insert_trade,
-        insert_event,
-        upsert_position,
-        get_position,
-        update_trade_pnl,
-        get_account_balance,
-        update_account_balance,
-        _get_conn,
-    )
+    from src.utils.db_utils_sqlite import insert_event, transaction
 
     # Build payload (Gemini v1 new order style)
     payload: Dict[str, Any] = {
@@ -664,116 +660,113 @@ def place_order(symbol: str, side: str, amount: float, price: Optional[float] =
             print("[execution_agent] failed to insert parsing error")
         return {"error": True, "message": str(e)}
 
-    # Persist trade record (pnl may be computed below)
-    trade_id = None
+    # Persist trade, portfolio, account and event rows for this fill as one unit
+    # of work: a single connection and transaction, so the accounting is atomic.
     try:
-        notes = json.dumps(resp, default=str)[:4000]
-        trade_id = insert_trade(symbol=symbol, side=side, qty=qty, price=fill_price, pnl=None, exec_id=exec_id, notes=notes)
+        with transaction() as conn:
+            return _record_fill(conn, resp, symbol, side, qty, fill_price, exec_id)
     except Exception as e:
+        # rolled back: the order went through at the broker but is not in the books.
+        # Keep the broker response in the error event so the fill can be reconciled.
+        err_text = f"Recording fill failed (rolled back): {e}"
         try:
-            insert_event(kind="error", source="execution_agent", payload=f"DB insert_trade failed: {e}")
+            insert_event(kind="error", source="execution_agent",
+                         payload=f"{err_text}; resp={json.dumps(resp, default=str)[:4000]}")
         except Exception:
-            print("[execution_agent] failed to insert DB error event")
+            print("[execution_agent] failed to record fill and error event:", e)
+        return {"error": True, "status": "unrecorded", "message": err_text, "resp": resp}
 
-    # --- ACCOUNT & PORTFOLIO UPDATES ---
-    try:
-        cash_bal = get_account_balance("USD")
-
-        # BUY: debit cash, update position
-        if side.lower() == "buy":
-            cost = qty * fill_price
-            if cost > cash_bal:
-                # no funds: cap purchase (if possible) or return insufficient
-                if cash_bal <= 0:
-                    insert_event(kind="warning", source="execution_agent", payload=f"Insufficient cash for buy {symbol}: needed {cost}, have {cash_bal}")
-                    try:
-                        if trade_id:
-                            update_trade_pnl(trade_id, 0.0)
-                    except Exception:
-                        pass
-                    return {"error": True, "message": "insufficient_cash"}
-                # cap to affordable qty
-                affordable_qty = (cash_bal / fill_price)
-                # round to safe precision
-                affordable_qty = float(f"{affordable_qty:.8f}")
-                try:
-                    # update trades table qty to reflect cap
-                    conn = _get_conn()
-                    cur = conn.cursor()
-                    cur.execute("UPDATE trades SET qty = ? WHERE id = ?", (affordable_qty, trade_id))
-                    conn.commit()
-                    conn.close()
-                    qty = affordable_qty
-                    cost = qty * fill_price
-                    insert_event(kind="info", source="execution_agent", payload=f"Buy capped to affordable qty {qty} for {symbol}, cost {cost}")
-                except Exception as e:
-                    insert_event(kind="error", source="execution_agent", payload=f"Failed to adjust trade qty on cap: {e}")
-
-            # update portfolio avg and qty
-            pos = get_position(symbol)
-            if pos and pos.get("qty") and pos.get("avg_price") is not None:
-                old_qty = float(pos["qty"])
-                old_avg = float(pos["avg_price"])
-                new_qty = old_qty + qty
-                new_avg = ((old_qty * old_avg) + (qty * fill_price)) / new_qty
-            else:
-                old_qty = float(pos["qty"]) if pos and pos.get("qty") else 0.0
-                new_qty = old_qty + qty
-                new_avg = fill_price if new_qty > 0 else None
-
-            upsert_position(symbol=symbol, qty=new_qty, avg_price=new_avg, realized_pnl_delta=0.0)
-
-            # debit cash
-            try:
-                new_bal = update_account_balance(-cost, "USD")
-                insert_event(kind="info", source="execution_agent", payload=f"Debited {cost} USD for buy {symbol}; new_balance={new_bal}")
-            except Exception as e:
-                insert_event(kind="error", source="execution_agent", payload=f"Failed to debit account: {e}")
-
-        # SELL: credit cash, update position and compute realized pnl
-        elif side.lower() == "sell":
-            pos = get_position(symbol)
-            if not pos or not pos.get("qty"):
-                insert_event(kind="warning", source="execution_agent", payload=f"Sell executed but no existing position for {symbol}")
-                upsert_position(symbol=symbol, qty=0, avg_price=None, realized_pnl_delta=0.0)
-            else:
-                old_qty = float(pos["qty"])
-                old_avg = float(pos["avg_price"]) if pos.get("avg_price") is not None else 0.0
-                sell_qty = qty
-                if sell_qty > old_qty:
-                    sell_qty = old_qty
-                    insert_event(kind="warning", source="execution_agent", payload=f"Trying to sell more than holdings for {symbol}; capped to {sell_qty}")
-
-                realized = (fill_price - old_avg) * sell_qty
-                new_qty = old_qty - sell_qty
-                new_avg = old_avg if new_qty > 0 else None
-                upsert_position(symbol=symbol, qty=new_qty, avg_price=new_avg, realized_pnl_delta=realized)
-
-                # update the trade's pnl field to realized amount (for the sell trade)
-                if trade_id:
-                    try:
-                        update_trade_pnl(trade_id, realized)
-                    except Exception:
-                        insert_event(kind="error", source="execution_agent", payload=f"Failed to update trade pnl for id {trade_id}")
 
-                # credit cash: proceeds = sell_qty * fill_price
-                proceeds = sell_qty * fill_price
-                try:
-                    new_bal = update_account_balance(proceeds, "USD")
-                    insert_event(kind="info", source="execution_agent", payload=f"Credited {proceeds} USD for sell {symbol}; realized={realized}; new_balance={new_bal}")
-                except Exception as e:
-                    insert_event(kind="error", source="execution_agent", payload=f"Failed to credit account: {e}")
+def _record_fill(conn, resp: Dict[str, Any], symbol: str, side: str, qty: float, fill_price: float,
+                 exec_id: Optional[str]) -> Dict[str, Any]:
+    """
+    Trade row, cash-capping, portfolio/account updates and events for one fill,
+    all on conn (inside place_order's transaction). Returns place_order's result.
+    """
+    from src.utils.db_utils_sqlite import (
+        insert_trade,
+        insert_event,
+        upsert_position,
+        get_position,
+        update_trade_pnl,
+        update_trade_qty,
+        get_account_balance,
+        update_account_balance,
+    )
 
-    except Exception as e:
-        try:
-            insert_event(kind="error", source="execution_agent", payload=f"Portfolio/account update failed: {e}")
-        except Exception:
-            print("[execution_agent] portfolio/account update failed:", e)
+    notes = json.dumps(resp, default=str)[:4000]
+    trade_id = insert_trade(symbol=symbol, side=side, qty=qty, price=fill_price, pnl=None, exec_id=exec_id,
+                            notes=notes, conn=conn)
+
+    cash_bal = get_account_balance("USD", conn=conn)
+
+    # BUY: debit cash, update position
+    if side.lower() == "buy":
+        cost = qty * fill_price
+        if cost > cash_bal:
+            # no funds: cap purchase (if possible) or return insufficient
+            if cash_bal <= 0:
+                insert_event(kind="warning", source="execution_agent",
+                             payload=f"Insufficient cash for buy {symbol}: needed {cost}, have {cash_bal}", conn=conn)
+                update_trade_pnl(trade_id, 0.0, conn=conn)
+                return {"error": True, "message": "insufficient_cash"}
+            # cap to affordable qty, rounded to safe precision
+            qty = float(f"{cash_bal / fill_price:.8f}")
+            update_trade_qty(trade_id, qty, conn=conn)
+            cost = qty * fill_price
+            insert_event(kind="info", source="execution_agent",
+                         payload=f"Buy capped to affordable qty {qty} for {symbol}, cost {cost}", conn=conn)
+
+        # update portfolio avg and qty
+        pos = get_position(symbol, conn=conn)
+        if pos and pos.get("qty") and pos.get("avg_price") is not None:
+            old_qty = float(pos["qty"])
+            old_avg = float(pos["avg_price"])
+            new_qty = old_qty + qty
+            new_avg = ((old_qty * old_avg) + (qty * fill_price)) / new_qty
+        else:
+            old_qty = float(pos["qty"]) if pos and pos.get("qty") else 0.0
+            new_qty = old_qty + qty
+            new_avg = fill_price if new_qty > 0 else None
+
+        upsert_position(symbol=symbol, qty=new_qty, avg_price=new_avg, realized_pnl_delta=0.0, conn=conn)
+
+        # debit cash
+        new_bal = update_account_balance(-cost, "USD", conn=conn)
+        insert_event(kind="info", source="execution_agent",
+                     payload=f"Debited {cost} USD for buy {symbol}; new_balance={new_bal}", conn=conn)
+
+    # SELL: credit cash, update position and compute realized pnl
+    elif side.lower() == "sell":
+        pos = get_position(symbol, conn=conn)
+        if not pos or not pos.get("qty"):
+            insert_event(kind="warning", source="execution_agent",
+                         payload=f"Sell executed but no existing position for {symbol}", conn=conn)
+            upsert_position(symbol=symbol, qty=0, avg_price=None, realized_pnl_delta=0.0, conn=conn)
+        else:
+            old_qty = float(pos["qty"])
+            old_avg = float(pos["avg_price"]) if pos.get("avg_price") is not None else 0.0
+            sell_qty = qty
+            if sell_qty > old_qty:
+                sell_qty = old_qty
+                insert_event(kind="warning", source="execution_agent",
+                             payload=f"Trying to sell more than holdings for {symbol}; capped to {sell_qty}", conn=conn)
+
+            realized = (fill_price - old_avg) * sell_qty
+            new_qty = old_qty - sell_qty
+            new_avg = old_avg if new_qty > 0 else None
+            upsert_position(symbol=symbol, qty=new_qty, avg_price=new_avg, realized_pnl_delta=realized, conn=conn)
+
+            # update the trade's pnl field to realized amount (for the sell trade)
+            update_trade_pnl(trade_id, realized, conn=conn)
+
+            # credit cash: proceeds = sell_qty * fill_price
+            proceeds = sell_qty * fill_price
+            new_bal = update_account_balance(proceeds, "USD", conn=conn)
+            insert_event(kind="info", source="execution_agent",
+                         payload=f"Credited {proceeds} USD for sell {symbol}; realized={realized}; new_balance={new_bal}",
+                         conn=conn)
 
     # Store raw execution event
-    try:
-        insert_event(kind="execution", source="execution_agent", payload=str(resp))
-    except Exception:
-        print("[execution_agent] failed to insert execution event to DB")
-
+    insert_event(kind="execution", source="execution_agent", payload=str(resp), conn=conn)
     return resp
@@ -109,17 +109,168 @@
 
 
 # src/agents/news_agent.py (replace fetch_news implementation with this)
-from typing import List, Dict
+"""
+News fetcher with a persistent article store.
+
+Articles are keyed by a hash of their normalized URL (or of title+body when
+there is no URL) and kept in the SQLite `news_articles` table for
+NEWS_ARTICLE_TTL seconds. fetch_news() returns only articles not seen before
+for the query; previously seen ones are available through the result's
+`.cached` handle together with their stored sentiment score, so repeated
+headlines are neither rescored nor counted twice. Queries fetched less than
+NEWS_REFRESH_INTERVAL seconds ago are answered from the store without a
+network call.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import List, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 import logging
 
 logger = logging.getLogger(__name__)
 
-def fetch_news(query: str, max_results: int = 5) -> List[Dict]:
+NEWS_ARTICLE_TTL = float(os.getenv("NEWS_ARTICLE_TTL", "86400"))         # seconds an article stays "seen"
+NEWS_REFRESH_INTERVAL = float(os.getenv("NEWS_REFRESH_INTERVAL", "600"))  # min seconds between searches per query
+
+_store_lock = threading.Lock()
+
+
+def normalize_url(url: Optional[str]) -> Optional[str]:
+    """Lower-case scheme/host, drop www., fragments, tracking params and trailing slashes."""
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = [(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "https", host, path, urlencode(sorted(query)), ""))
+
+
+def _content_hash(title: str, body: str) -> str:
+    text = " ".join(f"{title or ''} {body or ''}".lower().split())
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def article_key(article: Dict) -> str:
+    url = normalize_url(article.get("url"))
+    if url:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return _content_hash(article.get("title") or "", article.get("body") or "")
+
+
+def _conn():
+    from src.utils.db_migrations import ensure_schema
+    from src.utils.db_utils_sqlite import _get_conn
+    ensure_schema()  # news_articles / news_queries
+    return _get_conn()
+
+
+class NewsResult(list):
     """
-    Fetch headlines using ddgs (DuckDuckGo Search). Returns a list of dicts:
-    { 'title': ..., 'body': ..., 'url': ... }
-    If anything fails, returns empty list (so agent remains safe).
+    List of *new* articles (same dicts as before, plus a "key"). `.cached`
+    returns the articles already in the store for this query (each with its
+    stored "score", possibly None), excluding the new ones.
+    """
+
+    def __init__(self, articles, query: str):
+        super().__init__(articles)
+        self.query = query
+
+    @property
+    def cached(self) -> List[Dict]:
+        return get_cached_articles(self.query, exclude={a["key"] for a in self})
+
+
+def get_cached_articles(query: str, exclude=None) -> List[Dict]:
+    exclude = exclude or set()
+    cutoff = time.time() - NEWS_ARTICLE_TTL
+    try:
+        conn = _conn()
+        try:
+            rows = conn.execute(
+                "SELECT key, title, body, url, score FROM news_articles WHERE query = ? AND last_seen >= ? ORDER BY first_seen",
+                (query, cutoff)).fetchall()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("news store read failed: %s", e)
+        return []
+    return [dict(r) for r in rows if r["key"] not in exclude]
+
+
+def set_article_score(key: str, score: float):
+    """Remember an article's sentiment score so it is never rescored."""
+    try:
+        conn = _conn()
+        try:
+            conn.execute("UPDATE news_articles SET score = ? WHERE key = ?", (score, key))
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("news store score update failed: %s", e)
+
+
+def _remember(query: str, articles: List[Dict]) -> List[Dict]:
+    """
+    Insert articles unseen for this query, refresh last_seen on known ones,
+    expire old rows. Dedupe is per query: an article already stored for another
+    ticker is still new here. Returns only the articles that were new for query.
     """
+    now = time.time()
+    fresh = []
+    with _store_lock:
+        conn = _conn()
+        try:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM news_articles WHERE last_seen < ?", (now - NEWS_ARTICLE_TTL,))
+            seen_batch = set()
+            for a in articles:
+                key = article_key(a)
+                chash = _content_hash(a.get("title") or "", a.get("body") or "")
+                if key in seen_batch or chash in seen_batch:
+                    continue
+                seen_batch.update((key, chash))
+                row = cur.execute("SELECT key FROM news_articles WHERE query = ? AND key = ? UNION ALL "
+                                  "SELECT key FROM news_articles WHERE query = ? AND content_hash = ? LIMIT 1",
+                                  (query, key, query, chash)).fetchone()
+                if row:
+                    cur.execute("UPDATE news_articles SET last_seen = ? WHERE query = ? AND key = ?",
+                                (now, query, row["key"]))
+                    continue
+                cur.execute(
+                    "INSERT INTO news_articles (key, content_hash, query, title, body, url, first_seen, last_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, chash, query, a.get("title"), a.get("body"), a.get("url"), now, now))
+                fresh.append(dict(a, key=key))
+            cur.execute("INSERT INTO news_queries(query, fetched_at) VALUES (?, ?) "
+                        "ON CONFLICT(query) DO UPDATE SET fetched_at = excluded.fetched_at", (query, now))
+            conn.commit()
+        finally:
+            conn.close()
+    return fresh
+
+
+def _recently_fetched(query: str) -> bool:
+    if NEWS_REFRESH_INTERVAL <= 0:
+        return False
+    try:
+        conn = _conn()
+        try:
+            row = conn.execute("SELECT fetched_at FROM news_queries WHERE query = ?", (query,)).fetchone()
+        finally:
+            conn.close()
+    except Exception:
+        return False
+    return bool(row) and time.time() - row["fetched_at"] < NEWS_REFRESH_INTERVAL
+
+
+def _search(query: str, max_results: int) -> List[Dict]:
     try:
         from ddgs import DDGS
     except Exception as e:
@@ -139,3 +290,29 @@ def fetch_news(query: str, max_results: int = 5) -> List[Dict]:
     except Exception as e:
         logger.warning("Could not fetch news from DuckDuckGo: %s", e)
         return []
+
+
+def fetch_news(query: str, max_results: int = 5, dedupe: bool = True) -> List[Dict]:
+    """
+    Fetch headlines using ddgs (DuckDuckGo Search). Returns a list of dicts:
+    { 'title': ..., 'body': ..., 'url': ... }
+    If anything fails, returns empty list (so agent remains safe).
+
+    With dedupe=True (default) the result is a NewsResult holding only articles
+    not seen before for this query (each also carries its store "key"); use
+    result.cached for the ones already seen. If the store is unavailable the
+    plain search results are returned.
+    """
+    if not dedupe:
+        return _search(query, max_results)
+    if _recently_fetched(query):
+        return NewsResult([], query)
+    articles = _search(query, max_results)
+    if not articles:
+        # failed or empty search: don't mark the query as fetched
+        return NewsResult([], query)
+    try:
+        return NewsResult(_remember(query, articles), query)
+    except Exception as e:
+        logger.warning("news store unavailable, returning undeduplicated results: %s", e)
+        return articles
@@ -1,5 +1,5 @@
 # src/agents/notifier_agent.py
-import requests
+from ..utils import http_client
 from ..utils.config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
 
 def send_telegram_message(text: str, parse_mode="Markdown"):
@@ -14,7 +14,7 @@ def send_telegram_message(text: str, parse_mode="Markdown"):
         "parse_mode": parse_mode
     }
     try:
-        r = requests.post(url, data=payload, timeout=10)
+        r = http_client.post(url, data=payload)
         r.raise_for_status()
         return True
     except Exception as e:
@@ -119,11 +119,26 @@ Robust price provider with multiple fallbacks:
 
 Returns a dict:
   {"provider": "yfinance"|"alphavantage"|"coingecko"|"polygon", "status":"success"|"error", "symbol": ticker, "last": {"price": float}}
+
+get_latest_price() is served through an in-process quote cache (TTL per provider,
+optional stale-while-revalidate window, single-flight for concurrent callers).
+Counters are available from get_price_cache_stats().
+
+With PRICE_HEDGED=true a slow provider no longer stalls the symbol: after
+PRICE_HEDGE_DELAY seconds the next provider is raced against it.
 """
 
 import os
-import requests
-from typing import Dict, Optional
+import copy
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.utils import http_client
+from src.utils.provider_registry import ProviderRegistry
+from src.utils.rate_limiter import RateLimited, acquire as acquire_token
+from src.utils.ttl_cache import TTLCache
 
 # config
 try:
@@ -144,6 +159,16 @@ _CRYPTO_MAP = {
 ALPHA_BASE = "https://www.alphavantage.co/query"
 COINGECKO_SIMPLE = "https://api.coingecko.com/api/v3/simple/price"
 
+# hedged mode: if a provider hasn't answered within PRICE_HEDGE_DELAY seconds,
+# fire the next provider in parallel and take whichever valid price comes first
+PRICE_HEDGED = os.getenv("PRICE_HEDGED", "false").lower() in ("1", "true", "yes")
+PRICE_HEDGE_DELAY = float(os.getenv("PRICE_HEDGE_DELAY", "1.5"))
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="price-hedge")
+
+# rolling health + circuit breaker per provider; reorders _provider_chain() and
+# persists to the `meta` table so quota exhaustion is remembered across restarts
+_registry = ProviderRegistry(persist_key="price_provider_registry")
+
 
 def _is_crypto_symbol(ticker: str) -> bool:
     return ticker.upper() in _CRYPTO_MAP
@@ -156,8 +181,10 @@ def _alphavantage_global_quote(ticker: str) -> Dict:
     """
     if not ALPHAVANTAGE_KEY:
         raise RuntimeError("ALPHAVANTAGE_KEY not set")
+    if not acquire_token("alphavantage"):
+        raise RateLimited("alphavantage: local rate limit reached (5/min, 500/day)")
     params = {"function": "GLOBAL_QUOTE", "symbol": ticker, "apikey": ALPHAVANTAGE_KEY}
-    resp = requests.get(ALPHA_BASE, params=params, timeout=15)
+    resp = http_client.get(ALPHA_BASE, params=params)
     resp.raise_for_status()
     j = resp.json()
     if "Global Quote" in j and j["Global Quote"]:
@@ -205,8 +232,10 @@ def _coingecko_price(ticker: str) -> Dict:
     if not _is_crypto_symbol(ticker):
         raise RuntimeError("CoinGecko path only for crypto symbols")
     cg_id = _CRYPTO_MAP[ticker.upper()]["coingecko"]
+    if not acquire_token("coingecko"):
+        raise RateLimited("coingecko: local rate limit reached")
     params = {"ids": cg_id, "vs_currencies": "usd"}
-    resp = requests.get(COINGECKO_SIMPLE, params=params, timeout=10)
+    resp = http_client.get(COINGECKO_SIMPLE, params=params)
     resp.raise_for_status()
     j = resp.json()
     if cg_id in j and "usd" in j[cg_id]:
@@ -214,37 +243,410 @@ def _coingecko_price(ticker: str) -> Dict:
     raise RuntimeError(f"CoinGecko returned no price for {ticker}: {j}")
 
 
-def get_latest_price(ticker: str) -> Dict:
+def _yf_symbol(ticker: str) -> str:
+    return _CRYPTO_MAP[ticker]["yfinance"] if _is_crypto_symbol(ticker) else ticker
+
+
+def _yfinance_batch(tickers: List[str]) -> Dict[str, Dict]:
     """
-    Try multiple providers and return the first successful price result.
-    Order:
-      - If crypto ticker (BTCUSD/ETHUSD): try yfinance -> coingecko
-      - If non-crypto: try AlphaVantage (if key) -> yfinance
+    One yf.download() call for many symbols. Returns {ticker: response} for the
+    symbols that came back with a usable close; missing symbols are simply absent.
+    """
+    try:
+        import yfinance as yf
+    except Exception as e:
+        raise RuntimeError("yfinance not installed") from e
+
+    yf_to_ticker = {_yf_symbol(t): t for t in tickers}
+    data = yf.download(tickers=list(yf_to_ticker), period="1d", interval="1m",
+                       progress=False, threads=False, group_by="column")
+    if data is None or data.empty or "Close" not in data:
+        return {}
+    close = data["Close"]
+    if not hasattr(close, "columns"):
+        # single ticker on older yfinance versions: a Series instead of a frame
+        close = close.to_frame(name=next(iter(yf_to_ticker)))
+    out = {}
+    for yf_sym, t in yf_to_ticker.items():
+        if yf_sym not in close.columns:
+            continue
+        series = close[yf_sym].dropna()
+        if not series.empty:
+            out[t] = {"provider": "yfinance", "status": "success", "symbol": t, "last": {"price": float(series.iloc[-1])}}
+    return out
+
+
+def _coingecko_batch(tickers: List[str]) -> Dict[str, Dict]:
+    """
+    One CoinGecko simple/price call for many crypto symbols (comma-separated ids).
+    """
+    id_to_ticker = {_CRYPTO_MAP[t]["coingecko"]: t for t in tickers if _is_crypto_symbol(t)}
+    if not id_to_ticker:
+        return {}
+    if not acquire_token("coingecko"):
+        raise RateLimited("coingecko: local rate limit reached")
+    params = {"ids": ",".join(id_to_ticker), "vs_currencies": "usd"}
+    resp = http_client.get(COINGECKO_SIMPLE, params=params)
+    resp.raise_for_status()
+    j = resp.json()
+    out = {}
+    for cg_id, t in id_to_ticker.items():
+        if cg_id in j and "usd" in j[cg_id]:
+            out[t] = {"provider": "coingecko", "status": "success", "symbol": t, "last": {"price": float(j[cg_id]["usd"])}}
+    return out
+
+
+def _provider_chain(t: str) -> List[Tuple[str, Callable[[str], Dict]]]:
+    """
+    Providers to try for a symbol. Default preference:
+      - crypto (BTCUSD/ETHUSD): yfinance -> coingecko
+      - non-crypto: AlphaVantage (if key) -> yfinance
+    which the provider registry then reorders by observed success rate and
+    latency, dropping providers whose circuit breaker is open.
     """
-    t = (ticker or "").upper().strip()
-    # 1) crypto path
     if _is_crypto_symbol(t):
         # prefer yfinance if installed (gives minute-level), else coingecko
-        try:
-            return _yfinance_last(t)
-        except Exception as e:
-            # fall back to coingecko
-            try:
-                return _coingecko_price(t)
-            except Exception as e2:
-                raise RuntimeError(f"Crypto price lookups failed for {t}: yfinance error: {e}; coingecko error: {e2}")
+        chain = [("yfinance", _yfinance_last), ("coingecko", _coingecko_price)]
     else:
-        # equity / forex path
-        # try AlphaVantage first if key present
+        chain = []
         if ALPHAVANTAGE_KEY:
-            try:
-                return _alphavantage_global_quote(t)
-            except Exception:
-                # fallthrough to yfinance
-                pass
-        # fallback to yfinance
+            chain.append(("alphavantage", _alphavantage_global_quote))
+        chain.append(("yfinance", _yfinance_last))
+    fns = dict(chain)
+    return [(name, fns[name]) for name in _registry.order(fns)]
+
+
+def _is_rate_limited(err: Exception) -> bool:
+    status = getattr(getattr(err, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    msg = str(err).lower()
+    # AlphaVantage answers quota problems with HTTP 200 and a 'Note'/'Information' message
+    return any(k in msg for k in ("rate limit", "'note'", "'information'", "too many requests", "api call frequency"))
+
+
+def _call_provider(name: str, fn: Callable, arg):
+    """
+    Run one provider call, timing it and reporting the outcome to the registry.
+    An empty result (e.g. a batch that matched no symbol) is recorded as a miss.
+    Returns (result, error, latency_ms).
+    """
+    if not _registry.claim(name):
+        # half-open and another caller is already running its trial request
+        return None, RuntimeError(f"{name}: circuit half-open, trial in progress"), 0.0
+    t0 = time.perf_counter()
+    try:
+        result = fn(arg)
+    except RateLimited as e:
+        # our own limiter said no: the provider itself is fine, just skip to the next one.
+        # No request went out, so a claimed half-open trial goes back for the next caller.
+        _registry.release(name)
+        return None, e, (time.perf_counter() - t0) * 1000.0
+    except Exception as e:
+        ms = (time.perf_counter() - t0) * 1000.0
+        _registry.record(name, False, ms, rate_limited=_is_rate_limited(e))
+        return None, e, ms
+    ms = (time.perf_counter() - t0) * 1000.0
+    _registry.record(name, True, ms, miss=not result)
+    return result, None, ms
+
+
+def _fetch_sequential(t: str, chain) -> Dict:
+    latency: Dict[str, Optional[float]] = {}
+    errors = []
+    for name, fn in chain:
+        resp, err, latency[name] = _call_provider(name, fn, t)
+        if err is not None:
+            errors.append(f"{name} error: {err}")
+            continue
+        resp["latency_ms"] = latency
+        return resp
+    raise RuntimeError(f"No price found for {t}: " + "; ".join(errors))
+
+
+def _fetch_hedged(t: str, chain, delay: float) -> Dict:
+    """
+    Start the first provider; every `delay` seconds without an answer (or as soon
+    as a provider fails) fire the next one in parallel. The first valid price wins.
+    Providers that have not started yet are cancelled; ones already running can't
+    be interrupted, so their results are discarded (their own timeouts bound them).
+    """
+    done: "queue.Queue" = queue.Queue()
+    latency: Dict[str, Optional[float]] = {name: None for name, _ in chain}
+    futures = []
+    errors = []
+    pending = 0
+    next_i = 0
+
+    def _run(name, fn):
+        done.put((name, *_call_provider(name, fn, t)))
+
+    while pending or next_i < len(chain):
+        if pending == 0:
+            name, fn = chain[next_i]
+            futures.append(_HEDGE_POOL.submit(_run, name, fn))
+            next_i += 1
+            pending += 1
         try:
-            return _yfinance_last(t)
+            name, resp, err, ms = done.get(timeout=delay if next_i < len(chain) else None)
+        except queue.Empty:
+            # primary is slow: hedge with the next provider
+            name, fn = chain[next_i]
+            futures.append(_HEDGE_POOL.submit(_run, name, fn))
+            next_i += 1
+            pending += 1
+            continue
+        pending -= 1
+        latency[name] = ms
+        if err is None:
+            for f in futures:
+                f.cancel()
+            resp["latency_ms"] = latency
+            resp["hedged"] = True
+            return resp
+        errors.append(f"{name} error: {err}")
+    raise RuntimeError(f"No price found for {t}: " + "; ".join(errors))
+
+
+def _fetch_latest_price(ticker: str, hedged: Optional[bool] = None) -> Dict:
+    """
+    Try multiple providers (see _provider_chain) and return the first successful
+    price result (uncached). The response carries "latency_ms": {provider: ms}
+    for every provider that answered; in hedged mode providers that were still
+    running when the winner answered are recorded as None.
+    """
+    t = (ticker or "").upper().strip()
+    chain = _provider_chain(t)
+    if PRICE_HEDGED if hedged is None else hedged:
+        return _fetch_hedged(t, chain, PRICE_HEDGE_DELAY)
+    return _fetch_sequential(t, chain)
+
+
+# --- quote cache
+# seconds a quote stays fresh, keyed by the provider that answered
+PRICE_CACHE_TTL = {
+    "alphavantage": float(os.getenv("PRICE_CACHE_TTL_ALPHAVANTAGE", "60")),
+    "yfinance": float(os.getenv("PRICE_CACHE_TTL_YFINANCE", "15")),
+    "coingecko": float(os.getenv("PRICE_CACHE_TTL_COINGECKO", "30")),
+}
+PRICE_CACHE_DEFAULT_TTL = float(os.getenv("PRICE_CACHE_TTL", "15"))
+# extra seconds an expired quote may still be served while it refreshes in the background (0 = off)
+PRICE_CACHE_STALE_TTL = float(os.getenv("PRICE_CACHE_STALE_TTL", "0"))
+
+
+def _quote_ttl(resp: Dict) -> Optional[float]:
+    provider = resp.get("provider") if isinstance(resp, dict) else None
+    return PRICE_CACHE_TTL.get(provider, PRICE_CACHE_DEFAULT_TTL)
+
+
+_quote_cache = TTLCache(default_ttl=PRICE_CACHE_DEFAULT_TTL, stale_ttl=PRICE_CACHE_STALE_TTL, ttl_for=_quote_ttl)
+
+
+def get_latest_price(ticker: str, use_cache: bool = True, hedged: Optional[bool] = None) -> Dict:
+    """
+    Cached front for _fetch_latest_price(). Concurrent calls for the same symbol
+    share one provider request. Pass use_cache=False to force a fresh quote
+    (the result still refreshes the cache). hedged overrides PRICE_HEDGED.
+    """
+    t = (ticker or "").upper().strip()
+    if use_cache:
+        resp = _quote_cache.get_or_load(t, lambda: _fetch_latest_price(t, hedged))
+    else:
+        resp = _fetch_latest_price(t, hedged)
+        _quote_cache.put(t, resp)
+    # hand out a copy so callers can't mutate the cached entry
+    return copy.deepcopy(resp)
+
+
+def get_price_cache_stats() -> Dict[str, int]:
+    """hits / misses / stale_hits / coalesced / refreshes / load_errors / size / inflight"""
+    return _quote_cache.stats()
+
+
+def clear_price_cache(ticker: Optional[str] = None):
+    _quote_cache.invalidate(ticker.upper().strip() if ticker else None)
+
+
+def get_latest_prices(tickers: List[str]) -> Dict[str, Dict]:
+    """
+    Price many symbols with as few provider round-trips as possible.
+    Returns {TICKER: response} in the same shape as get_latest_price(); symbols
+    that could not be priced get {"provider": None, "status": "error", "symbol": t, "error": "..."}.
+
+    Order:
+      - fresh quotes already in the cache are reused
+      - one yfinance download for every remaining symbol (crypto mapped via _CRYPTO_MAP)
+      - one CoinGecko simple/price call for crypto symbols still missing
+      - per-symbol get_latest_price() (AlphaVantage -> yfinance / yfinance -> CoinGecko)
+        only for whatever is still missing
+    AlphaVantage has no multi-symbol quote endpoint on the free tier, so batched
+    equities go to yfinance first.
+    """
+    symbols = list(dict.fromkeys((t or "").upper().strip() for t in tickers if t))
+    results: Dict[str, Dict] = {}
+
+    missing = []
+    for t in symbols:
+        cached = _quote_cache.peek(t)
+        if cached is not None:
+            results[t] = copy.deepcopy(cached)
+        else:
+            missing.append(t)
+
+    batch_fns = {"yfinance": _yfinance_batch, "coingecko": _coingecko_batch}
+    for name in _registry.order(batch_fns):
+        if not missing:
+            break
+        todo = [t for t in missing if name != "coingecko" or _is_crypto_symbol(t)]
+        if not todo:
+            continue  # nothing this provider can price: no request, nothing to record
+        got, err, _ = _call_provider(name, batch_fns[name], todo)
+        got = got or {}
+        for t, resp in got.items():
+            _quote_cache.put(t, resp)
+            results[t] = copy.deepcopy(resp)
+        missing = [t for t in missing if t not in got]
+
+    for t in missing:
+        try:
+            results[t] = get_latest_price(t)
         except Exception as e:
-            raise RuntimeError(f"No price found for {t}: {e}")
+            results[t] = {"provider": None, "status": "error", "symbol": t, "error": str(e)}
+
+    return {t: results[t] for t in symbols}
+
+
+def get_provider_status() -> Dict[str, Dict]:
+    """Circuit state, success rate and latency per price provider (see ProviderRegistry.snapshot)."""
+    return _registry.snapshot()
+
+
+def reset_provider_status(provider: Optional[str] = None):
+    _registry.reset(provider)
+
+
+# --- intraday bars (local columnar store, incremental refresh)
+_AV_INTERVALS = {"1min": 60, "5min": 300, "15min": 900, "30min": 1800, "60min": 3600}
+_YF_INTERVALS = {"1min": "1m", "5min": "5m", "15min": "15m", "30min": "30m", "60min": "60m"}
+_AV_COMPACT_BARS = 100  # AlphaVantage 'compact' returns the latest 100 points
+
+
+def _alphavantage_intraday(ticker: str, interval: str, since: Optional[int], outputsize: str) -> Dict:
+    """
+    AlphaVantage TIME_SERIES_INTRADAY -> column dict. Uses 'compact' when the
+    gap since the last stored bar fits in 100 bars, otherwise outputsize.
+    """
+    import numpy as np
+    from zoneinfo import ZoneInfo
+    from datetime import datetime
+
+    if not ALPHAVANTAGE_KEY:
+        raise RuntimeError("ALPHAVANTAGE_KEY not set")
+    if since is not None:
+        outputsize = "compact" if time.time() - since < _AV_COMPACT_BARS * _AV_INTERVALS[interval] else "full"
+    if not acquire_token("alphavantage"):
+        raise RateLimited("alphavantage: local rate limit reached (5/min, 500/day)")
+    params = {"function": "TIME_SERIES_INTRADAY", "symbol": ticker, "interval": interval,
+              "outputsize": outputsize, "datatype": "json", "apikey": ALPHAVANTAGE_KEY}
+    resp = http_client.get(ALPHA_BASE, params=params)
+    resp.raise_for_status()
+    j = resp.json()
+    if "Error Message" in j:
+        raise RuntimeError(f"AlphaVantage error for {ticker}: {j['Error Message']}")
+    if "Note" in j or "Information" in j:
+        # Rate limit / service message
+        raise RuntimeError(f"AlphaVantage note: {j.get('Note') or j.get('Information')}")
+    series = j.get(f"Time Series ({interval})") or {}
+    if not series:
+        raise RuntimeError(f"AlphaVantage returned no intraday bars for {ticker}: {j}")
+    tz = ZoneInfo((j.get("Meta Data") or {}).get("6. Time Zone") or "US/Eastern")
+    rows = sorted(series.items())
+    return {
+        "ts": np.array([int(datetime.strptime(k, "%Y-%m-%d %H:%M:%S").replace(tzinfo=tz).timestamp()) for k, _ in rows], dtype=np.int64),
+        "open": np.array([float(v["1. open"]) for _, v in rows]),
+        "high": np.array([float(v["2. high"]) for _, v in rows]),
+        "low": np.array([float(v["3. low"]) for _, v in rows]),
+        "close": np.array([float(v["4. close"]) for _, v in rows]),
+        "volume": np.array([float(v["5. volume"]) for _, v in rows]),
+    }
+
+
+def _yfinance_intraday(ticker: str, interval: str, since: Optional[int], outputsize: str) -> Dict:
+    """
+    yfinance history -> column dict, starting just after `since` when given.
+    """
+    import numpy as np
+    from datetime import datetime, timezone
+    try:
+        import yfinance as yf
+    except Exception as e:
+        raise RuntimeError("yfinance not installed") from e
+
+    t = yf.Ticker(_yf_symbol(ticker))
+    if since is not None:
+        hist = t.history(start=datetime.fromtimestamp(since + 1, tz=timezone.utc), interval=_YF_INTERVALS[interval])
+    else:
+        hist = t.history(period="5d" if outputsize == "compact" else "60d", interval=_YF_INTERVALS[interval])
+    if hist is None or hist.empty:
+        return {"ts": np.empty(0, dtype=np.int64)}
+    return {
+        "ts": np.array([int(ts.timestamp()) for ts in hist.index], dtype=np.int64),
+        "open": hist["Open"].to_numpy(dtype=float),
+        "high": hist["High"].to_numpy(dtype=float),
+        "low": hist["Low"].to_numpy(dtype=float),
+        "close": hist["Close"].to_numpy(dtype=float),
+        "volume": hist["Volume"].to_numpy(dtype=float),
+    }
+
+
+def _closed_bars(bars: Dict, seconds: int, now: Optional[float] = None) -> Dict:
+    """
+    Drop bars whose interval has not closed yet (bar ts is the interval start).
+    The store is append-only and the next refresh starts after the last stored
+    bar, so a still-forming candle would never be corrected.
+    """
+    ts = bars.get("ts")
+    if ts is None or not len(ts):
+        return bars
+    cutoff = (time.time() if now is None else now) - seconds
+    n = int((ts <= cutoff).sum())  # ts is sorted, the open bars are at the end
+    return bars if n == len(ts) else {k: v[:n] for k, v in bars.items()}
+
+
+def get_intraday_bars(ticker: str, interval: str = "5min", outputsize: str = "compact",
+                      start: Optional[int] = None, end: Optional[int] = None, refresh: bool = True) -> Dict:
+    """
+    Intraday OHLCV bars from the local bar store (src/utils/bar_store.py).
+    interval: '1min','5min','15min','30min','60min'
+    outputsize: 'compact' or 'full' — only used for the first download of a symbol;
+      later calls fetch just the bars newer than the last stored timestamp. Only
+      closed bars are stored; the one still forming is picked up once it closes.
+    start / end: optional epoch-second bounds (inclusive).
+    Returns {"ts", "open", "high", "low", "close", "volume"} as zero-copy NumPy
+    memmap slices ("ts" in UTC epoch seconds). If the refresh fails, the bars
+    already stored are returned; it raises only when nothing is stored.
+    """
+    from src.utils.bar_store import get_bar_store
+
+    if interval not in _AV_INTERVALS:
+        raise ValueError(f"unsupported interval {interval!r}; use one of {list(_AV_INTERVALS)}")
+    t = (ticker or "").upper().strip()
+    store = get_bar_store()
+
+    if refresh:
+        since = store.last_timestamp(t, interval)
+        fetchers = {"yfinance": _yfinance_intraday}
+        if ALPHAVANTAGE_KEY and not _is_crypto_symbol(t):
+            fetchers = {"alphavantage": _alphavantage_intraday, **fetchers}
+        errors = []
+        for name in _registry.order(fetchers):
+            bars, err, _ = _call_provider(name, lambda a: fetchers[name](a, interval, since, outputsize), t)
+            if err is None:
+                store.append(t, interval, _closed_bars(bars, _AV_INTERVALS[interval]))
+                break
+            errors.append(f"{name} error: {err}")
+        else:
+            if since is None:
+                raise RuntimeError(f"No intraday bars for {t}: " + "; ".join(errors))
 
+    return store.read(t, interval, start=start, end=end)
@@ -1,8 +1,480 @@
 # src/agents/sentiment_agent.py
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+"""
+VADER sentiment scoring.
 
-analyzer = SentimentIntensityAnalyzer()
+Scores are memoized by a digest of the text in two tiers: an in-memory LRU
+(SENTIMENT_LRU_SIZE entries) and the SQLite `sentiment_cache` table, bounded to
+SENTIMENT_DISK_MAX_ROWS rows (least recently used evicted first). The LRU is
+warmed from disk on first use, so restarts never rescore known headlines.
 
-def score_article(article_text: str):
-    s = analyzer.polarity_scores(article_text)
-    return {"compound": s["compound"], "pos": s["pos"], "neg": s["neg"], "neu": s["neu"]}
+The VADER analyzer is built lazily on first use (get_analyzer()); importing
+this module does not parse the lexicon (tests/bench_sentiment_startup.py).
+
+SENTIMENT_ENGINE selects the scorer: "vader" (vaderSentiment's own
+polarity_scores) or "fast" (FastLexiconScorer below: same lexicon and rules,
+tokenized and lower-cased once per text). tests/test_sentiment_fast_engine.py
+checks the two agree; tests/bench_sentiment_engines.py compares throughput.
+"""
+import os
+import atexit
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+SENTIMENT_ENGINE = os.getenv("SENTIMENT_ENGINE", "vader").lower()  # "vader" | "fast"
+if SENTIMENT_ENGINE not in ("vader", "fast"):
+    # normalized before it goes into the cache tag, so these scores share vader's cache rows
+    print(f"[sentiment_agent] unknown SENTIMENT_ENGINE={SENTIMENT_ENGINE!r}, using 'vader'")
+    SENTIMENT_ENGINE = "vader"
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+def _load_vader():
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+
+def get_analyzer():
+    """The shared scorer for SENTIMENT_ENGINE, created on first call. Both engines expose polarity_scores()."""
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                vader = _load_vader()
+                _analyzer = FastLexiconScorer(vader.lexicon, vader.emojis) if SENTIMENT_ENGINE == "fast" else vader
+    return _analyzer
+
+
+class FastLexiconScorer:
+    """
+    Re-implementation of VADER's polarity_scores() (vaderSentiment 3.3.x) for
+    throughput: each text is split, punctuation-stripped and lower-cased once,
+    the negation/booster/special-case tables are frozen sets and dicts built
+    once, and ASCII texts skip the per-character emoji pass. Rule order and
+    quirks (including the 'but' re-weighting) follow the reference so compound
+    scores match.
+    """
+
+    def __init__(self, lexicon: Dict[str, float], emojis: Dict[str, str]):
+        import vaderSentiment.vaderSentiment as vs
+
+        self.lexicon = lexicon
+        # VADER only ever looks up single characters in the emoji table
+        self.emojis = {k: v for k, v in emojis.items() if len(k) == 1}
+        self._emoji_ascii = any(k.isascii() for k in self.emojis)
+        self._negate = frozenset(vs.NEGATE)
+        self._booster = dict(vs.BOOSTER_DICT)
+        self._special = dict(vs.SPECIAL_CASES)
+        self._punct = vs.string.punctuation
+        self._n_scalar = vs.N_SCALAR
+        self._c_incr = vs.C_INCR
+
+    def _negated(self, w: str) -> bool:
+        return w in self._negate or "n't" in w
+
+    def _scalar(self, word: str, low: str, valence: float, cap_diff: bool) -> float:
+        scalar = self._booster.get(low, 0.0)
+        if scalar:
+            if valence < 0:
+                scalar = -scalar
+            if cap_diff and word.isupper():
+                scalar = scalar + self._c_incr if valence > 0 else scalar - self._c_incr
+        return scalar
+
+    def polarity_scores(self, text: str) -> Dict[str, float]:
+        if not text.isascii() or self._emoji_ascii:
+            emojis = self.emojis
+            parts = []
+            prev_space = True
+            for ch in text:
+                desc = emojis.get(ch)
+                if desc is not None:
+                    if not prev_space:
+                        parts.append(" ")
+                    parts.append(desc)
+                    prev_space = False
+                else:
+                    parts.append(ch)
+                    prev_space = ch == " "
+            text = "".join(parts)
+        text = text.strip()
+
+        punct = self._punct
+        words = []
+        for tok in text.split():
+            stripped = tok.strip(punct)
+            words.append(tok if len(stripped) <= 2 else stripped)
+        lows = [w.lower() for w in words]
+        n = len(words)
+        n_upper = sum(1 for w in words if w.isupper())
+        cap_diff = 0 < n - n_upper < n
+
+        lex = self.lexicon
+        booster = self._booster
+        special = self._special
+        N = self._n_scalar
+        C = self._c_incr
+        sentiments = []
+        for i in range(n):
+            low = lows[i]
+            if low in booster or (low == "kind" and i < n - 1 and lows[i + 1] == "of"):
+                sentiments.append(0)
+                continue
+            base = lex.get(low)
+            if base is None:
+                sentiments.append(0)
+                continue
+            valence = base
+            if low == "no" and i != n - 1 and lows[i + 1] in lex:
+                valence = 0.0
+            if (i > 0 and lows[i - 1] == "no") or (i > 1 and lows[i - 2] == "no") \
+                    or (i > 2 and lows[i - 3] == "no" and lows[i - 1] in ("or", "nor")):
+                valence = base * N
+            if cap_diff and words[i].isupper():
+                valence = valence + C if valence > 0 else valence - C
+
+            for start_i in range(3):
+                j = i - (start_i + 1)
+                if i > start_i and lows[j] not in lex:
+                    sc = self._scalar(words[j], lows[j], valence, cap_diff)
+                    if start_i == 1 and sc != 0:
+                        sc = sc * 0.95
+                    elif start_i == 2 and sc != 0:
+                        sc = sc * 0.9
+                    valence = valence + sc
+                    # negation check
+                    if start_i == 0:
+                        if self._negated(lows[i - 1]):
+                            valence = valence * N
+                    elif start_i == 1:
+                        if lows[i - 2] == "never" and lows[i - 1] in ("so", "this"):
+                            valence = valence * 1.25
+                        elif lows[i - 2] == "without" and lows[i - 1] == "doubt":
+                            pass
+                        elif self._negated(lows[i - 2]):
+                            valence = valence * N
+                    else:
+                        if (lows[i - 3] == "never" and lows[i - 2] in ("so", "this")) or lows[i - 1] in ("so", "this"):
+                            valence = valence * 1.25
+                        elif lows[i - 3] == "without" and (lows[i - 2] == "doubt" or lows[i - 1] == "doubt"):
+                            pass
+                        elif self._negated(lows[i - 3]):
+                            valence = valence * N
+                        # special idioms check
+                        w3, w2, w1, w0 = lows[i - 3], lows[i - 2], lows[i - 1], low
+                        for seq in (f"{w1} {w0}", f"{w2} {w1} {w0}", f"{w2} {w1}", f"{w3} {w2} {w1}", f"{w3} {w2}"):
+                            if seq in special:
+                                valence = special[seq]
+                                break
+                        if n - 1 > i:
+                            seq = f"{w0} {lows[i + 1]}"
+                            if seq in special:
+                                valence = special[seq]
+                        if n - 1 > i + 1:
+                            seq = f"{w0} {lows[i + 1]} {lows[i + 2]}"
+                            if seq in special:
+                                valence = special[seq]
+                        for seq in (f"{w3} {w2} {w1}", f"{w3} {w2}", f"{w2} {w1}"):
+                            if seq in booster:
+                                valence = valence + booster[seq]
+
+            # least check
+            if i > 1 and lows[i - 1] not in lex and lows[i - 1] == "least":
+                if lows[i - 2] != "at" and lows[i - 2] != "very":
+                    valence = valence * N
+            elif i > 0 and lows[i - 1] not in lex and lows[i - 1] == "least":
+                valence = valence * N
+            sentiments.append(valence)
+
+        if "but" in lows:
+            # mirrors the reference implementation exactly, including its use of
+            # list.index() (which re-weights the first equal value)
+            bi = lows.index("but")
+            for sentiment in sentiments:
+                si = sentiments.index(sentiment)
+                if si < bi:
+                    sentiments[si] = sentiment * 0.5
+                elif si > bi:
+                    sentiments[si] = sentiment * 1.5
+
+        return self._score_valence(sentiments, text)
+
+    @staticmethod
+    def _score_valence(sentiments, text: str) -> Dict[str, float]:
+        if not sentiments:
+            return {"neg": 0.0, "neu": 0.0, "pos": 0.0, "compound": 0.0}
+        sum_s = float(sum(sentiments))
+        ep = min(text.count("!"), 4) * 0.292
+        qm_count = text.count("?")
+        qm = 0
+        if qm_count > 1:
+            qm = qm_count * 0.18 if qm_count <= 3 else 0.96
+        amp = ep + qm
+        if sum_s > 0:
+            sum_s += amp
+        elif sum_s < 0:
+            sum_s -= amp
+        compound = sum_s / math.sqrt(sum_s * sum_s + 15)
+        compound = max(-1.0, min(1.0, compound))
+
+        pos_sum = neg_sum = 0.0
+        neu_count = 0
+        for sc in sentiments:
+            if sc > 0:
+                pos_sum += float(sc) + 1
+            if sc < 0:
+                neg_sum += float(sc) - 1
+            if sc == 0:
+                neu_count += 1
+        if pos_sum > math.fabs(neg_sum):
+            pos_sum += amp
+        elif pos_sum < math.fabs(neg_sum):
+            neg_sum -= amp
+        total = pos_sum + math.fabs(neg_sum) + neu_count
+        return {"neg": round(math.fabs(neg_sum / total), 3),
+                "neu": round(math.fabs(neu_count / total), 3),
+                "pos": round(math.fabs(pos_sum / total), 3),
+                "compound": round(compound, 4)}
+
+
+def __getattr__(name):
+    # keeps `sentiment_agent.analyzer` working without building it at import time
+    if name == "analyzer":
+        return get_analyzer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# batches at least this large are spread over a process pool (when processes != 1)
+SENTIMENT_POOL_MIN_BATCH = int(os.getenv("SENTIMENT_POOL_MIN_BATCH", "256"))
+SENTIMENT_PROCESSES = int(os.getenv("SENTIMENT_PROCESSES", "0"))  # 0 = os.cpu_count()
+
+SENTIMENT_CACHE = os.getenv("SENTIMENT_CACHE", "true").lower() in ("1", "true", "yes")
+SENTIMENT_LRU_SIZE = int(os.getenv("SENTIMENT_LRU_SIZE", "4096"))
+SENTIMENT_DISK_MAX_ROWS = int(os.getenv("SENTIMENT_DISK_MAX_ROWS", "100000"))
+
+_FIELDS = ("compound", "pos", "neg", "neu")
+_CACHE_TAG = SENTIMENT_ENGINE  # part of the digest, so a different scoring engine never reuses these rows
+
+def score_article(article_text: str, use_cache: bool = True):
+    row = _score_rows([article_text], processes=1, use_cache=use_cache)[0]
+    if math.isnan(row[0]):
+        raise ValueError("text could not be scored")
+    return dict(zip(_FIELDS, row))
+
+
+# --- memoization (LRU + SQLite)
+_lru: "OrderedDict[str, tuple]" = OrderedDict()
+_lru_lock = threading.Lock()
+_disk_state = {"warmed": False, "inserts": 0}
+_memo_stats = {"lru_hits": 0, "disk_hits": 0, "misses": 0}
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(f"{_CACHE_TAG}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _disk_conn():
+    from src.utils.db_migrations import ensure_schema
+    from src.utils.db_utils_sqlite import _get_conn
+    ensure_schema()  # sentiment_cache
+    return _get_conn()
+
+
+def _lru_put(digest: str, row: tuple):
+    _lru[digest] = row
+    _lru.move_to_end(digest)
+    while len(_lru) > SENTIMENT_LRU_SIZE:
+        _lru.popitem(last=False)
+
+
+def _warm_lru(conn):
+    rows = conn.execute("SELECT digest, compound, pos, neg, neu FROM sentiment_cache ORDER BY last_used DESC LIMIT ?",
+                        (SENTIMENT_LRU_SIZE,)).fetchall()
+    with _lru_lock:
+        for r in reversed(rows):
+            if r["digest"] not in _lru:
+                _lru_put(r["digest"], (r["compound"], r["pos"], r["neg"], r["neu"]))
+    _disk_state["warmed"] = True
+
+
+def _disk_lookup(digests: List[str]) -> Dict[str, tuple]:
+    found = {}
+    try:
+        conn = _disk_conn()
+        try:
+            if not _disk_state["warmed"]:
+                _warm_lru(conn)
+                with _lru_lock:
+                    found.update({d: _lru[d] for d in digests if d in _lru})
+                digests = [d for d in digests if d not in found]
+            for i in range(0, len(digests), 500):
+                part = digests[i:i + 500]
+                q = "SELECT digest, compound, pos, neg, neu FROM sentiment_cache WHERE digest IN (%s)" % ",".join("?" * len(part))
+                for r in conn.execute(q, part).fetchall():
+                    found[r["digest"]] = (r["compound"], r["pos"], r["neg"], r["neu"])
+            if found:
+                conn.executemany("UPDATE sentiment_cache SET last_used = ? WHERE digest = ?",
+                                 [(time.time(), d) for d in found])
+                conn.commit()
+        finally:
+            conn.close()
+    except Exception:
+        pass
+    return found
+
+
+def _disk_store(items: Dict[str, tuple]):
+    try:
+        conn = _disk_conn()
+        try:
+            now = time.time()
+            conn.executemany("INSERT OR REPLACE INTO sentiment_cache (digest, compound, pos, neg, neu, last_used) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", [(d, *row, now) for d, row in items.items()])
+            _disk_state["inserts"] += len(items)
+            # evict occasionally rather than on every write
+            if _disk_state["inserts"] >= max(100, SENTIMENT_DISK_MAX_ROWS // 100):
+                _disk_state["inserts"] = 0
+                conn.execute("DELETE FROM sentiment_cache WHERE digest IN (SELECT digest FROM sentiment_cache "
+                             "ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (SENTIMENT_DISK_MAX_ROWS,))
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception:
+        pass
+
+
+def _score_rows(texts: List[str], processes: Optional[int], use_cache: bool) -> List[tuple]:
+    """(compound, pos, neg, neu) per text, served from the memo tiers where possible."""
+    if not (use_cache and SENTIMENT_CACHE):
+        return _score_uncached(texts, processes)
+
+    digests = [_digest(t or "") for t in texts]
+    rows: Dict[str, tuple] = {}
+    with _lru_lock:
+        for d in digests:
+            if d in _lru:
+                _lru.move_to_end(d)
+                rows[d] = _lru[d]
+        _memo_stats["lru_hits"] += sum(1 for d in digests if d in rows)
+
+    missing = list(dict.fromkeys(d for d in digests if d not in rows))
+    if missing:
+        from_disk = _disk_lookup(missing)
+        rows.update(from_disk)
+        todo = {d: t for d, t in zip(digests, texts) if d not in rows}
+        if todo:
+            scored = dict(zip(todo, _score_uncached(list(todo.values()), processes)))
+            rows.update(scored)
+            _disk_store({d: r for d, r in scored.items() if not math.isnan(r[0])})
+        with _lru_lock:
+            _memo_stats["disk_hits"] += len(from_disk)
+            _memo_stats["misses"] += len(todo)
+            for d in missing:
+                if not math.isnan(rows[d][0]):
+                    _lru_put(d, rows[d])
+    return [rows[d] for d in digests]
+
+
+def get_sentiment_cache_stats() -> Dict[str, int]:
+    with _lru_lock:
+        return dict(_memo_stats, lru_size=len(_lru))
+
+
+_FAILED = (math.nan,) * len(_FIELDS)  # row for a text that could not be scored
+
+
+def _score_chunk(texts: Sequence[str]) -> List[tuple]:
+    # runs in worker processes as well; each process builds its own analyzer lazily.
+    # One bad text must not lose the rest of the batch: it gets a NaN row instead.
+    analyzer = get_analyzer()
+    out = []
+    for text in texts:
+        try:
+            s = analyzer.polarity_scores(text or "")
+            out.append((s["compound"], s["pos"], s["neg"], s["neu"]))
+        except Exception:
+            out.append(_FAILED)
+    return out
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def start_sentiment_pool(processes: Optional[int] = None):
+    """
+    Create the worker pool for large batches. Call it once at startup (src/main.py
+    does); score_articles() otherwise creates it on first use. Workers are started
+    with forkserver (spawn where unavailable), never by forking this process, which
+    may have other threads running. Returns None when processes resolves to 1.
+    """
+    global _pool, _pool_workers
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    processes = SENTIMENT_PROCESSES if processes is None else processes
+    processes = processes or os.cpu_count() or 1
+    with _pool_lock:
+        if processes <= 1:
+            return None
+        if _pool is None or _pool_workers != processes:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(max_workers=processes, mp_context=ctx)
+            _pool_workers = processes
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _pool_workers = None, 0
+
+
+def _score_uncached(texts: List[str], processes: Optional[int]) -> List[tuple]:
+    n = len(texts)
+    processes = SENTIMENT_PROCESSES if processes is None else processes
+    processes = processes or os.cpu_count() or 1
+
+    if processes <= 1 or n < SENTIMENT_POOL_MIN_BATCH:
+        return _score_chunk(texts)
+    # a few chunks per worker keeps the pool busy without much IPC overhead
+    chunk = max(1, -(-n // (processes * 4)))
+    parts = [texts[i:i + chunk] for i in range(0, n, chunk)]
+    try:
+        futures = [start_sentiment_pool(processes).submit(_score_chunk, part) for part in parts]
+    except Exception:  # pool could not start or is broken: score here
+        return _score_chunk(texts)
+    rows = []
+    for part, fut in zip(parts, futures):
+        try:
+            rows.extend(fut.result())
+        except Exception:  # e.g. a worker died: redo just that chunk in-process
+            rows.extend(_score_chunk(part))
+    return rows
+
+
+def score_articles(texts: Sequence[str], processes: Optional[int] = None, use_cache: bool = True) -> Dict:
+    """
+    Score many texts at once. Returns {"compound", "pos", "neg", "neu"} as float64
+    arrays aligned with texts. Known texts come from the memo cache; only new
+    ones are scored. A text that fails to score gets NaN in every array (and is
+    not cached); the others are unaffected.
+    processes: worker processes for large batches (default SENTIMENT_PROCESSES,
+    0 = cpu count, 1 = always score on the calling thread). Batches smaller than
+    SENTIMENT_POOL_MIN_BATCH are always scored in-process.
+    """
+    import numpy as np  # imported here so score_article() callers don't pay for it at startup
+
+    texts = list(texts)
+    rows = _score_rows(texts, processes, use_cache)
+    arr = np.array(rows, dtype=np.float64).reshape(len(texts), len(_FIELDS))
+    return {name: np.ascontiguousarray(arr[:, i]) for i, name in enumerate(_FIELDS)}
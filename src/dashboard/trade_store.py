@@ -0,0 +1,125 @@
+# src/dashboard/trade_store.py
+"""
+Trades frame for the dashboard, loaded incrementally.
+
+TradeStore keeps every trade in (timestamp, id) order, with the timestamps
+already parsed and a cumulative_pnl column. refresh() reads only the rows with
+id > the last id seen (db_utils_sqlite.iter_trades), parses their timestamps
+and extends the cumulative PnL from the last value. The rows are kept as a
+short list of DataFrame parts (new rows become a part, similar-sized neighbours
+are merged), so a refresh never copies the whole history; recent() reads the
+tail parts and pnl_curve() samples a bounded number of points for the chart.
+Rows are final once committed (a fill's trade row is written in one
+transaction), so nothing older has to be re-read. A back-dated batch, or a DB
+whose trades were reset, falls back to one full rebuild.
+"""
+
+import threading
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.db_utils_sqlite import get_last_trade_id, iter_trades
+
+TRADE_COLUMNS = ["id", "timestamp", "symbol", "side", "qty", "price", "pnl", "exec_id", "notes"]
+
+
+def _empty() -> pd.DataFrame:
+    df = pd.DataFrame({c: pd.Series(dtype="object") for c in TRADE_COLUMNS})
+    df = df.astype({"id": "int64", "qty": "float64", "price": "float64", "pnl": "float64"})
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    df["cumulative_pnl"] = pd.Series(dtype="float64")
+    return df
+
+
+class TradeStore:
+    """One per dashboard process (st.cache_resource); refresh() is thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._parts: List[pd.DataFrame] = []  # consecutive slices of the frame, in (timestamp, id) order
+        self._offsets = np.zeros(1, dtype=np.int64)  # row offset of each part, plus the total
+        self._df: Optional[pd.DataFrame] = None  # lazily concatenated full frame
+        self.last_id = 0
+
+    def __len__(self) -> int:
+        return int(self._offsets[-1])
+
+    def _append(self, part: pd.DataFrame):
+        # merge the newest parts while they are of similar size (like a binary
+        # counter): O(log n) parts, and each row is copied O(log n) times overall
+        self._parts.append(part.reset_index(drop=True))
+        while len(self._parts) > 1 and len(self._parts[-2]) <= 2 * len(self._parts[-1]):
+            last = self._parts.pop()
+            self._parts[-1] = pd.concat([self._parts[-1], last], ignore_index=True)
+        self._offsets = np.concatenate([[0], np.cumsum([len(p) for p in self._parts])])
+        self._df = None
+
+    def refresh(self) -> int:
+        """Append the trades added since the last call; returns how many."""
+        with self._lock:
+            if get_last_trade_id() < self.last_id:  # trades table was reset
+                self._reset()
+            chunks = list(iter_trades(after_id=self.last_id, columns=TRADE_COLUMNS, fmt="pandas"))
+            if not chunks:
+                return 0
+            new = pd.concat(chunks, ignore_index=True)
+            self.last_id = int(new["id"].iloc[-1])
+            new["timestamp"] = pd.to_datetime(new["timestamp"], errors="coerce", utc=True, format="ISO8601")
+            new = new.sort_values(["timestamp", "id"], kind="stable")
+            tail = self._parts[-1] if self._parts else None
+            if tail is None or new["timestamp"].iloc[0] >= tail["timestamp"].iloc[-1]:
+                base = float(tail["cumulative_pnl"].iloc[-1]) if tail is not None else 0.0
+                new["cumulative_pnl"] = base + new["pnl"].fillna(0.0).cumsum()
+                self._append(new)
+            else:
+                # back-dated (or unparseable) timestamps: re-sort everything once
+                df = pd.concat(self._parts + [new], ignore_index=True).sort_values(["timestamp", "id"], kind="stable")
+                df["cumulative_pnl"] = df["pnl"].fillna(0.0).cumsum()
+                last_id = self.last_id
+                self._reset()
+                self.last_id = last_id
+                self._append(df)
+            return len(new)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """The whole frame (concatenated on first access after a change: O(total))."""
+        with self._lock:
+            if self._df is None:
+                self._df = pd.concat(self._parts, ignore_index=True) if self._parts else _empty()
+            return self._df
+
+    def recent(self, n: int) -> pd.DataFrame:
+        """The n most recent trades, newest first, read from the tail parts only."""
+        with self._lock:
+            taken, need = [], n
+            for part in reversed(self._parts):
+                if need <= 0:
+                    break
+                taken.append(part.iloc[-need:])
+                need -= len(taken[-1])
+        if not taken:
+            return _empty()[TRADE_COLUMNS]
+        return pd.concat(taken[::-1], ignore_index=True).iloc[::-1][TRADE_COLUMNS]
+
+    def pnl_curve(self, max_points: int = 2000) -> pd.DataFrame:
+        """
+        (timestamp, cumulative_pnl) sampled at <= max_points evenly spaced rows,
+        always including the first and last trade: the chart's cost does not
+        grow with the history.
+        """
+        with self._lock:
+            total = len(self)
+            if total == 0:
+                return pd.DataFrame({"timestamp": pd.Series(dtype="datetime64[ns, UTC]"),
+                                     "cumulative_pnl": pd.Series(dtype="float64")})
+            rows = np.unique(np.linspace(0, total - 1, min(max_points, total)).round().astype(np.int64))
+            part_idx = np.searchsorted(self._offsets, rows, side="right") - 1
+            picked = [self._parts[k][["timestamp", "cumulative_pnl"]].iloc[rows[part_idx == k] - self._offsets[k]]
+                      for k in np.unique(part_idx)]
+        return pd.concat(picked, ignore_index=True)
@@ -5,22 +5,43 @@ This file intentionally keeps imports inside run_cycle() to avoid
 circular import issues when imported by test utilities.
 """
 
+import math
+import os
 import time
 import signal
-from typing import List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
 
 # list of tickers to process
 TICKERS: List[str] = ["BTCUSD", "ETHUSD"]
 
+# number of tickers processed concurrently per cycle (1 = sequential)
+CYCLE_WORKERS = int(os.getenv("CYCLE_WORKERS", "1"))
+
+# serializes the balance read -> decide -> place_order section across workers
+_EXECUTION_LOCK = threading.Lock()
+
 
 # graceful shutdown flag
 _SHUTDOWN = False
 def _handle_signal(signum, frame):
     global _SHUTDOWN
     _SHUTDOWN = True
+    # only set the flag: a flush here could block on the DB lock if the signal
+    # arrived mid-write; the shutdown path below flushes the buffered events
     print("Received shutdown signal, stopping after current cycle...")
 
 
+def _flush_events():
+    """Write buffered events (see db_utils_sqlite.flush_events); never raises."""
+    try:
+        from src.utils.db_utils_sqlite import flush_events
+        flush_events()
+    except Exception as e:
+        print(f"Warning: flushing events failed: {e}")
+
+
 def _extract_price_from_provider(resp: Optional[dict]) -> Optional[float]:
     """
     Accepts the get_latest_price() response and tries to reliably return a float price
@@ -49,86 +70,181 @@ def _extract_price_from_provider(resp: Optional[dict]) -> Optional[float]:
     return None
 
 
-def run_cycle():
+def _process_ticker(t: str, log: Callable[[str], None] = print) -> Dict[str, Any]:
     """
-    Single run cycle over all tickers. Imports agents lazily to avoid
-    import-time side effects / circular imports.
+    Run the news -> sentiment -> price -> decision -> execution pipeline for one ticker.
+    Errors are caught here so one failing ticker never affects the others.
+    Returns a small result dict (ticker, agg_sentiment, news_count, sentiment_weight,
+    last_price, indicators, decision, order, error).
     """
     # Lazy imports (keep module import-time cheap)
-    from src.agents.news_agent import fetch_news
-    from src.agents.sentiment_agent import score_article
+    from src.agents.news_agent import fetch_news, set_article_score
+    from src.agents.sentiment_agent import score_articles
     from src.agents.price_agent import get_latest_price
     from src.agents.decision_agent import decide
     from src.agents.execution_agent import place_order
+    from src.utils.sentiment_aggregator import add_scores
+    from src.utils.indicators import update_indicators
     from src.agents.notifier_agent import notify_trade, notify_error
 
-    for t in TICKERS:
+    result: Dict[str, Any] = {"ticker": t, "agg_sentiment": 0.0, "news_count": 0, "sentiment_weight": 0.0,
+                              "last_price": None, "indicators": None, "decision": None, "order": None, "error": None}
+    try:
+        log(f"\n[{t}] Starting cycle...")
+        # 1) fetch and analyze news
+        try:
+            news = fetch_news(t, max_results=5) or []
+        except Exception as e:
+            news = []
+            log(f"[{t}] Warning: fetch_news failed: {e}")
+            # log / notify if desired
+        # articles already seen in earlier cycles are already in the aggregate;
+        # only new ones (and stored ones that never got a score) are scored and added
         try:
-            print(f"\n[{t}] Starting cycle...")
-            # 1) fetch and analyze news
+            cached = getattr(news, "cached", [])
+        except Exception as e:
+            cached = []
+            log(f"[{t}] Warning: reading cached news failed: {e}")
+        to_score = list(news) + [n for n in cached if n.get("score") is None]
+        scores: List[float] = []
+        if to_score:
             try:
-                news = fetch_news(t, max_results=5) or []
+                texts = [(n.get("title") or "") + " " + (n.get("body") or "") for n in to_score]
+                for n, c in zip(to_score, score_articles(texts)["compound"].tolist()):
+                    if math.isnan(c):  # this article failed to score; the rest still count
+                        log(f"[{t}] warning scoring article {n.get('key') or n.get('title')!r}")
+                        continue
+                    scores.append(c)
+                    if n.get("key"):
+                        set_article_score(n["key"], c)
             except Exception as e:
-                news = []
-                print(f"[{t}] Warning: fetch_news failed: {e}")
-                # log / notify if desired
-            scores = []
-            for n in news:
-                try:
-                    text = (n.get("title") or "") + " " + (n.get("body") or "")
-                    sc = score_article(text)
-                    scores.append(sc.get("compound", 0.0))
-                except Exception as e:
-                    print(f"[{t}] warning scoring article: {e}")
-            agg = sum(scores) / len(scores) if scores else 0.0
-            print(f"[{t}] agg_sentiment={agg:.3f} (news_count={len(scores)})")
-
-            # 2) Get latest price (use provider wrapper)
-            last_price = None
+                log(f"[{t}] warning scoring articles: {e}")
+        # recency-weighted running aggregate (see src.utils.sentiment_aggregator)
+        state = add_scores(t, scores)
+        agg = state["sentiment"]
+        result["agg_sentiment"] = agg
+        result["news_count"] = state["count"]
+        result["sentiment_weight"] = state["weight"]
+        log(f"[{t}] agg_sentiment={agg:.3f} (weight={state['weight']:.2f}, articles={state['count']}, new={len(scores)})")
+
+        # 2) Get latest price (use provider wrapper)
+        last_price = None
+        try:
+            price_resp = get_latest_price(t)
+            last_price = _extract_price_from_provider(price_resp)
+        except Exception as e:
+            log(f"[{t}] Warning: get_latest_price failed: {e}")
+        result["last_price"] = last_price
+        log(f"[{t}] last_price={last_price}")
+
+        # price-based indicators, updated in O(1) from the persisted per-symbol state
+        indicators = None
+        if last_price:
             try:
-                price_resp = get_latest_price(t)
-                last_price = _extract_price_from_provider(price_resp)
+                indicators = update_indicators(t, last_price)
+                result["indicators"] = indicators
+                log(f"[{t}] indicators=" + ", ".join(
+                    f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in indicators.items()))
             except Exception as e:
-                print(f"[{t}] Warning: get_latest_price failed: {e}")
-            print(f"[{t}] last_price={last_price}")
+                log(f"[{t}] Warning: update_indicators failed: {e}")
 
-            # 3) Decision
-            # portfolio_cash = 10000.0
-            # current_qty = 0
-            # decision = decide(agg, last_price or 0.0, portfolio_cash, current_qty)
+        # 3) Decision + 4) Execution
+        # Cash/position reads and the order itself are serialized so concurrent
+        # workers never decide against a balance another worker is about to spend.
+        with _EXECUTION_LOCK:
             from src.utils.db_utils_sqlite import get_account_balance, get_position
             portfolio_cash = get_account_balance("USD")
             pos = get_position(t)
             current_qty = float(pos["qty"]) if pos and pos.get("qty") else 0.0
-            decision = decide(agg, last_price or 0.0, portfolio_cash, current_qty)
-
-            print(f"[{t}] decision={decision}")
-
-            # 4) Execute and notify
-            if decision.get("action") == "buy" and decision.get("qty", 0) > 0:
-                resp = place_order(symbol=t, side="buy", amount=decision["qty"], price=None)
-                try:
-                    notify_trade(t, "buy", decision["qty"], last_price or 0.0)
-                except Exception as e:
-                    print(f"[{t}] notify_trade failed: {e}")
-                print(f"[{t}] BUY executed: resp={resp}")
-            elif decision.get("action") == "sell" and decision.get("qty", 0) > 0:
-                resp = place_order(symbol=t, side="sell", amount=decision["qty"], price=None)
-                try:
-                    notify_trade(t, "sell", decision["qty"], last_price or 0.0)
-                except Exception as e:
-                    print(f"[{t}] notify_trade failed: {e}")
-                print(f"[{t}] SELL executed: resp={resp}")
-            else:
-                print(f"[{t}] No trade (hold).")
+            decision = decide(agg, last_price or 0.0, portfolio_cash, current_qty, indicators=indicators)
+            result["decision"] = decision
+
+            log(f"[{t}] decision={decision}")
+
+            side = decision.get("action")
+            if side in ("buy", "sell") and decision.get("qty", 0) > 0:
+                result["order"] = place_order(symbol=t, side=side, amount=decision["qty"], price=None)
+
+        # notifications go out after the lock is released: a slow webhook must
+        # not hold up the other workers' orders
+        resp = result["order"]
+        if resp is None:
+            log(f"[{t}] No trade (hold).")
+        elif isinstance(resp, dict) and resp.get("error"):
+            result["error"] = resp.get("message")
+            log(f"[{t}] {side.upper()} failed: resp={resp}")
+        else:
+            try:
+                notify_trade(t, side, decision["qty"], last_price or 0.0)
+            except Exception as e:
+                log(f"[{t}] notify_trade failed: {e}")
+            log(f"[{t}] {side.upper()} executed: resp={resp}")
+
+    except Exception as e:
+        # Notify and continue with next ticker
+        result["error"] = str(e)
+        try:
+            notify_error(str(e))
+        except Exception:
+            log(f"[{t}] Failed to send error notification: {e}")
+        log(f"[{t}] Exception in cycle: {e}")
+    return result
+
 
+def run_cycle(tickers: Optional[List[str]] = None, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Single run cycle over all tickers. Imports agents lazily to avoid
+    import-time side effects / circular imports.
+
+    workers <= 1 processes tickers one after another (the original behaviour).
+    workers > 1 runs the per-ticker pipelines on a thread pool; each ticker's log
+    lines are buffered and printed, like the returned results, in ticker order.
+    """
+    # per-ticker buffers and the execution lock assume each ticker runs once per cycle
+    tickers = list(dict.fromkeys(TICKERS if tickers is None else tickers))
+    workers = CYCLE_WORKERS if workers is None else workers
+
+    # warm the quote cache with one batched request per provider, so the
+    # per-ticker get_latest_price() calls below are served from cache
+    if len(tickers) > 1:
+        try:
+            from src.agents.price_agent import get_latest_prices
+            get_latest_prices(tickers)
         except Exception as e:
-            # Notify and continue with next ticker
+            print(f"Warning: batched price prefetch failed: {e}")
+
+    if workers <= 1 or len(tickers) <= 1:
+        results = [_process_ticker(t) for t in tickers]
+        _flush_events()
+        _print_http_stats()
+        return results
+
+    buffers: Dict[str, List[str]] = {t: [] for t in tickers}
+    with ThreadPoolExecutor(max_workers=min(workers, len(tickers)), thread_name_prefix="cycle") as pool:
+        futures = [pool.submit(_process_ticker, t, buffers[t].append) for t in tickers]
+        results = []
+        for t, fut in zip(tickers, futures):
             try:
-                notify_error(str(e))
-            except Exception:
-                print(f"[{t}] Failed to send error notification: {e}")
-            print(f"[{t}] Exception in cycle: {e}")
+                results.append(fut.result())
+            except Exception as e:
+                # _process_ticker already isolates errors; this is a last-resort guard
+                results.append({"ticker": t, "error": str(e)})
+                buffers[t].append(f"[{t}] Exception in worker: {e}")
+            for line in buffers[t]:
+                print(line)
+    _flush_events()
+    _print_http_stats()
+    return results
+
+
+def _print_http_stats():
+    """One line per host with cumulative request count and latency (see src.utils.http_client)."""
+    try:
+        from src.utils.http_client import get_http_stats
+        for host, st in sorted(get_http_stats().items()):
+            print(f"[http] {host}: n={st['count']} errors={st['errors']} avg={st['avg_ms']:.0f}ms max={st['max_ms']:.0f}ms")
+    except Exception:
+        pass
 
 
 if __name__ == "__main__":
@@ -143,6 +259,13 @@ if __name__ == "__main__":
     except Exception as e:
         print("Warning: init_db() failed or not available:", e)
 
+    # sentiment worker pool, started now rather than from a cycle worker thread
+    try:
+        from src.agents.sentiment_agent import start_sentiment_pool
+        start_sentiment_pool()
+    except Exception as e:
+        print("Warning: sentiment pool not started:", e)
+
     print("🚀 Autonomous Trading Agent Started (Telegram notifications enabled)")
     try:
         while not _SHUTDOWN:
@@ -154,4 +277,15 @@ if __name__ == "__main__":
                 time.sleep(60)
     except KeyboardInterrupt:
         print("KeyboardInterrupt received, shutting down.")
+    try:
+        from src.utils.http_client import close as close_http
+        close_http()
+    except Exception:
+        pass
+    _flush_events()
+    try:
+        from src.utils.db_utils_sqlite import close_all as close_db
+        close_db()
+    except Exception:
+        pass
     print("Agent stopped.")
@@ -0,0 +1,315 @@
+# src/utils/backtest.py
+"""
+Historical backtest: replays stored bars and timestamped sentiment through
+decision_agent.decide() and an in-memory fill model with the same accounting
+as execution_agent.place_order() (weighted average price, realized PnL on
+sells, buys capped to available cash, sells capped to holdings).
+
+The run works on a fixed cycle grid (cycle_seconds, default 900 = the live
+runner's 15 minutes). Everything that does not depend on the path is
+vectorized up front:
+  - prices as-of each cycle (last close at or before it; searchsorted on the bar timestamps)
+  - sentiment as-of each cycle: article scores folded with the same exponential
+    decay as src.utils.sentiment_aggregator, or a precomputed signal
+  - buy/sell signal masks, equity curve and drawdown
+Only (cycle, symbol) cells with a signal reach decide() and the fill model,
+in ticker order, since cash spent on one ticker changes the next decision.
+
+Usage:
+    from src.utils.backtest import load_bars, load_sentiment, run_backtest
+    res = run_backtest(load_bars(["AAPL", "MSFT"]), load_sentiment(["AAPL", "MSFT"]))
+    res.summary(); res.equity["equity"]; res.trades  # rows shaped like the trades table
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# decision parameters accepted in run_backtest(params=...)
+PARAM_NAMES = ("buy_threshold", "sell_threshold", "position_fraction", "sell_fraction")
+
+TRADE_COLUMNS = ("id", "timestamp", "symbol", "side", "qty", "price", "pnl", "exec_id", "notes")
+
+
+def load_bars(symbols: Sequence[str], interval: str = "5min", start: Optional[int] = None,
+              end: Optional[int] = None) -> Dict[str, Dict[str, np.ndarray]]:
+    """Bars from the local bar store (memmap slices, nothing is downloaded)."""
+    from src.utils.bar_store import get_bar_store
+    store = get_bar_store()
+    return {s.upper(): store.read(s, interval, start, end) for s in symbols}
+
+
+def load_sentiment(symbols: Sequence[str]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Scored articles from the news store: {symbol: (first_seen epoch seconds, score)}."""
+    from src.agents.news_agent import _conn
+    out = {}
+    conn = _conn()
+    try:
+        for s in symbols:
+            rows = conn.execute("SELECT first_seen, score FROM news_articles WHERE query = ? AND score IS NOT NULL "
+                                "ORDER BY first_seen", (s,)).fetchall()
+            out[s.upper()] = (np.array([r[0] for r in rows], dtype=np.float64),
+                              np.array([r[1] for r in rows], dtype=np.float64))
+    finally:
+        conn.close()
+    return out
+
+
+def _asof_index(ts: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    """Index of the last ts <= each grid point (-1 if none)."""
+    return np.searchsorted(ts, grid, side="right") - 1
+
+
+def _asof_prices(bars: Dict[str, np.ndarray], grid: np.ndarray) -> np.ndarray:
+    ts = np.asarray(bars["ts"])
+    close = np.asarray(bars["close"], dtype=np.float64)
+    if ts.size == 0:
+        return np.full(grid.shape, np.nan)
+    idx = _asof_index(ts, grid)
+    out = close[np.maximum(idx, 0)]
+    out[idx < 0] = np.nan
+    return out
+
+
+def _asof_sentiment(ts: np.ndarray, scores: np.ndarray, grid: np.ndarray, aggregate: bool,
+                    half_life: float, min_weight: float) -> np.ndarray:
+    ts = np.asarray(ts, dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float64)
+    if ts.size == 0:
+        return np.zeros(grid.shape)
+    order = np.argsort(ts, kind="stable")
+    ts, scores = ts[order], scores[order]
+    idx = _asof_index(ts, grid)
+    valid = idx >= 0
+    safe = np.maximum(idx, 0)
+    if not aggregate:
+        return np.where(valid, scores[safe], 0.0)
+
+    # running decayed state after each article (one pass over the articles, not the grid)
+    wsum = np.empty(ts.size)
+    weight = np.empty(ts.size)
+    s = w = 0.0
+    prev = ts[0]
+    for k, (t, x) in enumerate(zip(ts.tolist(), scores.tolist())):
+        d = 0.5 ** ((t - prev) / half_life)
+        s, w, prev = s * d + x, w * d + 1.0, t
+        wsum[k], weight[k] = s, w
+    # decay each state forward to the grid point
+    w_now = weight[safe] * 0.5 ** ((grid - ts[safe]) / half_life)
+    mean = wsum[safe] / weight[safe]
+    return np.where(valid & (w_now >= min_weight), mean, 0.0)
+
+
+class BacktestResult:
+    def __init__(self, symbols: List[str], grid: np.ndarray, cash: np.ndarray, qty: np.ndarray,
+                 prices: np.ndarray, realized: np.ndarray, trades: List[Dict], initial_cash: float,
+                 params: Dict):
+        self.symbols = symbols
+        self.params = params
+        self.initial_cash = initial_cash
+        self.trades = trades
+        # mark-to-market with the last known price (0 before a symbol's first bar)
+        marks = _ffill(prices)
+        position_value = np.nansum(qty * marks, axis=1)
+        equity = cash + position_value
+        peak = np.maximum.accumulate(equity) if equity.size else equity
+        self.equity = {
+            "ts": grid,
+            "cash": cash,
+            "position_value": position_value,
+            "equity": equity,
+            "realized_pnl": realized,
+            "drawdown": np.where(peak > 0, (peak - equity) / np.where(peak > 0, peak, 1.0), 0.0),
+        }
+        self.positions = qty  # [cycle, symbol] holdings after each cycle
+
+    def summary(self) -> Dict:
+        eq = self.equity["equity"]
+        final = float(eq[-1]) if eq.size else self.initial_cash
+        return {
+            "final_equity": final,
+            "pnl": final - self.initial_cash,
+            "return": final / self.initial_cash - 1.0 if self.initial_cash else 0.0,
+            "max_drawdown": float(self.equity["drawdown"].max()) if eq.size else 0.0,
+            "realized_pnl": float(self.equity["realized_pnl"][-1]) if eq.size else 0.0,
+            "trades": len(self.trades),
+            **self.params,
+        }
+
+    def trades_frame(self):
+        """Trade log as a pandas DataFrame with the trades table's columns."""
+        import pandas as pd
+        return pd.DataFrame(self.trades, columns=list(TRADE_COLUMNS))
+
+
+def _ffill(a: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs down each column; leading NaNs become 0."""
+    if a.size == 0:
+        return a
+    idx = np.where(np.isnan(a), 0, np.arange(a.shape[0])[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    out = a[idx, np.arange(a.shape[1])]
+    return np.nan_to_num(out, nan=0.0)
+
+
+def prepare_backtest(bars: Dict[str, Dict[str, np.ndarray]],
+                     sentiment: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                     cycle_seconds: Optional[float] = 900,
+                     start: Optional[int] = None,
+                     end: Optional[int] = None,
+                     aggregate: bool = True,
+                     half_life: Optional[float] = None,
+                     min_weight: Optional[float] = None) -> Dict:
+    """
+    The parameter-independent part of a run: the cycle grid and the as-of
+    price and sentiment matrices ([cycle, symbol]). Reusable across simulate()
+    calls with different decision parameters.
+
+    bars:      {symbol: {"ts", "close", ...}} (e.g. load_bars()); ts sorted epoch seconds
+    sentiment: {symbol: (ts, values)}; article scores when aggregate=True
+               (decayed like the live aggregator), otherwise a step signal used as-of
+    cycle_seconds: decision interval; None decides on every bar timestamp
+    """
+    from src.utils import sentiment_aggregator
+
+    half_life = sentiment_aggregator.SENTIMENT_HALF_LIFE if half_life is None else half_life
+    min_weight = sentiment_aggregator.SENTIMENT_MIN_WEIGHT if min_weight is None else min_weight
+
+    symbols = list(bars)
+    all_ts = [np.asarray(b["ts"]) for b in bars.values() if len(b["ts"])]
+    if not all_ts:
+        grid = np.empty(0)
+    else:
+        lo = min(int(t[0]) for t in all_ts) if start is None else int(start)
+        hi = max(int(t[-1]) for t in all_ts) if end is None else int(end)
+        if cycle_seconds:
+            grid = np.arange(lo, hi + 1, cycle_seconds, dtype=np.float64)
+        else:
+            grid = np.unique(np.concatenate(all_ts)).astype(np.float64)
+            grid = grid[(grid >= lo) & (grid <= hi)]
+
+    T, N = grid.size, len(symbols)
+    prices = np.column_stack([_asof_prices(bars[s], grid) for s in symbols]) if N else np.empty((T, 0))
+    empty_s = (np.empty(0), np.empty(0))
+    agg = np.column_stack([_asof_sentiment(*sentiment.get(s, empty_s), grid, aggregate, half_life, min_weight)
+                           for s in symbols]) if N else np.empty((T, 0))
+    return {"symbols": symbols, "grid": grid, "prices": prices, "agg": agg}
+
+
+def run_backtest(bars: Dict[str, Dict[str, np.ndarray]],
+                 sentiment: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                 initial_cash: float = 10000.0,
+                 cycle_seconds: Optional[float] = 900,
+                 start: Optional[int] = None,
+                 end: Optional[int] = None,
+                 params: Optional[Dict] = None,
+                 aggregate: bool = True,
+                 half_life: Optional[float] = None,
+                 min_weight: Optional[float] = None) -> BacktestResult:
+    """
+    prepare_backtest() + simulate(). params overrides decide()'s rule
+    parameters (see PARAM_NAMES); defaults are decision_agent's constants.
+    """
+    inputs = prepare_backtest(bars, sentiment, cycle_seconds, start, end, aggregate, half_life, min_weight)
+    return simulate(inputs, params, initial_cash)
+
+
+def simulate(inputs: Dict, params: Optional[Dict] = None, initial_cash: float = 10000.0) -> BacktestResult:
+    """Walk the prepared grid with one set of decision parameters."""
+    from src.agents import decision_agent
+    from src.agents.decision_agent import decide
+
+    params = {k: v for k, v in (params or {}).items() if v is not None}
+    unknown = set(params) - set(PARAM_NAMES)
+    if unknown:
+        raise ValueError(f"unknown backtest params: {sorted(unknown)}")
+    symbols, grid, prices, agg = inputs["symbols"], inputs["grid"], inputs["prices"], inputs["agg"]
+    T, N = prices.shape
+
+    buy_t = params.get("buy_threshold", decision_agent.BUY_THRESHOLD)
+    sell_t = params.get("sell_threshold", decision_agent.SELL_THRESHOLD)
+    with np.errstate(invalid="ignore"):
+        buy_sig = agg >= buy_t
+        signal = (prices > 0) & (buy_sig | (agg <= sell_t))
+    rows, cols = np.nonzero(signal)
+    active_rows, starts = np.unique(rows, return_index=True)
+    row_cols = np.split(cols, starts[1:]) if rows.size else []
+
+    # path-dependent part: walk only the cycles with a signal
+    cash = initial_cash
+    held = [0.0] * N
+    avg: List[Optional[float]] = [None] * N
+    realized = 0.0
+    trades: List[Dict] = []
+    cash_at = np.empty(T)
+    qty_at = np.empty((T, N))
+    realized_at = np.empty(T)
+    prev = 0
+    for r, cols_r in zip(active_rows.tolist(), row_cols):
+        # carry the unchanged state over the quiet cycles
+        cash_at[prev:r] = cash
+        qty_at[prev:r] = held
+        realized_at[prev:r] = realized
+        ts_iso = None
+        cols_r = cols_r.tolist()
+        prices_r, agg_r, buy_r = prices[r, cols_r].tolist(), agg[r, cols_r].tolist(), buy_sig[r, cols_r].tolist()
+        for j, price, a, is_buy in zip(cols_r, prices_r, agg_r, buy_r):
+            if not is_buy and held[j] <= 0:
+                continue  # sell signal without a position: decide() would hold
+            d = decide(a, price, cash, held[j], **params)
+            if d["action"] not in ("buy", "sell") or d.get("qty", 0) <= 0:
+                continue
+            ts_iso = ts_iso or datetime.fromtimestamp(grid[r], timezone.utc).isoformat()
+            cash, realized = _fill(trades, ts_iso, symbols[j], j, d["action"], d["qty"], price,
+                                   cash, realized, held, avg)
+        cash_at[r] = cash
+        qty_at[r] = held
+        realized_at[r] = realized
+        prev = r + 1
+    cash_at[prev:] = cash
+    qty_at[prev:] = held
+    realized_at[prev:] = realized
+    return BacktestResult(symbols, grid, cash_at, qty_at, prices, realized_at, trades, initial_cash, params)
+
+
+def _fill(trades: List[Dict], ts: str, symbol: str, j: int, side: str, qty: float, fill_price: float,
+          cash: float, realized: float, held: List[float], avg: List[Optional[float]]) -> Tuple[float, float]:
+    """
+    place_order() accounting for a fill at fill_price, applied to the in-memory
+    book (held/avg mutated in place). Appends the trade row; returns (cash, realized).
+    """
+    trade = {"id": len(trades) + 1, "timestamp": ts, "symbol": symbol, "side": side, "qty": qty,
+             "price": fill_price, "pnl": None, "exec_id": f"bt-{len(trades) + 1}", "notes": "backtest"}
+    trades.append(trade)
+    if side == "buy":
+        cost = qty * fill_price
+        if cost > cash:
+            if cash <= 0:
+                trade["pnl"] = 0.0
+                trade["notes"] = "insufficient_cash"
+                return cash, realized
+            qty = float(f"{cash / fill_price:.8f}")
+            trade["qty"] = qty
+            cost = qty * fill_price
+        old_qty = held[j]
+        new_qty = old_qty + qty
+        if old_qty and avg[j] is not None:
+            avg[j] = (old_qty * avg[j] + qty * fill_price) / new_qty
+        else:
+            avg[j] = fill_price if new_qty > 0 else None
+        held[j] = new_qty
+        return cash - cost, realized
+
+    old_qty = held[j]
+    if not old_qty:
+        held[j], avg[j] = 0.0, None
+        return cash, realized
+    old_avg = avg[j] if avg[j] is not None else 0.0
+    sell_qty = min(qty, old_qty)
+    pnl = (fill_price - old_avg) * sell_qty
+    new_qty = old_qty - sell_qty
+    held[j] = new_qty
+    avg[j] = old_avg if new_qty > 0 else None
+    trade["pnl"] = pnl
+    return cash + sell_qty * fill_price, realized + pnl
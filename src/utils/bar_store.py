@@ -0,0 +1,127 @@
+# src/utils/bar_store.py
+"""
+Append-only columnar OHLCV store backed by memory-mapped NumPy arrays.
+
+Layout (one directory per symbol + interval, one raw little-endian file per column):
+    src/data/bars/AAPL_5min/ts.i8       int64 epoch seconds (UTC), strictly increasing
+    src/data/bars/AAPL_5min/open.f8     float64
+    ...                     high/low/close/volume.f8
+
+- append() only writes bars newer than the last stored timestamp
+- read() returns np.memmap slices (zero-copy views) selected with searchsorted on ts
+- if a write was interrupted, columns are trimmed to their common length on the next append
+
+Writes are serialized per process; run a single writer (the agent) per store.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+BAR_STORE_DIR = Path(os.getenv("BAR_STORE_DIR", PROJECT_ROOT / "src" / "data" / "bars"))
+
+COLUMNS = {
+    "ts": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+
+
+def _empty() -> Dict[str, np.ndarray]:
+    return {name: np.empty(0, dtype=dt) for name, dt in COLUMNS.items()}
+
+
+class BarStore:
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root is not None else BAR_STORE_DIR
+        self._lock = threading.Lock()
+
+    def _dir(self, symbol: str, interval: str) -> Path:
+        return self.root / f"{symbol.upper()}_{interval}"
+
+    def _path(self, symbol: str, interval: str, col: str) -> Path:
+        ext = "i8" if col == "ts" else "f8"
+        return self._dir(symbol, interval) / f"{col}.{ext}"
+
+    def count(self, symbol: str, interval: str) -> int:
+        """Number of complete rows (the shortest column wins)."""
+        sizes = []
+        for col, dt in COLUMNS.items():
+            p = self._path(symbol, interval, col)
+            sizes.append(p.stat().st_size // dt.itemsize if p.exists() else 0)
+        return min(sizes)
+
+    def _column(self, symbol: str, interval: str, col: str, n: int) -> np.ndarray:
+        if n == 0:
+            return np.empty(0, dtype=COLUMNS[col])
+        return np.memmap(self._path(symbol, interval, col), dtype=COLUMNS[col], mode="r", shape=(n,))
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[int]:
+        n = self.count(symbol, interval)
+        if n == 0:
+            return None
+        return int(self._column(symbol, interval, "ts", n)[n - 1])
+
+    def append(self, symbol: str, interval: str, bars: Dict[str, np.ndarray]) -> int:
+        """
+        Append bars (dict of equal-length column arrays; "ts" in epoch seconds).
+        Rows are sorted, de-duplicated, and only rows newer than the last stored
+        timestamp are written. Returns the number of rows appended.
+        """
+        ts = np.asarray(bars["ts"], dtype=COLUMNS["ts"])
+        if ts.size == 0:
+            return 0
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        keep = np.ones(ts.size, dtype=bool)
+        keep[1:] = ts[1:] != ts[:-1]
+
+        with self._lock:
+            d = self._dir(symbol, interval)
+            d.mkdir(parents=True, exist_ok=True)
+            n = self.count(symbol, interval)
+            # trim any partially written tail so all columns line up again
+            for col, dt in COLUMNS.items():
+                p = self._path(symbol, interval, col)
+                if p.exists() and p.stat().st_size != n * dt.itemsize:
+                    os.truncate(p, n * dt.itemsize)
+            if n:
+                last = self._column(symbol, interval, "ts", n)[n - 1]
+                keep &= ts > last
+            if not keep.any():
+                return 0
+            for col, dt in COLUMNS.items():
+                values = ts if col == "ts" else np.asarray(bars[col], dtype=dt)[order]
+                with open(self._path(symbol, interval, col), "ab") as f:
+                    f.write(np.ascontiguousarray(values[keep], dtype=dt).tobytes())
+            return int(keep.sum())
+
+    def read(self, symbol: str, interval: str, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Bars with start <= ts <= end (epoch seconds, either bound optional) as
+        zero-copy memmap slices keyed by column name.
+        """
+        n = self.count(symbol, interval)
+        if n == 0:
+            return _empty()
+        ts = self._column(symbol, interval, "ts", n)
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = n if end is None else int(np.searchsorted(ts, end, side="right"))
+        return {col: (ts if col == "ts" else self._column(symbol, interval, col, n))[lo:hi] for col in COLUMNS}
+
+
+_default_store: Optional[BarStore] = None
+
+
+def get_bar_store() -> BarStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = BarStore()
+    return _default_store
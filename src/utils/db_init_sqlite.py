@@ -45,67 +45,22 @@
 
 
 # src/utils/db_init_sqlite.py
-import sqlite3
-from pathlib import Path
+# The schema lives in src/utils/db_migrations.py; this script is kept as the entry point.
+from src.utils import db_utils_sqlite
+from src.utils.db_migrations import get_version
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DATA_DIR = PROJECT_ROOT / "src" / "data"
-DATA_DIR.mkdir(parents=True, exist_ok=True)
-DB_PATH = DATA_DIR / "trades.db"
-
-SCHEMA = """
-BEGIN;
-
--- ---------- TRADES TABLE ----------
-CREATE TABLE IF NOT EXISTS trades (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    timestamp TEXT NOT NULL,
-    symbol TEXT NOT NULL,
-    side TEXT NOT NULL,
-    qty REAL NOT NULL,
-    price REAL NOT NULL,
-    pnl REAL,
-    exec_id TEXT,
-    notes TEXT
-);
-
--- ---------- EVENTS TABLE ----------
-CREATE TABLE IF NOT EXISTS events (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    timestamp TEXT NOT NULL,
-    kind TEXT NOT NULL,
-    source TEXT,
-    payload TEXT
-);
-
--- ---------- PORTFOLIO TABLE ----------
-CREATE TABLE IF NOT EXISTS portfolio (
-    symbol TEXT PRIMARY KEY,
-    qty REAL NOT NULL,
-    avg_price REAL,
-    realized_pnl REAL DEFAULT 0.0,
-    updated_at TEXT NOT NULL
-);
-
--- ---------- ACCOUNT TABLE ----------
--- Stores available cash per currency
-CREATE TABLE IF NOT EXISTS account (
-    currency TEXT PRIMARY KEY,
-    cash REAL NOT NULL
-);
-
-COMMIT;
-"""
+DB_PATH = db_utils_sqlite.DB_PATH
 
 
 def init_db():
     print(f"Initializing SQLite DB at: {DB_PATH}")
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.executescript(SCHEMA)
-    conn.commit()
-    conn.close()
-    print("DB initialized successfully.")
+    db_utils_sqlite.init_db()
+    conn = db_utils_sqlite._get_conn()
+    try:
+        version = get_version(conn)
+    finally:
+        conn.close()
+    print(f"DB initialized successfully (schema v{version}).")
 
 if __name__ == "__main__":
     init_db()
@@ -0,0 +1,212 @@
+# src/utils/db_migrations.py
+"""
+Versioned schema migrations for the SQLite database (src/data/trades.db).
+
+The applied version is stored in meta("schema_version"). migrate() runs every
+migration above it in order, each in its own BEGIN IMMEDIATE transaction that
+also bumps the version, so concurrent processes apply each step exactly once
+and a failed step leaves the DB at the previous version.
+
+  1  baseline: trades, events, portfolio, account, meta (the union of the two
+     old init_db() schemas; IF NOT EXISTS, so existing databases are adopted)
+  2  account.updated_at for databases created by the old db_init_sqlite schema
+  3  hot-path indexes: trades(symbol, timestamp), trades(timestamp),
+     events(kind, timestamp), events(timestamp)
+  4  tables that used to be created lazily by their modules: rate_limits,
+     news_articles / news_queries, sentiment_cache, sentiment_agg, indicator_state
+  5  news_articles keyed by (query, key): an article is stored once per query
+     (ticker) it was found for, so each ticker sees and scores it
+
+To change the schema, append a migration; never edit an applied one.
+Modules that own a table call ensure_schema() before using it.
+"""
+
+import os
+import threading
+from typing import Callable, List, Tuple, Union
+
+Migration = Tuple[int, str, Union[str, Callable]]
+
+
+def _add_column_if_missing(table: str, column: str, decl: str) -> Callable:
+    def apply(conn):
+        cols = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in cols:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    return apply
+
+
+MIGRATIONS: List[Migration] = [
+    (1, "baseline schema", """
+    CREATE TABLE IF NOT EXISTS trades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        side TEXT NOT NULL,
+        qty REAL NOT NULL,
+        price REAL NOT NULL,
+        pnl REAL,
+        exec_id TEXT,
+        notes TEXT
+    );
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        source TEXT,
+        payload TEXT
+    );
+    CREATE TABLE IF NOT EXISTS portfolio (
+        symbol TEXT PRIMARY KEY,
+        qty REAL NOT NULL,
+        avg_price REAL,
+        realized_pnl REAL DEFAULT 0.0,
+        updated_at TEXT
+    );
+    CREATE TABLE IF NOT EXISTS account (
+        currency TEXT PRIMARY KEY,
+        cash REAL NOT NULL,
+        updated_at TEXT
+    );
+    """),
+    (2, "account.updated_at", _add_column_if_missing("account", "updated_at", "TEXT")),
+    (3, "trades/events indexes", """
+    CREATE INDEX IF NOT EXISTS idx_trades_symbol_ts ON trades(symbol, timestamp);
+    CREATE INDEX IF NOT EXISTS idx_trades_ts ON trades(timestamp);
+    CREATE INDEX IF NOT EXISTS idx_events_kind_ts ON events(kind, timestamp);
+    CREATE INDEX IF NOT EXISTS idx_events_ts ON events(timestamp);
+    """),
+    (4, "module tables", """
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        provider TEXT NOT NULL,
+        period REAL NOT NULL,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (provider, period)
+    );
+    CREATE TABLE IF NOT EXISTS news_articles (
+        key TEXT PRIMARY KEY,
+        content_hash TEXT NOT NULL,
+        query TEXT NOT NULL,
+        title TEXT,
+        body TEXT,
+        url TEXT,
+        first_seen REAL NOT NULL,
+        last_seen REAL NOT NULL,
+        score REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_news_articles_query_seen ON news_articles(query, last_seen);
+    CREATE INDEX IF NOT EXISTS idx_news_articles_content_hash ON news_articles(content_hash);
+    CREATE TABLE IF NOT EXISTS news_queries (
+        query TEXT PRIMARY KEY,
+        fetched_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS sentiment_cache (
+        digest TEXT PRIMARY KEY,
+        compound REAL NOT NULL,
+        pos REAL NOT NULL,
+        neg REAL NOT NULL,
+        neu REAL NOT NULL,
+        last_used REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_sentiment_cache_last_used ON sentiment_cache(last_used);
+    CREATE TABLE IF NOT EXISTS sentiment_agg (
+        ticker TEXT PRIMARY KEY,
+        weighted_sum REAL NOT NULL,
+        weight REAL NOT NULL,
+        count INTEGER NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS indicator_state (
+        symbol TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    """),
+    (5, "news_articles per query", """
+    CREATE TABLE news_articles_v5 (
+        key TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        query TEXT NOT NULL,
+        title TEXT,
+        body TEXT,
+        url TEXT,
+        first_seen REAL NOT NULL,
+        last_seen REAL NOT NULL,
+        score REAL,
+        PRIMARY KEY (query, key)
+    );
+    INSERT INTO news_articles_v5 (key, content_hash, query, title, body, url, first_seen, last_seen, score)
+        SELECT key, content_hash, query, title, body, url, first_seen, last_seen, score FROM news_articles;
+    DROP TABLE news_articles;
+    ALTER TABLE news_articles_v5 RENAME TO news_articles;
+    CREATE INDEX idx_news_articles_query_seen ON news_articles(query, last_seen);
+    CREATE INDEX idx_news_articles_query_hash ON news_articles(query, content_hash);
+    CREATE INDEX idx_news_articles_key ON news_articles(key);
+    """),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _statements(script: str) -> List[str]:
+    return [s.strip() for s in script.split(";") if s.strip()]
+
+
+def get_version(conn) -> int:
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def migrate(log=print) -> int:
+    """Apply pending migrations; returns the schema version afterwards."""
+    from src.utils.db_utils_sqlite import _get_conn
+
+    conn = _get_conn()
+    try:
+        conn.isolation_level = None  # explicit transactions (executescript would commit mid-way)
+        version = get_version(conn)
+        for number, description, step in MIGRATIONS:
+            if number <= version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if get_version(conn) >= number:  # another process got here first
+                    conn.execute("COMMIT")
+                    version = number
+                    continue
+                if callable(step):
+                    step(conn)
+                else:
+                    for sql in _statements(step):
+                        conn.execute(sql)
+                conn.execute("INSERT INTO meta(key, value) VALUES ('schema_version', ?) "
+                             "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (str(number),))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            version = number
+            if log:
+                log(f"[db] schema migrated to v{number}: {description}")
+        return version
+    finally:
+        conn.close()
+
+
+_ensured = set()
+_ensure_lock = threading.Lock()
+
+
+def ensure_schema():
+    """migrate() once per process and database path (cheap after the first call)."""
+    from src.utils import db_utils_sqlite
+
+    key = (os.getpid(), str(db_utils_sqlite.DB_PATH))
+    if key in _ensured:
+        return
+    with _ensure_lock:
+        if key not in _ensured:
+            migrate(log=None)
+            _ensured.add(key)
@@ -173,7 +173,13 @@
 #     return {"positions": portfolio, "total_realized": total_realized}
 
 # src/utils/db_utils_sqlite.py
+import atexit
+import os
 import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime, timezone
 from typing import Optional, List, Dict
@@ -181,100 +187,247 @@ from typing import Optional, List, Dict
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DB_PATH = PROJECT_ROOT / "src" / "data" / "trades.db"
 
-def _get_conn():
+# Connections are long-lived: each thread keeps one idle connection that
+# _get_conn() hands out and close() hands back (a nested _get_conn() while it is
+# checked out gets a temporary extra connection). Pragmas are applied once per
+# connection, and sqlite3's per-connection statement cache keeps the helpers'
+# prepared statements. close_all() (also run at exit) closes them for real.
+SQLITE_PERSISTENT = os.getenv("SQLITE_PERSISTENT", "true").lower() in ("1", "true", "yes")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")        # NORMAL is durable across app crashes in WAL mode
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "16384"))          # page cache per connection
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(128 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# insert_event() without conn= only appends to an in-memory buffer; flush_events()
+# writes the buffer with one executemany in one transaction. A flush happens once
+# EVENT_FLUSH_SIZE rows are pending or the oldest has waited EVENT_FLUSH_SECONDS,
+# immediately for EVENT_FLUSH_KINDS, at the end of every run_cycle(), on
+# shutdown (src/main.py) and at exit.
+EVENT_BUFFER = os.getenv("EVENT_BUFFER", "true").lower() in ("1", "true", "yes")
+EVENT_FLUSH_SIZE = int(os.getenv("EVENT_FLUSH_SIZE", "100"))
+EVENT_FLUSH_SECONDS = float(os.getenv("EVENT_FLUSH_SECONDS", "5"))
+EVENT_FLUSH_KINDS = {k.strip() for k in os.getenv("EVENT_FLUSH_KINDS", "error").split(",") if k.strip()}
+_EVENT_BUFFER_MAX = 50000  # rows kept while the DB is unwritable; the oldest are dropped beyond this
+
+_local = threading.local()
+_open_conns = weakref.WeakSet()
+_open_lock = threading.Lock()
+
+_event_buf: List[tuple] = []       # (timestamp, kind, source, payload)
+_event_first = 0.0                 # time.monotonic() when the oldest buffered row was added
+_event_lock = threading.Lock()
+
+
+class _PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() returns it to the calling thread's slot."""
+
+    def close(self):
+        if getattr(self, "_released", False):
+            return
+        try:
+            if self.in_transaction:
+                self.rollback()  # same as closing without commit
+            self.isolation_level = ""
+            self.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            self.close_for_real()
+            return
+        if getattr(_local, "idle", None) is None and self._owner == (os.getpid(), str(DB_PATH)):
+            self._released = True
+            _local.idle = self
+        else:
+            self.close_for_real()
+
+    def close_for_real(self):
+        self._closed = True
+        with _open_lock:
+            _open_conns.discard(self)
+        super().close()
+
+
+def _connect(factory=sqlite3.Connection):
     conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
-                           check_same_thread=False)
+                           check_same_thread=False, factory=factory, cached_statements=256)
     conn.row_factory = sqlite3.Row
     try:
         conn.execute("PRAGMA journal_mode=WAL;")
+        if SQLITE_PERSISTENT:
+            conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+            conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
     except Exception:
         pass
     return conn
 
-def init_db():
-    """Create missing tables (safe to run repeatedly)."""
+
+def _get_conn():
+    if not SQLITE_PERSISTENT:
+        return _connect()
+    conn = getattr(_local, "idle", None)
+    _local.idle = None
+    if conn is not None and not conn._closed:
+        if conn._owner == (os.getpid(), str(DB_PATH)):
+            conn._released = False
+            return conn
+        if conn._owner[0] == os.getpid():
+            conn.close_for_real()  # DB_PATH changed
+        # else: inherited across fork; never touch the parent's handle
+    conn = _connect(_PooledConnection)
+    conn._owner = (os.getpid(), str(DB_PATH))
+    conn._released = conn._closed = False
+    with _open_lock:
+        _open_conns.add(conn)
+    return conn
+
+
+def close_all():
+    """Close every persistent connection (all threads). Safe to call more than once."""
+    with _open_lock:
+        conns = list(_open_conns)
+    for conn in conns:
+        try:
+            if conn._owner[0] == os.getpid():
+                conn.close_for_real()
+        except Exception:
+            pass
+    _local.idle = None
+
+
+atexit.register(close_all)
+
+
+@contextmanager
+def transaction():
+    """
+    Unit of work: one connection and one IMMEDIATE transaction for several writes.
+    Pass the yielded connection to the helpers below (conn=...); they then neither
+    commit nor close it. Commits when the block exits, rolls back if it raises.
+
+        with transaction() as conn:
+            trade_id = insert_trade(..., conn=conn)
+            update_account_balance(-cost, conn=conn)
+    """
     conn = _get_conn()
-    cur = conn.cursor()
-    cur.executescript("""
-    CREATE TABLE IF NOT EXISTS trades (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp TEXT NOT NULL,
-        symbol TEXT NOT NULL,
-        side TEXT NOT NULL,
-        qty REAL NOT NULL,
-        price REAL NOT NULL,
-        pnl REAL,
-        exec_id TEXT,
-        notes TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS events (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp TEXT NOT NULL,
-        kind TEXT NOT NULL,
-        source TEXT,
-        payload TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS portfolio (
-        symbol TEXT PRIMARY KEY,
-        qty REAL NOT NULL,
-        avg_price REAL,
-        realized_pnl REAL DEFAULT 0.0,
-        updated_at TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS meta (
-        key TEXT PRIMARY KEY,
-        value TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS account (
-        currency TEXT PRIMARY KEY,
-        cash REAL NOT NULL,
-        updated_at TEXT
-    );
-    """)
-    conn.commit()
-    conn.close()
+    conn.isolation_level = None  # explicit BEGIN/COMMIT
+    depth = getattr(_local, "tx_depth", 0)
+    _local.tx_depth = depth + 1
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    finally:
+        _local.tx_depth = depth
+        conn.close()
+
+
+@contextmanager
+def _use(conn=None):
+    """The caller's connection inside a transaction(), otherwise a fresh one that is committed and closed."""
+    if conn is not None:
+        yield conn
+        return
+    own = _get_conn()
+    try:
+        yield own
+        own.commit()
+    finally:
+        own.close()
+
+
+def init_db():
+    """Create or upgrade the schema (src/utils/db_migrations.py; safe to run repeatedly)."""
+    from src.utils.db_migrations import migrate
+    Path(DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+    migrate()
 
     # ensure default USD account exists (10000 USD)
     ensure_account_initialized("USD", 10000.0)
 
 
 # --- trades / events helpers
-def insert_trade(symbol, side, qty, price, pnl=None, exec_id=None, notes=None, timestamp=None):
+def insert_trade(symbol, side, qty, price, pnl=None, exec_id=None, notes=None, timestamp=None, conn=None):
     ts = timestamp or datetime.now(timezone.utc).isoformat()
-    conn = _get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO trades (timestamp, symbol, side, qty, price, pnl, exec_id, notes) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        (ts, symbol, side, qty, price, pnl, exec_id, notes)
-    )
-    conn.commit()
-    last_id = cur.lastrowid
-    conn.close()
-    return last_id
+    with _use(conn) as c:
+        cur = c.execute(
+            "INSERT INTO trades (timestamp, symbol, side, qty, price, pnl, exec_id, notes) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (ts, symbol, side, qty, price, pnl, exec_id, notes)
+        )
+        return cur.lastrowid
+
+def update_trade_pnl(trade_id: int, pnl: float, conn=None):
+    with _use(conn) as c:
+        c.execute("UPDATE trades SET pnl = ? WHERE id = ?", (pnl, trade_id))
+
+def update_trade_qty(trade_id: int, qty: float, conn=None):
+    with _use(conn) as c:
+        c.execute("UPDATE trades SET qty = ? WHERE id = ?", (qty, trade_id))
+
+def insert_event(kind, source=None, payload=None, timestamp=None, conn=None, flush=None):
+    """
+    Log an event. With conn= (inside transaction()) or EVENT_BUFFER off the row is
+    written right away and its id returned; otherwise it is buffered (returns None)
+    and flushed per the EVENT_FLUSH_* rules. flush=True forces an immediate flush.
+    """
+    global _event_first
+    ts = timestamp or datetime.now(timezone.utc).isoformat()
+    if conn is not None or not EVENT_BUFFER:
+        with _use(conn) as c:
+            cur = c.execute(
+                "INSERT INTO events (timestamp, kind, source, payload) VALUES (?, ?, ?, ?)",
+                (ts, kind, source, payload)
+            )
+            return cur.lastrowid
+    now = time.monotonic()
+    with _event_lock:
+        if not _event_buf:
+            _event_first = now
+        _event_buf.append((ts, kind, source, payload))
+        due = len(_event_buf) >= EVENT_FLUSH_SIZE or now - _event_first >= EVENT_FLUSH_SECONDS
+    if flush or due or (flush is None and kind in EVENT_FLUSH_KINDS):
+        flush_events()
+    return None
+
+def flush_events() -> int:
+    """
+    Write all buffered events in one transaction; returns the number written.
+    On failure the rows go back to the buffer and the error is raised. Inside a
+    transaction() on this thread it returns 0; the next flush picks them up.
+    """
+    global _event_buf
+    if getattr(_local, "tx_depth", 0):
+        return 0  # this thread holds a write transaction
+    with _event_lock:
+        if not _event_buf:
+            return 0
+        rows, _event_buf = _event_buf, []
+        try:
+            with transaction() as conn:
+                conn.executemany("INSERT INTO events (timestamp, kind, source, payload) VALUES (?, ?, ?, ?)", rows)
+        except BaseException:
+            _event_buf = (rows + _event_buf)[-_EVENT_BUFFER_MAX:]
+            raise
+        return len(rows)
+
+def _flush_events_at_exit():
+    try:
+        flush_events()
+    except Exception as e:
+        print(f"[db] {len(_event_buf)} buffered events could not be written at exit: {e}")
 
-def update_trade_pnl(trade_id: int, pnl: float):
-    conn = _get_conn()
-    cur = conn.cursor()
-    cur.execute("UPDATE trades SET pnl = ? WHERE id = ?", (pnl, trade_id))
-    conn.commit()
-    conn.close()
+def _reset_event_buffer():
+    global _event_buf
+    _event_buf = []  # a forked child must not write its parent's pending events again
+
+
+atexit.register(_flush_events_at_exit)  # registered after close_all, so it runs before it
+os.register_at_fork(after_in_child=_reset_event_buffer)
 
-def insert_event(kind, source=None, payload=None, timestamp=None):
-    ts = timestamp or datetime.now(timezone.utc).isoformat()
-    conn = _get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO events (timestamp, kind, source, payload) VALUES (?, ?, ?, ?)",
-        (ts, kind, source, payload)
-    )
-    conn.commit()
-    last_id = cur.lastrowid
-    conn.close()
-    return last_id
 
 def fetch_trades(limit=200):
     conn = _get_conn()
@@ -284,7 +437,17 @@ def fetch_trades(limit=200):
     conn.close()
     return [dict(r) for r in rows]
 
+def get_last_trade_id() -> int:
+    """Highest trade id (0 if there are none); a rowid lookup, not a scan."""
+    conn = _get_conn()
+    try:
+        row = conn.execute("SELECT MAX(id) FROM trades").fetchone()
+    finally:
+        conn.close()
+    return int(row[0] or 0)
+
 def fetch_events(limit=200):
+    flush_events()  # include this process's buffered events
     conn = _get_conn()
     cur = conn.cursor()
     cur.execute("SELECT * FROM events ORDER BY id DESC LIMIT ?", (limit,))
@@ -293,6 +456,118 @@ def fetch_events(limit=200):
     return [dict(r) for r in rows]
 
 
+# --- streaming readers
+# Keyset pagination: every page is a separate indexed query that continues after
+# the last key seen (no OFFSET, no read transaction held between pages), so a
+# scan over millions of rows keeps one page in memory.
+DB_READ_CHUNK = int(os.getenv("DB_READ_CHUNK", "5000"))
+
+# column -> numpy dtype for the "numpy"/"pandas" formats (object = text)
+_TABLE_COLUMNS = {
+    "trades": {"id": "int64", "timestamp": "object", "symbol": "object", "side": "object", "qty": "float64",
+               "price": "float64", "pnl": "float64", "exec_id": "object", "notes": "object"},
+    "events": {"id": "int64", "timestamp": "object", "kind": "object", "source": "object", "payload": "object"},
+}
+
+
+def _ts(value) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _iter_table(table: str, key_col: Optional[str], key, after_id: int, max_id: Optional[int],
+                since, until, columns: Optional[List[str]], chunk_size: int, fmt: str):
+    known = _TABLE_COLUMNS[table]
+    columns = list(columns or known)
+    bad = [c for c in columns if c not in known]
+    if bad:
+        raise ValueError(f"unknown {table} columns: {bad}")
+    if fmt not in ("tuples", "chunks", "numpy", "pandas"):
+        raise ValueError(f"unknown fmt: {fmt!r}")
+    if fmt == "tuples":
+        for chunk in _iter_table(table, key_col, key, after_id, max_id, since, until, columns, chunk_size, "chunks"):
+            yield from chunk
+        return
+
+    # id order by default; (timestamp, id) order when a time range or a
+    # symbol/kind filter is given, so that the (…, timestamp) index drives the scan
+    by_time = since is not None or until is not None or key is not None
+    select = ["id", "timestamp"] + [c for c in columns if c not in ("id", "timestamp")]
+    pos = {c: i for i, c in enumerate(select)}
+    idx = [pos[c] for c in columns]
+    where, params = [], []
+    if by_time and after_id:
+        where.append("id > ?")  # in id order the page's keyset condition takes care of after_id
+        params.append(int(after_id))
+    if max_id is not None:
+        where.append("id <= ?")
+        params.append(int(max_id))
+    if key is not None:
+        where.append(f"{key_col} = ?")
+        params.append(key)
+    if until is not None:
+        where.append("timestamp < ?")
+        params.append(_ts(until))
+    order = "timestamp, id" if by_time else "id"
+    last_ts, last_id, first = _ts(since), int(after_id or 0), True
+    chunk_size = max(1, int(chunk_size or DB_READ_CHUNK))
+    while True:
+        if not by_time:
+            keyset, keyset_params = ["id > ?"], [last_id]
+        elif first:
+            keyset, keyset_params = (["timestamp >= ?"], [last_ts]) if last_ts is not None else ([], [])
+        else:
+            keyset, keyset_params = ["timestamp >= ? AND (timestamp > ? OR id > ?)"], [last_ts, last_ts, last_id]
+        clauses = keyset + where
+        sql = (f"SELECT {', '.join(select)} FROM {table}" + (f" WHERE {' AND '.join(clauses)}" if clauses else "")
+               + f" ORDER BY {order} LIMIT ?")
+        conn = _get_conn()
+        conn.row_factory = None  # plain tuples (close() restores sqlite3.Row)
+        try:
+            rows = conn.execute(sql, keyset_params + params + [chunk_size]).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return
+        last_id, last_ts, first = rows[-1][0], rows[-1][1], False
+        if fmt == "chunks":
+            yield rows if columns == select else [tuple(r[i] for i in idx) for r in rows]
+        else:
+            import numpy as np
+            data = {c: np.array([r[pos[c]] for r in rows], dtype=known[c]) for c in columns}
+            if fmt == "pandas":
+                import pandas as pd
+                data = pd.DataFrame(data, columns=columns)
+            yield data
+        if len(rows) < chunk_size:
+            return
+
+
+def iter_trades(after_id: int = 0, max_id: Optional[int] = None, since=None, until=None,
+                symbol: Optional[str] = None, columns: Optional[List[str]] = None,
+                chunk_size: int = DB_READ_CHUNK, fmt: str = "tuples"):
+    """
+    Stream trades with id in (after_id, max_id] and timestamp in [since, until)
+    (ISO strings or datetimes), optionally for one symbol. Rows come in id order,
+    or in (timestamp, id) order when since/until/symbol is given.
+
+    fmt: "tuples" yields one tuple per row (in `columns` order, default all),
+    "chunks" yields lists of up to chunk_size tuples, "numpy" yields
+    {column: ndarray} per chunk (NULL -> nan for numeric columns) and "pandas"
+    a DataFrame per chunk.
+
+        for chunk in iter_trades(after_id=last_id, fmt="pandas"): ...
+    """
+    return _iter_table("trades", "symbol", symbol, after_id, max_id, since, until, columns, chunk_size, fmt)
+
+
+def iter_events(after_id: int = 0, max_id: Optional[int] = None, since=None, until=None,
+                kind: Optional[str] = None, columns: Optional[List[str]] = None,
+                chunk_size: int = DB_READ_CHUNK, fmt: str = "tuples"):
+    """Like iter_trades() for events, optionally for one kind. Buffered events are flushed first."""
+    flush_events()
+    return _iter_table("events", "kind", kind, after_id, max_id, since, until, columns, chunk_size, fmt)
+
+
 # --- portfolio helpers
 def get_portfolio() -> Dict[str, Dict]:
     conn = _get_conn()
@@ -302,39 +577,32 @@ def get_portfolio() -> Dict[str, Dict]:
     conn.close()
     return {r["symbol"]: {"qty": r["qty"], "avg_price": r["avg_price"], "realized_pnl": r["realized_pnl"], "updated_at": r["updated_at"]} for r in rows}
 
-def get_position(symbol: str) -> Optional[Dict]:
-    conn = _get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM portfolio WHERE symbol = ?", (symbol,))
-    row = cur.fetchone()
-    conn.close()
+def get_position(symbol: str, conn=None) -> Optional[Dict]:
+    with _use(conn) as c:
+        row = c.execute("SELECT * FROM portfolio WHERE symbol = ?", (symbol,)).fetchone()
     return dict(row) if row else None
 
-def upsert_position(symbol: str, qty: float, avg_price: Optional[float], realized_pnl_delta: float = 0.0):
+def upsert_position(symbol: str, qty: float, avg_price: Optional[float], realized_pnl_delta: float = 0.0, conn=None):
     """
     Insert or update position. qty may be zero (to clear).
     realized_pnl_delta adds to existing realized pnl.
     """
     now = datetime.now(timezone.utc).isoformat()
-    conn = _get_conn()
-    cur = conn.cursor()
-    # check existing
-    cur.execute("SELECT qty, avg_price, realized_pnl FROM portfolio WHERE symbol = ?", (symbol,))
-    row = cur.fetchone()
-    if row:
-        prev_qty = row["qty"]
-        prev_avg = row["avg_price"] or 0.0
-        prev_realized = row["realized_pnl"] or 0.0
-        new_realized = prev_realized + realized_pnl_delta
-        # If qty becomes zero, keep avg_price as NULL
-        new_avg = avg_price if qty != 0 else None
-        cur.execute("UPDATE portfolio SET qty = ?, avg_price = ?, realized_pnl = ?, updated_at = ? WHERE symbol = ?",
-                    (qty, new_avg, new_realized, now, symbol))
-    else:
-        cur.execute("INSERT INTO portfolio (symbol, qty, avg_price, realized_pnl, updated_at) VALUES (?, ?, ?, ?, ?)",
-                    (symbol, qty, avg_price, realized_pnl_delta, now))
-    conn.commit()
-    conn.close()
+    with _use(conn) as c:
+        cur = c.cursor()
+        # check existing
+        cur.execute("SELECT qty, avg_price, realized_pnl FROM portfolio WHERE symbol = ?", (symbol,))
+        row = cur.fetchone()
+        if row:
+            prev_realized = row["realized_pnl"] or 0.0
+            new_realized = prev_realized + realized_pnl_delta
+            # If qty becomes zero, keep avg_price as NULL
+            new_avg = avg_price if qty != 0 else None
+            cur.execute("UPDATE portfolio SET qty = ?, avg_price = ?, realized_pnl = ?, updated_at = ? WHERE symbol = ?",
+                        (qty, new_avg, new_realized, now, symbol))
+        else:
+            cur.execute("INSERT INTO portfolio (symbol, qty, avg_price, realized_pnl, updated_at) VALUES (?, ?, ?, ?, ?)",
+                        (symbol, qty, avg_price, realized_pnl_delta, now))
 
 def compute_unrealized_pnl(symbol: str, market_price: float) -> float:
     pos = get_position(symbol)
@@ -344,10 +612,49 @@ def compute_unrealized_pnl(symbol: str, market_price: float) -> float:
     avg = pos["avg_price"]
     return (market_price - avg) * qty
 
-def get_equity_snapshot() -> Dict:
+def get_equity_snapshot(marks: Optional[Dict[str, Optional[float]]] = None, currency: str = "USD") -> Dict:
+    """
+    Portfolio valued through src/utils/valuation.py:
+    {positions, total_realized, total_unrealized, market_value, unpriced, unpriced_cost, cash, equity}
+    marks={symbol: price} values it without any network I/O; by default the marks
+    come from valuation.get_marks() (one batched request, TTL-cached).
+    equity is cash + market_value; unpriced positions are only in unpriced_cost.
+    """
+    from src.utils.valuation import value_portfolio
     portfolio = get_portfolio()
-    total_realized = sum(p["realized_pnl"] or 0.0 for p in portfolio.values())
-    return {"positions": portfolio, "total_realized": total_realized}
+    v = value_portfolio(portfolio, marks)
+    cash = get_account_balance(currency)
+    return {
+        "positions": portfolio,
+        "total_realized": v["total_realized"],
+        "total_unrealized": v["total_unrealized"],
+        "market_value": v["market_value"],
+        "unpriced": v["unpriced"],
+        "unpriced_cost": v["unpriced_cost"],
+        "cash": cash,
+        "equity": cash + v["market_value"],
+    }
+
+
+# --- meta helpers (small key/value store, e.g. persisted agent state)
+def get_meta(key: str) -> Optional[str]:
+    from src.utils.db_migrations import ensure_schema
+    ensure_schema()
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT value FROM meta WHERE key = ?", (key,))
+    row = cur.fetchone()
+    conn.close()
+    return row["value"] if row else None
+
+def set_meta(key: str, value: str):
+    from src.utils.db_migrations import ensure_schema
+    ensure_schema()
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO meta(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+    conn.commit()
+    conn.close()
 
 
 # --- account helpers (NEW)
@@ -363,12 +670,9 @@ def ensure_account_initialized(currency: str = "USD", initial_cash: float = 1000
         conn.commit()
     conn.close()
 
-def get_account_balance(currency: str = "USD") -> float:
-    conn = _get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT cash FROM account WHERE currency = ?", (currency,))
-    row = cur.fetchone()
-    conn.close()
+def get_account_balance(currency: str = "USD", conn=None) -> float:
+    with _use(conn) as c:
+        row = c.execute("SELECT cash FROM account WHERE currency = ?", (currency,)).fetchone()
     return float(row["cash"]) if row else 0.0
 
 def set_account_balance(amount: float, currency: str = "USD"):
@@ -379,23 +683,21 @@ def set_account_balance(amount: float, currency: str = "USD"):
     conn.commit()
     conn.close()
 
-def update_account_balance(delta: float, currency: str = "USD") -> float:
+def update_account_balance(delta: float, currency: str = "USD", conn=None) -> float:
     """
     Add delta to cash (delta can be negative to debit). Returns new balance.
     """
-    conn = _get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT cash FROM account WHERE currency = ?", (currency,))
-    row = cur.fetchone()
-    if row:
-        new = float(row["cash"]) + float(delta)
-        now = datetime.now(timezone.utc).isoformat()
-        cur.execute("UPDATE account SET cash = ?, updated_at = ? WHERE currency = ?", (new, now, currency))
-    else:
-        # create account row
-        new = float(delta)
-        now = datetime.now(timezone.utc).isoformat()
-        cur.execute("INSERT INTO account (currency, cash, updated_at) VALUES (?, ?, ?)", (currency, new, now))
-    conn.commit()
-    conn.close()
+    with _use(conn) as c:
+        cur = c.cursor()
+        cur.execute("SELECT cash FROM account WHERE currency = ?", (currency,))
+        row = cur.fetchone()
+        if row:
+            new = float(row["cash"]) + float(delta)
+            now = datetime.now(timezone.utc).isoformat()
+            cur.execute("UPDATE account SET cash = ?, updated_at = ? WHERE currency = ?", (new, now, currency))
+        else:
+            # create account row
+            new = float(delta)
+            now = datetime.now(timezone.utc).isoformat()
+            cur.execute("INSERT INTO account (currency, cash, updated_at) VALUES (?, ?, ?)", (currency, new, now))
     return new
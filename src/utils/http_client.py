@@ -0,0 +1,163 @@
+# src/utils/http_client.py
+"""
+Shared HTTP client for all agents.
+
+- one requests.Session for the whole process, so connections are kept alive and
+  pooled per host (no new TCP/TLS handshake per call)
+- default timeout and retry/backoff policy from env, overridable per host with
+  configure_host() and per call with timeout=... (CoinGecko, Telegram and
+  Gemini have their own defaults in _host_timeouts; the agents pass none)
+- only idempotent methods (GET/HEAD) are retried; order placement (POST) never is
+- per-host latency statistics: get_http_stats()
+
+Usage:
+    from src.utils import http_client
+    r = http_client.get(url, params=...)
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+# 429 is not retried: AlphaVantage/CoinGecko quotas are what ran out, so another
+# request only burns more of it. The caller sees it at once and backs off (the
+# provider registry opens the circuit, the rate limiter holds its tokens).
+_RETRY_STATUS = (500, 502, 503, 504)
+
+
+class _Retry(Retry):
+    RETRY_AFTER_STATUS_CODES = frozenset({413, 503})  # urllib3 would otherwise retry a 429 that has Retry-After
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_host_timeouts: Dict[str, float] = {  # host -> timeout, seconds (configure_host() overrides)
+    "api.coingecko.com": 10.0,
+    "api.telegram.org": 10.0,
+    "api.gemini.com": 20.0,  # order placement: wait longer rather than lose track of an order
+    "api.sandbox.gemini.com": 20.0,
+}
+_host_retries: Dict[str, tuple] = {}  # host -> (retries, backoff)
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _make_adapter(retries: int, backoff: float) -> HTTPAdapter:
+    retry = _Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=_RETRY_STATUS,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,  # hand the last response back so callers can raise_for_status()
+    )
+    return HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+
+
+def get_session() -> requests.Session:
+    global _session
+    with _lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = _make_adapter(HTTP_RETRIES, HTTP_BACKOFF)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            for host, (retries, backoff) in _host_retries.items():
+                _mount_host(s, host, retries, backoff)
+            _session = s
+        return _session
+
+
+def _mount_host(s: requests.Session, host: str, retries: int, backoff: float):
+    adapter = _make_adapter(retries, backoff)
+    s.mount(f"https://{host}/", adapter)
+    s.mount(f"http://{host}/", adapter)
+
+
+def configure_host(host: str, timeout: Optional[float] = None, retries: Optional[int] = None,
+                   backoff: Optional[float] = None):
+    """
+    Override the timeout and/or retry policy for one host (e.g. "api.coingecko.com").
+    """
+    if timeout is not None:
+        _host_timeouts[host] = float(timeout)
+    if retries is not None or backoff is not None:
+        policy = (HTTP_RETRIES if retries is None else int(retries),
+                  HTTP_BACKOFF if backoff is None else float(backoff))
+        s = get_session()
+        with _lock:
+            _host_retries[host] = policy
+            _mount_host(s, host, *policy)
+
+
+def _record(host: str, elapsed_ms: float, ok: bool):
+    with _lock:
+        st = _stats.get(host)
+        if st is None:
+            st = _stats[host] = {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+        st["count"] += 1
+        if not ok:
+            st["errors"] += 1
+        st["total_ms"] += elapsed_ms
+        st["last_ms"] = elapsed_ms
+        if elapsed_ms > st["max_ms"]:
+            st["max_ms"] = elapsed_ms
+
+
+def request(method: str, url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared session and record per-host latency.
+    Exceptions from requests propagate unchanged.
+    """
+    host = urlsplit(url).netloc
+    if timeout is None:
+        timeout = _host_timeouts.get(host, HTTP_TIMEOUT)
+    t0 = time.perf_counter()
+    ok = False
+    try:
+        resp = get_session().request(method, url, timeout=timeout, **kwargs)
+        ok = resp.status_code < 400
+        return resp
+    finally:
+        _record(host, (time.perf_counter() - t0) * 1000.0, ok)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def get_http_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Per-host stats: {host: {count, errors, total_ms, avg_ms, max_ms, last_ms}}
+    """
+    with _lock:
+        out = {h: dict(st) for h, st in _stats.items()}
+    for st in out.values():
+        st["avg_ms"] = st["total_ms"] / st["count"] if st["count"] else 0.0
+    return out
+
+
+def reset_http_stats():
+    with _lock:
+        _stats.clear()
+
+
+def close():
+    """Close pooled connections (safe to call on shutdown; a new session is created on next use)."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,210 @@
+# src/utils/indicators.py
+"""
+Incremental technical indicators per symbol, updated in O(1) per new price:
+
+  ema         EMA(INDICATOR_EMA_PERIOD) of the price, seeded with the SMA of the first period prices
+  rsi         Wilder RSI(INDICATOR_RSI_PERIOD), 0..100
+  atr         Wilder ATR(INDICATOR_ATR_PERIOD); with price-only updates the
+              true range is |price - previous price|
+  volatility  sample std of the last INDICATOR_VOL_WINDOW log returns (per update, not annualized)
+
+Each value is None until enough samples have arrived. The state is small and
+kept in the SQLite table `indicator_state` as JSON: running averages plus a
+ring buffer of returns. A restarted agent carries on without reloading price
+history.
+
+Usage:
+    from src.utils.indicators import update_indicators
+    ind = update_indicators("BTCUSD", last_price)   # {"ema", "rsi", "atr", "volatility", "samples"}
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+EMA_PERIOD = int(os.getenv("INDICATOR_EMA_PERIOD", "20"))
+RSI_PERIOD = int(os.getenv("INDICATOR_RSI_PERIOD", "14"))
+ATR_PERIOD = int(os.getenv("INDICATOR_ATR_PERIOD", "14"))
+VOL_WINDOW = int(os.getenv("INDICATOR_VOL_WINDOW", "20"))
+
+_lock = threading.Lock()
+_cache: Dict[str, Dict] = {}  # symbol -> state (write-through to the DB)
+
+
+def _new_state() -> Dict:
+    return {
+        "n": 0, "last_ts": None, "prev_close": None,
+        "ema": None, "ema_sum": 0.0,
+        "gain": 0.0, "loss": 0.0, "rsi_n": 0,
+        "atr": 0.0, "atr_n": 0,
+        "rets": [], "ret_pos": 0, "ret_sum": 0.0, "ret_sq": 0.0,
+    }
+
+
+def _step(st: Dict, price: float, high: float, low: float):
+    """Fold one observation into the state (mutates st)."""
+    prev = st["prev_close"]
+    st["n"] += 1
+
+    # EMA: SMA seed over the first EMA_PERIOD prices, then exponential smoothing
+    if st["n"] <= EMA_PERIOD:
+        st["ema_sum"] += price
+        if st["n"] == EMA_PERIOD:
+            st["ema"] = st["ema_sum"] / EMA_PERIOD
+    else:
+        alpha = 2.0 / (EMA_PERIOD + 1)
+        st["ema"] = st["ema"] + alpha * (price - st["ema"])
+
+    if prev is not None:
+        # RSI (Wilder): simple average for the first period changes, then smoothing
+        change = price - prev
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if st["rsi_n"] < RSI_PERIOD:
+            st["gain"] += gain / RSI_PERIOD
+            st["loss"] += loss / RSI_PERIOD
+        else:
+            st["gain"] = (st["gain"] * (RSI_PERIOD - 1) + gain) / RSI_PERIOD
+            st["loss"] = (st["loss"] * (RSI_PERIOD - 1) + loss) / RSI_PERIOD
+        st["rsi_n"] += 1
+
+        # ATR (Wilder)
+        tr = max(high - low, abs(high - prev), abs(low - prev))
+        if st["atr_n"] < ATR_PERIOD:
+            st["atr"] += tr / ATR_PERIOD
+        else:
+            st["atr"] = (st["atr"] * (ATR_PERIOD - 1) + tr) / ATR_PERIOD
+        st["atr_n"] += 1
+
+        # rolling volatility: ring buffer of log returns with running sums
+        if prev > 0 and price > 0:
+            r = math.log(price / prev)
+            rets = st["rets"]
+            if len(rets) < VOL_WINDOW:
+                rets.append(r)
+            else:
+                old = rets[st["ret_pos"]]
+                st["ret_sum"] -= old
+                st["ret_sq"] -= old * old
+                rets[st["ret_pos"]] = r
+                st["ret_pos"] = (st["ret_pos"] + 1) % VOL_WINDOW
+            st["ret_sum"] += r
+            st["ret_sq"] += r * r
+            if st["ret_pos"] == 0:
+                # once per full turn of the buffer (amortized O(1)), drop accumulated rounding error
+                st["ret_sum"] = math.fsum(rets)
+                st["ret_sq"] = math.fsum(x * x for x in rets)
+    st["prev_close"] = price
+
+
+def _values(st: Dict) -> Dict:
+    rsi = None
+    if st["rsi_n"] >= RSI_PERIOD:
+        if st["loss"] == 0:
+            rsi = 100.0 if st["gain"] > 0 else 50.0
+        else:
+            rsi = 100.0 - 100.0 / (1.0 + st["gain"] / st["loss"])
+    vol = None
+    k = len(st["rets"])
+    if k >= VOL_WINDOW and k > 1:
+        var = (st["ret_sq"] - st["ret_sum"] * st["ret_sum"] / k) / (k - 1)
+        vol = math.sqrt(max(var, 0.0))
+    return {
+        "ema": st["ema"],
+        "rsi": rsi,
+        "atr": st["atr"] if st["atr_n"] >= ATR_PERIOD else None,
+        "volatility": vol,
+        "samples": st["n"],
+    }
+
+
+def _conn():
+    from src.utils.db_migrations import ensure_schema
+    from src.utils.db_utils_sqlite import _get_conn
+    ensure_schema()  # indicator_state
+    return _get_conn()
+
+
+def _load(symbol: str) -> Dict:
+    st = _cache.get(symbol)
+    if st is not None:
+        return st
+    st = _new_state()
+    try:
+        conn = _conn()
+        try:
+            row = conn.execute("SELECT state FROM indicator_state WHERE symbol = ?", (symbol,)).fetchone()
+        finally:
+            conn.close()
+        if row:
+            st.update(json.loads(row["state"]))
+    except Exception as e:
+        logger.warning("indicator state read failed for %s: %s", symbol, e)
+    _cache[symbol] = st
+    return st
+
+
+def _save(symbol: str, st: Dict):
+    try:
+        conn = _conn()
+        try:
+            conn.execute("INSERT INTO indicator_state(symbol, state, updated_at) VALUES (?, ?, ?) "
+                         "ON CONFLICT(symbol) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                         (symbol, json.dumps(st), time.time()))
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("indicator state write failed for %s: %s", symbol, e)
+
+
+def update_indicators(symbol: str, price: float, ts: Optional[float] = None,
+                      high: Optional[float] = None, low: Optional[float] = None, persist: bool = True) -> Dict:
+    """
+    Add one price observation (ts in epoch seconds, default now; optional bar
+    high/low for ATR) and return the current values. Observations not newer
+    than the last one are ignored, so re-running a cycle does not double count.
+    """
+    symbol = symbol.upper()
+    ts = time.time() if ts is None else float(ts)
+    price = float(price)
+    with _lock:
+        st = _load(symbol)
+        if price > 0 and (st["last_ts"] is None or ts > st["last_ts"]):
+            _step(st, price, price if high is None else float(high), price if low is None else float(low))
+            st["last_ts"] = ts
+            if persist:
+                _save(symbol, st)
+        return _values(st)
+
+
+def get_indicators(symbol: str) -> Dict:
+    """Current values without adding an observation."""
+    with _lock:
+        return _values(_load(symbol.upper()))
+
+
+def reset_indicators(symbol: Optional[str] = None):
+    with _lock:
+        if symbol is None:
+            _cache.clear()
+        else:
+            _cache.pop(symbol.upper(), None)
+        try:
+            conn = _conn()
+            try:
+                if symbol is None:
+                    conn.execute("DELETE FROM indicator_state")
+                else:
+                    conn.execute("DELETE FROM indicator_state WHERE symbol = ?", (symbol.upper(),))
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning("indicator state reset failed: %s", e)
@@ -0,0 +1,196 @@
+# src/utils/param_sweep.py
+"""
+Parameter sweep over decision_agent's rule parameters (buy_threshold,
+sell_threshold, position_fraction, sell_fraction) using the backtest engine.
+
+- The parameter-independent inputs (cycle grid, as-of price and sentiment
+  matrices from backtest.prepare_backtest) are computed once and written as
+  .npy files into the sweep directory. Workers np.load them with mmap_mode="r",
+  so every process shares the same read-only pages and nothing large is pickled.
+- Runs execute on a process pool (one simulate() per parameter set). They are
+  independent, so throughput scales with the number of worker processes.
+- Every finished run is appended to results.jsonl in the sweep directory
+  (one JSON line, flushed immediately). Re-running the same sweep skips the
+  parameter sets already recorded, so an interrupted sweep resumes.
+- The sweep directory is SWEEP_DIR/<name>/<fingerprint>, where the fingerprint
+  hashes the inputs (symbols, array shapes and contents) and initial_cash, so
+  a rerun under the same name with different data starts a fresh checkpoint
+  instead of returning the old results.
+- rank() orders results by PnL (desc), then max drawdown (asc).
+
+Usage:
+    python -m src.utils.param_sweep --symbols BTCUSD,ETHUSD --interval 5min --samples 200 --workers 8
+"""
+
+import hashlib
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SWEEP_DIR = Path(os.getenv("SWEEP_DIR", PROJECT_ROOT / "src" / "data" / "sweeps"))
+
+DEFAULT_GRID: Dict[str, List[float]] = {
+    "buy_threshold": [0.1, 0.2, 0.3, 0.4],
+    "sell_threshold": [-0.1, -0.2, -0.3, -0.4],
+    "position_fraction": [0.001, 0.005, 0.01],
+    "sell_fraction": [0.25, 0.5, 1.0],
+}
+
+DEFAULT_RANGES: Dict[str, Tuple[float, float]] = {
+    "buy_threshold": (0.05, 0.6),
+    "sell_threshold": (-0.6, -0.05),
+    "position_fraction": (0.0005, 0.05),
+    "sell_fraction": (0.1, 1.0),
+}
+
+
+def grid_params(grid: Optional[Dict[str, Sequence[float]]] = None) -> List[Dict]:
+    """Cartesian product of the grid values."""
+    grid = grid or DEFAULT_GRID
+    names = list(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[n] for n in names))]
+
+
+def random_params(n: int, ranges: Optional[Dict[str, Tuple[float, float]]] = None, seed: int = 0) -> List[Dict]:
+    """n parameter sets drawn uniformly from ranges (reproducible for a given seed)."""
+    ranges = ranges or DEFAULT_RANGES
+    rng = random.Random(seed)
+    return [{name: round(rng.uniform(lo, hi), 6) for name, (lo, hi) in ranges.items()} for _ in range(n)]
+
+
+def params_id(params: Dict) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+# --- shared inputs
+
+def inputs_fingerprint(inputs: Dict, initial_cash: float = 10000.0) -> str:
+    """Hash of everything a run's result depends on besides its parameters."""
+    h = hashlib.sha1()
+    h.update(json.dumps({"symbols": list(inputs["symbols"]), "initial_cash": float(initial_cash)}).encode("utf-8"))
+    for name in ("grid", "prices", "agg"):
+        arr = np.ascontiguousarray(inputs[name])
+        h.update(f"{name}:{arr.dtype.str}:{arr.shape}".encode("utf-8"))
+        h.update(arr.tobytes())
+    return h.hexdigest()[:16]
+
+
+def _save_inputs(inputs: Dict, directory: Path):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in ("grid", "prices", "agg"):
+        np.save(directory / f"{name}.npy", np.ascontiguousarray(inputs[name]))
+    (directory / "symbols.json").write_text(json.dumps(inputs["symbols"]))
+
+
+def _load_inputs(directory: Path) -> Dict:
+    inputs = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in ("grid", "prices", "agg")}
+    inputs["symbols"] = json.loads((directory / "symbols.json").read_text())
+    return inputs
+
+
+_worker_inputs: Optional[Dict] = None
+_worker_cash = 10000.0
+
+
+def _init_worker(directory: str, initial_cash: float):
+    global _worker_inputs, _worker_cash
+    _worker_inputs = _load_inputs(Path(directory))
+    _worker_cash = initial_cash
+
+
+def _run_one(params: Dict) -> Dict:
+    from src.utils.backtest import simulate
+    summary = simulate(_worker_inputs, params, _worker_cash).summary()
+    return {"id": params_id(params), "params": params, **{k: v for k, v in summary.items() if k not in params}}
+
+
+# --- checkpoint
+
+def load_results(directory: Path) -> List[Dict]:
+    path = Path(directory) / "results.jsonl"
+    if not path.exists():
+        return []
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                pass  # a line cut short by a crash
+    return out
+
+
+def rank(results: Iterable[Dict], max_drawdown: Optional[float] = None) -> List[Dict]:
+    """Best first: highest PnL, then lowest max drawdown. Optionally drop runs above a drawdown limit."""
+    rows = [r for r in results if max_drawdown is None or r["max_drawdown"] <= max_drawdown]
+    return sorted(rows, key=lambda r: (-r["pnl"], r["max_drawdown"]))
+
+
+def run_sweep(inputs: Dict, param_sets: Sequence[Dict], name: str = "default", workers: Optional[int] = None,
+              initial_cash: float = 10000.0, log=print) -> List[Dict]:
+    """
+    Run simulate() for every parameter set not already in the sweep's checkpoint
+    and return all results (old and new) ranked. inputs is prepare_backtest()
+    output; the checkpoint is keyed by name and inputs_fingerprint(), so only
+    runs on identical inputs are resumed.
+    """
+    directory = SWEEP_DIR / name / inputs_fingerprint(inputs, initial_cash)
+    data_dir = directory / "inputs"
+    if not (data_dir / "symbols.json").exists():
+        _save_inputs(inputs, data_dir)
+
+    done = {r["id"] for r in load_results(directory)}
+    todo, seen = [], set(done)
+    for p in param_sets:
+        pid = params_id(p)
+        if pid not in seen:
+            seen.add(pid)
+            todo.append(p)
+    log(f"[sweep:{name}] inputs {directory.name}: {len(todo)} to run, {len(done)} already checkpointed")
+
+    workers = workers or os.cpu_count() or 1
+    if todo:
+        with open(directory / "results.jsonl", "a", encoding="utf-8") as out:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(str(data_dir), initial_cash)) as pool:
+                futures = [pool.submit(_run_one, p) for p in todo]
+                for i, fut in enumerate(as_completed(futures), 1):
+                    try:
+                        res = fut.result()
+                    except Exception as e:
+                        log(f"[sweep:{name}] run failed: {e}")
+                        continue
+                    out.write(json.dumps(res) + "\n")
+                    out.flush()
+                    if i % 50 == 0 or i == len(todo):
+                        log(f"[sweep:{name}] {i}/{len(todo)} done")
+    return rank(load_results(directory))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.utils.backtest import load_bars, load_sentiment, prepare_backtest
+
+    ap = argparse.ArgumentParser(description="Sweep decision_agent parameters with the backtest engine")
+    ap.add_argument("--symbols", required=True, help="comma separated, e.g. BTCUSD,ETHUSD")
+    ap.add_argument("--interval", default="5min")
+    ap.add_argument("--samples", type=int, default=0, help="random search with N samples (default: DEFAULT_GRID)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--name", default="default", help="sweep directory name (resume key)")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    inputs = prepare_backtest(load_bars(symbols, args.interval), load_sentiment(symbols))
+    param_sets = random_params(args.samples, seed=args.seed) if args.samples else grid_params()
+    for r in run_sweep(inputs, param_sets, name=args.name, workers=args.workers)[:args.top]:
+        print(f"pnl={r['pnl']:10.2f} dd={r['max_drawdown']:6.2%} trades={r['trades']:6d} {r['params']}")
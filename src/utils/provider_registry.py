@@ -0,0 +1,230 @@
+# src/utils/provider_registry.py
+"""
+Health tracking for external data providers (price APIs etc).
+
+For every provider the registry keeps a rolling window of outcomes (success,
+latency) and a circuit breaker:
+  - closed:    requests flow normally
+  - open:      FAILURE_THRESHOLD consecutive failures (or one rate-limit/quota
+               error) -> provider is skipped until its cooldown expires
+  - half_open: cooldown expired -> one trial request; success closes the
+               circuit, failure re-opens it
+
+order(names) returns the allowed providers sorted by success rate, then average
+latency (untried providers after measured ones), keeping the caller's preference
+as the tie-breaker. It does not hand out half-open trials: the caller claims one
+with claim(name) right before it actually calls the provider (and hands it back
+with release(name) if no request went out). State is saved to
+the SQLite `meta` table (as JSON) so a restarted process remembers, e.g., that
+AlphaVantage is over quota.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+FAILURE_THRESHOLD = int(os.getenv("PROVIDER_FAILURE_THRESHOLD", "3"))
+COOLDOWN = float(os.getenv("PROVIDER_COOLDOWN", "300"))              # seconds after repeated failures
+QUOTA_COOLDOWN = float(os.getenv("PROVIDER_QUOTA_COOLDOWN", "3600"))  # seconds after a rate-limit answer
+WINDOW = int(os.getenv("PROVIDER_WINDOW", "50"))                      # outcomes kept per provider
+SAVE_INTERVAL = 30.0  # seconds between routine saves (state transitions save immediately)
+TRIAL_TIMEOUT = 60.0  # a half-open trial that never reported back is retried after this long
+
+
+class _ProviderState:
+    __slots__ = ("outcomes", "consecutive_failures", "state", "open_until", "trial_at")
+
+    def __init__(self):
+        self.outcomes = deque(maxlen=WINDOW)  # (ok: bool, latency_ms: float)
+        self.consecutive_failures = 0
+        self.state = "closed"
+        self.open_until = 0.0                 # wall-clock, so it survives restarts
+        self.trial_at = 0.0                   # when the current half-open trial was handed out
+
+    def success_rate(self) -> float:
+        # Laplace-smoothed so an untried provider scores 0.5
+        ok = sum(1 for o, _ in self.outcomes if o)
+        return (ok + 1.0) / (len(self.outcomes) + 2.0)
+
+    def avg_latency_ms(self) -> Optional[float]:
+        lat = [ms for o, ms in self.outcomes if o]
+        return sum(lat) / len(lat) if lat else None
+
+
+class ProviderRegistry:
+    def __init__(self, persist_key: Optional[str] = None, clock=time.time):
+        self.persist_key = persist_key
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._providers: Dict[str, _ProviderState] = {}
+        self._loaded = persist_key is None
+        self._last_save = 0.0
+
+    # --- persistence
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            from src.utils.db_utils_sqlite import get_meta
+            raw = get_meta(self.persist_key)
+            data = json.loads(raw) if raw else {}
+        except Exception:
+            data = {}
+        for name, d in data.items():
+            st = self._providers.setdefault(name, _ProviderState())
+            st.outcomes.extend((bool(o), float(ms)) for o, ms in d.get("outcomes", []))
+            st.consecutive_failures = int(d.get("consecutive_failures", 0))
+            st.state = d.get("state", "closed")
+            st.open_until = float(d.get("open_until", 0.0))
+            if st.state == "half_open":
+                st.state = "open"  # a trial interrupted by a restart counts as not yet passed
+
+    def _serialize(self) -> str:
+        return json.dumps({
+            name: {
+                "outcomes": [[o, round(ms, 1)] for o, ms in st.outcomes],
+                "consecutive_failures": st.consecutive_failures,
+                "state": st.state,
+                "open_until": st.open_until,
+            } for name, st in self._providers.items()
+        })
+
+    def save(self):
+        if not self.persist_key:
+            return
+        with self._lock:
+            payload = self._serialize()
+            self._last_save = self._clock()
+        try:
+            from src.utils.db_utils_sqlite import set_meta
+            set_meta(self.persist_key, payload)
+        except Exception:
+            pass
+
+    # --- breaker
+    def _get(self, name: str) -> _ProviderState:
+        st = self._providers.get(name)
+        if st is None:
+            st = self._providers[name] = _ProviderState()
+        return st
+
+    def _allow_locked(self, st: _ProviderState, now: float, claim: bool = True) -> bool:
+        if st.state == "closed":
+            return True
+        if st.state == "open" and now >= st.open_until:
+            st.state = "half_open"
+            st.trial_at = 0.0
+        if st.state == "half_open" and now - st.trial_at >= TRIAL_TIMEOUT:
+            if claim:
+                st.trial_at = now
+            return True
+        return False
+
+    def allow(self, name: str) -> bool:
+        """Whether a request may go out now; claims the half-open trial if it does."""
+        with self._lock:
+            self._ensure_loaded()
+            return self._allow_locked(self._get(name), self._clock())
+
+    def claim(self, name: str) -> bool:
+        """
+        Call right before requesting name. False only when the provider is
+        half-open and its single trial is already out (another caller is probing
+        it); closed and open providers return True, the latter for the
+        everything-blocked fallback of order().
+        """
+        with self._lock:
+            self._ensure_loaded()
+            st = self._get(name)
+            if st.state == "closed":
+                return True
+            return self._allow_locked(st, self._clock()) or st.state == "open"
+
+    def release(self, name: str):
+        """
+        Hand back a claimed half-open trial without a request having been made
+        (e.g. the local rate limiter said no), so the next claim() can probe.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            st = self._get(name)
+            if st.state == "half_open":
+                st.trial_at = 0.0
+
+    def record(self, name: str, ok: bool, latency_ms: float = 0.0, rate_limited: bool = False, miss: bool = False):
+        """
+        Report a request's outcome. miss=True: the provider answered but had no
+        data; it lowers the success rate without counting towards the breaker.
+        """
+        transition = False
+        with self._lock:
+            self._ensure_loaded()
+            st = self._get(name)
+            now = self._clock()
+            st.outcomes.append((bool(ok) and not miss, float(latency_ms)))
+            if miss:
+                pass
+            elif ok:
+                st.consecutive_failures = 0
+                if st.state != "closed":
+                    st.state = "closed"
+                    transition = True
+            else:
+                st.consecutive_failures += 1
+                if rate_limited or st.state == "half_open" or st.consecutive_failures >= FAILURE_THRESHOLD:
+                    cooldown = QUOTA_COOLDOWN if rate_limited else COOLDOWN
+                    transition = st.state != "open" or now + cooldown > st.open_until
+                    st.state = "open"
+                    st.open_until = max(st.open_until, now + cooldown)
+            st.trial_at = 0.0
+            due = now - self._last_save >= SAVE_INTERVAL
+        if transition or due:
+            self.save()
+
+    def order(self, names: Iterable[str]) -> List[str]:
+        """
+        Allowed providers, best first. If every provider is blocked, returns all
+        of them (best first) so the caller still makes an attempt.
+        """
+        names = list(names)
+        with self._lock:
+            self._ensure_loaded()
+            now = self._clock()
+
+            def key(item):
+                idx, name = item
+                st = self._get(name)
+                lat = st.avg_latency_ms()
+                return (-round(st.success_rate(), 1), lat if lat is not None else float("inf"), idx)
+
+            ranked = [n for _, n in sorted(enumerate(names), key=key)]
+            allowed = [n for n in ranked if self._allow_locked(self._get(n), now, claim=False)]
+        return allowed or ranked
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            self._ensure_loaded()
+            now = self._clock()
+            return {
+                name: {
+                    "state": st.state,
+                    "success_rate": round(st.success_rate(), 3),
+                    "avg_latency_ms": st.avg_latency_ms(),
+                    "samples": len(st.outcomes),
+                    "consecutive_failures": st.consecutive_failures,
+                    "open_for_s": max(0.0, st.open_until - now) if st.state == "open" else 0.0,
+                } for name, st in self._providers.items()
+            }
+
+    def reset(self, name: Optional[str] = None):
+        with self._lock:
+            self._ensure_loaded()
+            if name is None:
+                self._providers.clear()
+            else:
+                self._providers.pop(name, None)
+        self.save()
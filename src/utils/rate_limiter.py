@@ -0,0 +1,169 @@
+# src/utils/rate_limiter.py
+"""
+Token-bucket rate limiter for external APIs, shared across threads and processes.
+
+Each provider has one bucket per window (e.g. AlphaVantage free tier: 5 per
+minute AND 500 per day). A request needs one token from every bucket; buckets
+refill continuously at capacity/period. Bucket state lives in the SQLite DB
+(table `rate_limits`) and is updated inside a BEGIN IMMEDIATE transaction, so
+the runner, the dashboard and one-off scripts all draw from the same quota.
+If the DB is unavailable the limiter falls back to in-process buckets.
+
+Limits can be overridden with env vars, e.g. RATE_LIMIT_ALPHAVANTAGE="5/60,500/86400"
+(capacity/period_seconds, comma separated).
+
+Usage:
+    from src.utils.rate_limiter import acquire, RateLimited
+    if not acquire("alphavantage", max_wait=0):
+        raise RateLimited("alphavantage")   # route to the next provider
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_LIMITS: Dict[str, List[Tuple[float, float]]] = {
+    "alphavantage": [(5, 60), (500, 86400)],  # free tier: 5/min, 500/day
+    "coingecko": [(30, 60)],                   # public API, roughly 30/min
+}
+
+# default seconds a caller is willing to wait for a token (0 = fail fast / route to next provider)
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "0"))
+
+
+class RateLimited(RuntimeError):
+    """Raised by callers when a local rate limit denies a request (not a provider failure)."""
+
+
+def _parse_limits(spec: str) -> List[Tuple[float, float]]:
+    out = []
+    for part in spec.split(","):
+        part = part.strip()
+        if part:
+            cap, period = part.split("/")
+            out.append((float(cap), float(period)))
+    return out
+
+
+def get_limits(provider: str) -> List[Tuple[float, float]]:
+    spec = os.getenv(f"RATE_LIMIT_{provider.upper()}")
+    if spec:
+        try:
+            return _parse_limits(spec)
+        except Exception:
+            pass
+    return DEFAULT_LIMITS.get(provider, [])
+
+
+_lock = threading.Lock()
+_local_buckets: Dict[Tuple[str, float], Tuple[float, float]] = {}  # (provider, period) -> (tokens, updated_at)
+
+
+def _refill(tokens: float, updated_at: float, cap: float, period: float, now: float) -> float:
+    return min(cap, tokens + (now - updated_at) * cap / period)
+
+
+def _take(buckets: Dict[float, Tuple[float, float]], limits, now: float):
+    """
+    Given current {period: (tokens, updated_at)} decide whether a token can be taken
+    from every window. Returns (wait_seconds, new_state); wait 0.0 means taken.
+    """
+    state = {}
+    wait = 0.0
+    for cap, period in limits:
+        tokens, updated = buckets.get(period, (cap, now))
+        tokens = _refill(tokens, updated, cap, period, now)
+        state[period] = tokens
+        if tokens < 1.0:
+            wait = max(wait, (1.0 - tokens) * period / cap)
+    if wait == 0.0:
+        state = {p: tok - 1.0 for p, tok in state.items()}
+    return wait, {p: (tok, now) for p, tok in state.items()}
+
+
+def _try_acquire_db(provider: str, limits) -> float:
+    from src.utils.db_migrations import ensure_schema
+    from src.utils.db_utils_sqlite import _get_conn
+    ensure_schema()  # rate_limits
+    conn = _get_conn()
+    try:
+        conn.isolation_level = None  # manage the transaction explicitly
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        try:
+            cur.execute("SELECT period, tokens, updated_at FROM rate_limits WHERE provider = ?", (provider,))
+            buckets = {r["period"]: (r["tokens"], r["updated_at"]) for r in cur.fetchall()}
+            wait, state = _take(buckets, limits, time.time())
+            if wait == 0.0:
+                cur.executemany(
+                    "INSERT INTO rate_limits(provider, period, tokens, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(provider, period) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                    [(provider, p, tok, ts) for p, (tok, ts) in state.items()])
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        return wait
+    finally:
+        conn.close()
+
+
+def _try_acquire_local(provider: str, limits) -> float:
+    buckets = {p: v for (prov, p), v in _local_buckets.items() if prov == provider}
+    wait, state = _take(buckets, limits, time.time())
+    if wait == 0.0:
+        for p, v in state.items():
+            _local_buckets[(provider, p)] = v
+    return wait
+
+
+def try_acquire(provider: str) -> float:
+    """
+    Take one token for provider if every window has one. Returns 0.0 on success,
+    otherwise the number of seconds until a token should be available.
+    Providers without configured limits always succeed.
+    """
+    limits = get_limits(provider)
+    if not limits:
+        return 0.0
+    with _lock:
+        try:
+            return _try_acquire_db(provider, limits)
+        except Exception:
+            return _try_acquire_local(provider, limits)
+
+
+def acquire(provider: str, max_wait: Optional[float] = None) -> bool:
+    """
+    Take a token, sleeping up to max_wait seconds (default RATE_LIMIT_MAX_WAIT) for one.
+    Returns False if no token became available in time.
+    """
+    max_wait = RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+    deadline = time.monotonic() + max_wait
+    while True:
+        wait = try_acquire(provider)
+        if wait == 0.0:
+            return True
+        remaining = deadline - time.monotonic()
+        if wait > remaining:
+            return False
+        time.sleep(wait)
+
+
+def get_rate_limit_status(provider: str) -> Dict[float, float]:
+    """Tokens currently available per window period for provider (read-only)."""
+    limits = get_limits(provider)
+    now = time.time()
+    try:
+        from src.utils.db_utils_sqlite import _get_conn
+        conn = _get_conn()
+        try:
+            rows = conn.execute("SELECT period, tokens, updated_at FROM rate_limits WHERE provider = ?",
+                                (provider,)).fetchall()
+            buckets = {r["period"]: (r["tokens"], r["updated_at"]) for r in rows}
+        finally:
+            conn.close()
+    except Exception:
+        buckets = {p: v for (prov, p), v in _local_buckets.items() if prov == provider}
+    return {period: _refill(*buckets.get(period, (cap, now)), cap, period, now) for cap, period in limits}
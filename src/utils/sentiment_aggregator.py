@@ -0,0 +1,161 @@
+# src/utils/sentiment_aggregator.py
+"""
+Per-ticker streaming sentiment with exponential time decay.
+
+Each ticker keeps (weighted_sum, weight, count, updated_at). Adding an article
+score at time t first decays the state to t and then adds the score with weight 1:
+
+    decay  = 0.5 ** ((t - updated_at) / SENTIMENT_HALF_LIFE)
+    sum    = sum * decay + score
+    weight = weight * decay + 1
+
+so an update is O(1) and nothing has to be rescored or refetched. The signal
+is sum / weight: a recency-weighted mean. `weight` is the effective number of
+articles behind it. Once it decays below SENTIMENT_MIN_WEIGHT (no fresh news
+for several half-lives) the signal reads 0.0 ("no signal").
+
+State is kept in the SQLite table `sentiment_agg` and survives restarts.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_HALF_LIFE = float(os.getenv("SENTIMENT_HALF_LIFE", "21600"))   # seconds (6h)
+SENTIMENT_MIN_WEIGHT = float(os.getenv("SENTIMENT_MIN_WEIGHT", "0.25"))  # below this the signal is 0.0
+
+_lock = threading.Lock()
+_local: Dict[str, tuple] = {}  # fallback when the DB is unavailable: ticker -> (sum, weight, count, updated_at)
+
+
+def _decay(dt: float) -> float:
+    return 0.5 ** (dt / SENTIMENT_HALF_LIFE) if dt > 0 else 1.0
+
+
+def _snapshot(ticker: str, wsum: float, weight: float, count: int, updated_at: Optional[float], now: float) -> Dict:
+    d = _decay(now - updated_at) if updated_at is not None else 1.0
+    wsum, weight = wsum * d, weight * d
+    mean = wsum / weight if weight > 0 else 0.0
+    return {
+        "ticker": ticker,
+        "sentiment": mean if weight >= SENTIMENT_MIN_WEIGHT else 0.0,
+        "mean": mean,
+        "weight": weight,
+        "count": count,
+        "updated_at": updated_at,
+    }
+
+
+def _conn():
+    from src.utils.db_migrations import ensure_schema
+    from src.utils.db_utils_sqlite import _get_conn
+    ensure_schema()  # sentiment_agg
+    return _get_conn()
+
+
+def _fold(state: tuple, scores: Iterable[float], timestamps: Optional[Iterable[float]], now: float) -> tuple:
+    wsum, weight, count, updated_at = state
+    ts_iter = iter(timestamps) if timestamps is not None else None
+    for score in scores:
+        t = next(ts_iter) if ts_iter is not None else now
+        if updated_at is None:
+            updated_at = t
+        if t >= updated_at:
+            d = _decay(t - updated_at)
+            wsum, weight, updated_at = wsum * d + score, weight * d + 1.0, t
+        else:
+            # an article older than the state: add it already decayed
+            w = _decay(updated_at - t)
+            wsum, weight = wsum + score * w, weight + w
+        count += 1
+    return wsum, weight, count, updated_at
+
+
+def add_scores(ticker: str, scores: Iterable[float], timestamps: Optional[Iterable[float]] = None,
+               now: Optional[float] = None) -> Dict:
+    """
+    Fold new article scores (optionally with their epoch-second timestamps,
+    default now) into the ticker's state and persist it. Returns get_sentiment().
+    With no scores nothing is written: the state is only decayed to now.
+    """
+    now = time.time() if now is None else now
+    scores = [float(s) for s in scores]
+    if not scores:
+        with _lock:
+            state = _local.get(ticker)
+        return _snapshot(ticker, *state, now) if state is not None else get_sentiment(ticker, now)
+    with _lock:
+        try:
+            conn = _conn()
+            try:
+                conn.isolation_level = None
+                cur = conn.cursor()
+                cur.execute("BEGIN IMMEDIATE")
+                try:
+                    row = cur.execute("SELECT weighted_sum, weight, count, updated_at FROM sentiment_agg WHERE ticker = ?",
+                                      (ticker,)).fetchone()
+                    state = tuple(row) if row else (0.0, 0.0, 0, None)
+                    state = _fold(state, scores, timestamps, now)
+                    if state[3] is not None:
+                        cur.execute(
+                            "INSERT INTO sentiment_agg(ticker, weighted_sum, weight, count, updated_at) VALUES (?, ?, ?, ?, ?) "
+                            "ON CONFLICT(ticker) DO UPDATE SET weighted_sum = excluded.weighted_sum, weight = excluded.weight, "
+                            "count = excluded.count, updated_at = excluded.updated_at",
+                            (ticker, *state))
+                    cur.execute("COMMIT")
+                except Exception:
+                    cur.execute("ROLLBACK")
+                    raise
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning("sentiment_agg write failed, keeping state in memory: %s", e)
+            state = _fold(_local.get(ticker, (0.0, 0.0, 0, None)), scores, timestamps, now)
+        _local[ticker] = state
+    return _snapshot(ticker, *state, now)
+
+
+def get_sentiment(ticker: str, now: Optional[float] = None) -> Dict:
+    """
+    Current state decayed to now (read-only):
+    {ticker, sentiment, mean, weight, count, updated_at}
+    `sentiment` is the signal for decide(); `weight` is the effective article count.
+    """
+    now = time.time() if now is None else now
+    try:
+        conn = _conn()
+        try:
+            row = conn.execute("SELECT weighted_sum, weight, count, updated_at FROM sentiment_agg WHERE ticker = ?",
+                               (ticker,)).fetchone()
+        finally:
+            conn.close()
+        state = tuple(row) if row else (0.0, 0.0, 0, None)
+    except Exception:
+        state = _local.get(ticker, (0.0, 0.0, 0, None))
+    return _snapshot(ticker, *state, now)
+
+
+def reset_sentiment(ticker: Optional[str] = None):
+    """Forget one ticker's state (or all of them)."""
+    with _lock:
+        if ticker is None:
+            _local.clear()
+        else:
+            _local.pop(ticker, None)
+        try:
+            conn = _conn()
+            try:
+                if ticker is None:
+                    conn.execute("DELETE FROM sentiment_agg")
+                else:
+                    conn.execute("DELETE FROM sentiment_agg WHERE ticker = ?", (ticker,))
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.warning("sentiment_agg reset failed: %s", e)
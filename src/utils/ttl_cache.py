@@ -0,0 +1,125 @@
+# src/utils/ttl_cache.py
+"""
+Small thread-safe TTL cache with single-flight loading.
+
+- get_or_load(key, loader): returns a fresh cached value, or calls loader() once
+  even if many threads ask for the same key at the same time (the others wait
+  and share the leader's result or exception).
+- ttl_for(value) lets the TTL depend on the loaded value (e.g. per provider).
+- stale_ttl > 0 enables stale-while-revalidate: an expired entry younger than
+  ttl + stale_ttl is returned immediately while one background refresh runs.
+- Failed loads are never cached.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Flight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    def __init__(self, default_ttl: float = 30.0, stale_ttl: float = 0.0,
+                 ttl_for: Optional[Callable[[Any], float]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.default_ttl = float(default_ttl)
+        self.stale_ttl = float(stale_ttl)
+        self._ttl_for = ttl_for
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, tuple] = {}  # key -> (value, stored_at, ttl)
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._stats = {"hits": 0, "misses": 0, "stale_hits": 0, "coalesced": 0,
+                       "refreshes": 0, "load_errors": 0}
+
+    def _ttl(self, value: Any) -> float:
+        if self._ttl_for is None:
+            return self.default_ttl
+        try:
+            ttl = self._ttl_for(value)
+        except Exception:
+            ttl = None
+        return self.default_ttl if ttl is None else float(ttl)
+
+    def _load(self, key: Hashable, loader: Callable[[], Any], flight: _Flight):
+        try:
+            value = loader()
+            with self._lock:
+                self._entries[key] = (value, self._clock(), self._ttl(value))
+            flight.value = value
+        except BaseException as e:
+            with self._lock:
+                self._stats["load_errors"] += 1
+            flight.error = e
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at, ttl = entry
+                age = self._clock() - stored_at
+                if age < ttl:
+                    self._stats["hits"] += 1
+                    return value
+                if age < ttl + self.stale_ttl:
+                    self._stats["stale_hits"] += 1
+                    if key not in self._inflight:
+                        self._stats["refreshes"] += 1
+                        flight = self._inflight[key] = _Flight()
+                        threading.Thread(target=self._load, args=(key, loader, flight),
+                                         name=f"ttl-refresh-{key}", daemon=True).start()
+                    return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                self._stats["misses"] += 1
+                flight = self._inflight[key] = _Flight()
+            else:
+                self._stats["coalesced"] += 1
+
+        if leader:
+            self._load(key, loader, flight)
+        else:
+            flight.event.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key if it is still fresh (counted as a hit), without loading."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry[1] < entry[2]:
+                self._stats["hits"] += 1
+                return entry[0]
+        return None
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (value, self._clock(), self._ttl(value))
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one key, or every entry when key is None. Counters are kept."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._stats)
+            out["size"] = len(self._entries)
+            out["inflight"] = len(self._inflight)
+        return out
@@ -0,0 +1,105 @@
+# src/utils/valuation.py
+"""
+Mark-to-market for the portfolio.
+
+- get_marks(symbols): last price per symbol from one price_agent.get_latest_prices()
+  call (one batched request per provider), cached as a whole for VALUATION_TTL
+  seconds. Concurrent callers, e.g. several dashboard sessions, share one load.
+- value_portfolio(portfolio, marks): unrealized PnL, market value and totals in one
+  vectorized pass over the in-memory portfolio (get_portfolio() output). Nothing
+  is re-read from SQLite per symbol.
+
+A position counts as unrealized 0.0 when it has no qty, no avg_price or no
+usable mark (the rule compute_unrealized_pnl() uses). A position without a mark
+is left out of market_value: it is listed in "unpriced" and its cost basis
+(qty * avg_price) is reported separately as "unpriced_cost".
+
+Usage:
+    from src.utils.valuation import value_portfolio
+    v = value_portfolio(get_portfolio())   # {"rows", "total_unrealized", "total_realized", "market_value", ...}
+"""
+
+import os
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from src.utils.ttl_cache import TTLCache
+
+VALUATION_TTL = float(os.getenv("VALUATION_TTL", "15"))  # seconds a set of marks is reused
+
+_marks_cache = TTLCache(default_ttl=VALUATION_TTL)
+
+
+def _price_of(resp) -> Optional[float]:
+    if not isinstance(resp, dict):
+        return None
+    last = resp.get("last") or {}
+    price = last.get("price") if isinstance(last, dict) else None
+    try:
+        price = float(price) if price else None
+    except (TypeError, ValueError):
+        return None
+    return price if price and np.isfinite(price) else None
+
+
+def _load_marks(symbols: tuple) -> Dict[str, Optional[float]]:
+    from src.agents.price_agent import get_latest_prices
+    resps = get_latest_prices(list(symbols))
+    return {t: _price_of(resps.get(t)) for t in symbols}
+
+
+def get_marks(symbols: Iterable[str], use_cache: bool = True) -> Dict[str, Optional[float]]:
+    """{SYMBOL: last price or None} for all symbols, priced in one batched request."""
+    key = tuple(sorted({(s or "").upper().strip() for s in symbols if s}))
+    if not key:
+        return {}
+    if not use_cache:
+        marks = _load_marks(key)
+        _marks_cache.put(key, marks)
+        return dict(marks)
+    return dict(_marks_cache.get_or_load(key, lambda: _load_marks(key)))
+
+
+def clear_marks_cache():
+    _marks_cache.invalidate()
+
+
+def value_portfolio(portfolio: Dict[str, Dict], marks: Optional[Dict[str, Optional[float]]] = None) -> Dict:
+    """
+    Value get_portfolio() output ({symbol: {qty, avg_price, realized_pnl, ...}}).
+    marks defaults to get_marks() for the portfolio's symbols. Returns
+    {"rows": [{symbol, qty, avg_price, market_price, unrealized, realized}],
+     "total_unrealized", "total_realized", "market_value" (priced positions only),
+     "unpriced": [symbols], "unpriced_cost"}.
+    """
+    symbols = list(portfolio)
+    if marks is None:
+        marks = get_marks(symbols) if symbols else {}
+    n = len(symbols)
+    qty = np.fromiter(((portfolio[s].get("qty") or 0.0) for s in symbols), dtype=float, count=n)
+    avg = np.array([portfolio[s].get("avg_price") for s in symbols], dtype=float).reshape(n)  # None -> nan
+    realized = np.fromiter(((portfolio[s].get("realized_pnl") or 0.0) for s in symbols), dtype=float, count=n)
+    mark = np.array([marks.get(s.upper()) for s in symbols], dtype=float).reshape(n)
+
+    priced = np.isfinite(mark) & (mark != 0)
+    valued = priced & (qty != 0) & np.isfinite(avg)
+    with np.errstate(invalid="ignore"):
+        unrealized = np.where(valued, (mark - avg) * qty, 0.0)
+        market_value = np.where(priced, mark * qty, 0.0)
+        unpriced_cost = np.where(~priced & np.isfinite(avg), avg * qty, 0.0)
+
+    rows = [
+        {"symbol": s, "qty": portfolio[s].get("qty", 0.0), "avg_price": portfolio[s].get("avg_price"),
+         "market_price": float(mark[i]) if priced[i] else None, "unrealized": float(unrealized[i]),
+         "realized": float(realized[i])}
+        for i, s in enumerate(symbols)
+    ]
+    return {
+        "rows": rows,
+        "total_unrealized": float(unrealized.sum()),
+        "total_realized": float(realized.sum()),
+        "market_value": float(market_value.sum()),
+        "unpriced": [s for i, s in enumerate(symbols) if qty[i] != 0 and not priced[i]],
+        "unpriced_cost": float(unpriced_cost.sum()),
+    }
@@ -0,0 +1,61 @@
+# tests/bench_db_conn.py
+"""
+Micro-benchmark for db_utils_sqlite helpers: calls per second with a fresh
+connection per call (SQLITE_PERSISTENT=false, the old behaviour) versus the
+persistent per-thread connections, plus buffered insert_event() (rows written by
+flush_events() in one executemany) against one write per event. Runs against a
+scratch database.
+Usage: python -m tests.bench_db_conn [n_calls]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.utils import db_utils_sqlite as db
+
+
+def _rate(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - t0)
+
+
+def main(n: int = 2000):
+    db.DB_PATH = Path(tempfile.mkdtemp(prefix="bench_db_")) / "trades.db"
+    db.init_db()
+    db.EVENT_BUFFER = False  # per-row writes for the connection comparison
+    db.upsert_position("BTCUSD", 1.0, 100.0)
+    cases = {
+        "get_account_balance": lambda: db.get_account_balance("USD"),
+        "get_position": lambda: db.get_position("BTCUSD"),
+        "insert_event": lambda: db.insert_event("bench", "bench_db_conn", "x"),
+        "update_account_balance": lambda: db.update_account_balance(0.0),
+    }
+    results = {}
+    for persistent in (False, True):
+        db.close_all()
+        db.SQLITE_PERSISTENT = persistent
+        for name, fn in cases.items():
+            fn()  # warm up (opens the persistent connection)
+            results.setdefault(name, []).append(_rate(fn, n))
+
+    db.EVENT_BUFFER, db.EVENT_FLUSH_KINDS = True, set()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        db.insert_event("bench", "bench_db_conn", "x")
+    db.flush_events()
+    buffered = n / (time.perf_counter() - t0)
+    db.close_all()
+    print(f"{n} calls each (calls/s):")
+    print(f"  {'helper':<24} {'per-call conn':>14} {'persistent':>12}")
+    for name, (old, new) in results.items():
+        print(f"  {name:<24} {old:14.0f} {new:12.0f}  ({new / old:.1f}x)")
+    direct = results["insert_event"][1]
+    print(f"  {'insert_event buffered':<24} {'':>14} {buffered:12.0f}  ({buffered / direct:.1f}x vs persistent, "
+          f"flush size {db.EVENT_FLUSH_SIZE})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
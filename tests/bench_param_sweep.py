@@ -0,0 +1,36 @@
+# tests/bench_param_sweep.py
+"""
+Sweep scaling: the same random parameter sets run with 1 worker and with
+`workers` processes (fresh sweep directories, so nothing is resumed).
+Speedup should track the number of cores.
+Usage: python -m tests.bench_param_sweep [workers] [n_sets]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.utils import param_sweep
+from src.utils.backtest import prepare_backtest
+from tests.bench_backtest import synthetic
+
+
+def main(workers: int = 0, n_sets: int = 0):
+    workers = workers or os.cpu_count() or 1
+    n_sets = n_sets or 2 * workers
+    bars, sentiment = synthetic(8, 200)
+    inputs = prepare_backtest(bars, sentiment)
+    sets = param_sweep.random_params(n_sets, seed=1)
+    param_sweep.SWEEP_DIR = Path(tempfile.mkdtemp(prefix="sweep_bench_"))
+    timings = {}
+    for w in sorted({1, workers}):
+        t0 = time.perf_counter()
+        param_sweep.run_sweep(inputs, sets, name=f"w{w}", workers=w, log=lambda *_: None)
+        timings[w] = time.perf_counter() - t0
+    for w, t in timings.items():
+        print(f"workers={w:3d}: {t:7.2f}s for {n_sets} runs, speedup {timings[1] / t:.2f}x")
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,47 @@
+# tests/bench_sentiment_engines.py
+"""
+Throughput benchmark: texts/second for vaderSentiment's polarity_scores versus
+FastLexiconScorer on a synthetic corpus of headline-length texts (memo cache
+not involved; both engines score every text).
+Usage: python -m tests.bench_sentiment_engines [n_texts]
+"""
+import random
+import sys
+import time
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from src.agents.sentiment_agent import FastLexiconScorer
+
+
+def _corpus(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    words = [w for w in SentimentIntensityAnalyzer().lexicon if " " not in w][:3000]
+    neutral = ["the", "company", "shares", "quarter", "revenue", "market", "analysts", "said", "in", "for", "but", "not", "very"]
+    pool = words + neutral * 40
+    return [" ".join(rng.choice(pool) for _ in range(rng.randint(8, 40))) + rng.choice([".", "!", "?"]) for _ in range(n)]
+
+
+def _rate(fn, texts, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - t0)
+    return len(texts) / best
+
+
+def main(n: int = 20000):
+    texts = _corpus(n)
+    vader = SentimentIntensityAnalyzer()
+    fast = FastLexiconScorer(vader.lexicon, vader.emojis)
+    r_vader = _rate(vader.polarity_scores, texts)
+    r_fast = _rate(fast.polarity_scores, texts)
+    print(f"{n} texts, best of 3 (texts/s):")
+    print(f"  vader  {r_vader:10.0f}")
+    print(f"  fast   {r_fast:10.0f}  ({r_fast / r_vader:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,61 @@
+# tests/bench_sentiment_startup.py
+"""
+Startup benchmark: time from interpreter start of the import to the first score,
+measured in fresh subprocesses so nothing is cached in-process.
+
+  eager        - old behaviour: import vaderSentiment and build the analyzer at import time
+  lazy         - import sentiment_agent (no lexicon parse), parse the text lexicon on first score
+
+The memo cache is disabled so every run really scores the text.
+Usage: python tests/bench_sentiment_startup.py [runs]
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+EAGER = """
+import time; t0 = time.perf_counter()
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+analyzer = SentimentIntensityAnalyzer()
+t1 = time.perf_counter()
+analyzer.polarity_scores("Apple reports strong revenue growth and record profits for Q4.")
+print(t1 - t0, time.perf_counter() - t0)
+"""
+
+AGENT = """
+import time; t0 = time.perf_counter()
+from src.agents.sentiment_agent import score_article
+t1 = time.perf_counter()
+score_article("Apple reports strong revenue growth and record profits for Q4.")
+print(t1 - t0, time.perf_counter() - t0)
+"""
+
+
+def _run(code: str, env: dict) -> tuple:
+    out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    t_import, t_total = out.stdout.strip().splitlines()[-1].split()
+    return float(t_import), float(t_total)
+
+
+def main(runs: int = 5):
+    base = dict(os.environ, SENTIMENT_CACHE="false")
+    variants = {
+        "eager": (EAGER, base),
+        "lazy": (AGENT, base),
+    }
+
+    print(f"best of {runs} fresh processes (ms):")
+    print(f"  {'variant':<12} {'import':>8} {'to first score':>15}")
+    for name, (code, env) in variants.items():
+        samples = [_run(code, env) for _ in range(runs)]
+        t_import = min(s[0] for s in samples)
+        t_total = min(s[1] for s in samples)
+        print(f"  {name:<12} {t_import * 1000:8.1f} {t_total * 1000:15.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,107 @@
+# tests/test_bar_store.py
+"""
+BarStore (memmap OHLCV columns) on a scratch directory: append + read round
+trip, range reads, re-appending overlapping bars without duplicate timestamps,
+recovery from a partially written column, and price_agent._closed_bars /
+get_intraday_bars keeping the still-forming last bar out of the store.
+Usage: python -m tests.test_bar_store
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.utils import bar_store
+from src.utils import db_utils_sqlite as db
+from src.utils.bar_store import COLUMNS, BarStore
+
+T0 = 1_700_000_100 // 300 * 300
+
+
+def _bars(start: int, n: int, step: int = 300) -> dict:
+    ts = np.arange(start, start + n * step, step, dtype=np.int64)
+    close = 100.0 + (ts - T0) / 300.0
+    return {"ts": ts, "open": close - 0.5, "high": close + 1, "low": close - 1, "close": close,
+            "volume": np.full(n, 10.0)}
+
+
+class _Time:
+    """Stands in for the time module inside price_agent: time() is fake, the rest is real."""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def _report(name: str, good: bool, detail: str) -> bool:
+    print(f"{'✅' if good else '❌'} {name}: {detail}")
+    return good
+
+
+def main():
+    ok = True
+    tmp = Path(tempfile.mkdtemp(prefix="test_bar_store_"))
+    store = BarStore(tmp / "bars")
+
+    first = _bars(T0, 50)
+    added = store.append("aapl", "5min", first)
+    got = store.read("AAPL", "5min")
+    ok &= _report("round trip", added == 50 and all(np.array_equal(got[c], first[c]) for c in COLUMNS),
+                  f"{added} appended, {len(got['ts'])} read")
+    part = store.read("AAPL", "5min", start=int(T0 + 10 * 300), end=int(T0 + 19 * 300))
+    ok &= _report("range read", len(part["ts"]) == 10 and part["ts"][0] == T0 + 10 * 300, f"{len(part['ts'])} rows")
+
+    # overlapping, unsorted and internally duplicated re-download
+    overlap = _bars(T0 + 40 * 300, 20)
+    shuffled = np.random.default_rng(0).permutation(20)
+    overlap = {c: np.concatenate([v[shuffled], v[:3]]) for c, v in overlap.items()}
+    added = store.append("AAPL", "5min", overlap)
+    ts = store.read("AAPL", "5min")["ts"]
+    ok &= _report("overlap de-duplicated", added == 10 and len(ts) == 60 and (np.diff(ts) > 0).all(),
+                  f"{added} new rows, {len(ts)} stored, strictly increasing")
+
+    # a write interrupted after the ts column: the next append trims the extra bytes
+    with open(store._path("AAPL", "5min", "ts"), "ab") as f:
+        f.write(np.int64(T0 + 999 * 300).tobytes())
+    added = store.append("AAPL", "5min", _bars(T0 + 60 * 300, 2))
+    got = store.read("AAPL", "5min")
+    ok &= _report("partial write trimmed", added == 2 and len(got["ts"]) == 62 and got["ts"][-1] == T0 + 61 * 300,
+                  f"{len(got['ts'])} rows, last close {got['close'][-1]}")
+
+    # the last bar of a download is still forming until its interval has ended
+    from src.agents import price_agent
+    now = T0 + 10 * 300 + 120  # two minutes into the bar starting at T0 + 10 * 300
+    bars = _bars(T0, 11)
+    closed = price_agent._closed_bars(bars, 300, now=now)
+    ok &= _report("_closed_bars", len(closed["ts"]) == 10 and closed["ts"][-1] == T0 + 9 * 300,
+                  f"{len(bars['ts'])} downloaded, {len(closed['ts'])} closed")
+
+    # get_intraday_bars: the forming bar is not stored, and is picked up once closed
+    db.DB_PATH = tmp / "trades.db"
+    db.init_db()
+    saved = (bar_store._default_store, price_agent._yfinance_intraday, price_agent.ALPHAVANTAGE_KEY, price_agent.time)
+    clock = _Time(now)
+    bar_store._default_store = BarStore(tmp / "agent_bars")
+    price_agent.ALPHAVANTAGE_KEY, price_agent.time = None, clock
+    price_agent._yfinance_intraday = lambda t, interval, since, size: _bars(T0, int((clock.now - T0) // 300) + 1)
+    try:
+        n1 = len(price_agent.get_intraday_bars("MSFT", "5min")["ts"])
+        clock.now += 300
+        got = price_agent.get_intraday_bars("MSFT", "5min")
+        ok &= _report("get_intraday_bars", n1 == 10 and len(got["ts"]) == 11 and (np.diff(got["ts"]) > 0).all(),
+                      f"{n1} stored while bar 11 was forming, {len(got['ts'])} after it closed")
+    finally:
+        bar_store._default_store, price_agent._yfinance_intraday, price_agent.ALPHAVANTAGE_KEY, price_agent.time = saved
+        db.close_all()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
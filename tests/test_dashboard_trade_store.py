@@ -0,0 +1,128 @@
+# tests/test_dashboard_trade_store.py
+"""
+TradeStore (dashboard trades frame) against the dashboard's former full reload:
+after several incremental refreshes, including a back-dated batch and a reset
+trades table, the frame and its cumulative PnL must match a from-scratch
+computation, and so must recent() and the sampled pnl_curve(). Then the cost
+of a refresh, recent() and pnl_curve() with n trades of history.
+Usage: python -m tests.test_dashboard_trade_store [n]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.dashboard.trade_store import TradeStore
+from src.utils import db_utils_sqlite as db
+
+
+def _insert(rows):
+    conn = db._get_conn()
+    conn.executemany("INSERT INTO trades (timestamp, symbol, side, qty, price, pnl) VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def _rows(n, start, rng):
+    out = []
+    for i in range(n):
+        ts = pd.Timestamp("2025-01-01", tz="UTC") + pd.Timedelta(seconds=start + i * 60)
+        pnl = None if rng.random() < 0.5 else round(rng.uniform(-5, 5), 4)
+        out.append((ts.isoformat(), rng.choice(["BTCUSD", "ETHUSD"]), "sell", 1.0, 100.0, pnl))
+    return out
+
+
+def _full_reload() -> pd.DataFrame:
+    """What app.py used to do on every rerun (without the 1000-row limit)."""
+    conn = db._get_conn()
+    df = pd.DataFrame([dict(r) for r in conn.execute("SELECT * FROM trades ORDER BY id DESC")])
+    conn.close()
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", format="ISO8601")
+    df["pnl"] = pd.to_numeric(df["pnl"], errors="coerce").fillna(0.0)
+    df_sorted = df.sort_values(["timestamp", "id"])
+    df_sorted["cumulative_pnl"] = df_sorted["pnl"].cumsum()
+    return df_sorted
+
+
+def _matches(store: TradeStore) -> bool:
+    want = _full_reload()
+    got = store.df
+    recent = store.recent(25)
+    curve = store.pnl_curve(50)
+    rows = np.unique(np.linspace(0, len(want) - 1, min(50, len(want))).round().astype(int))
+    return (list(got["id"]) == list(want["id"])
+            and np.allclose(got["cumulative_pnl"].to_numpy(), want["cumulative_pnl"].to_numpy())
+            and (got["timestamp"].to_numpy() == want["timestamp"].to_numpy()).all()
+            and list(recent["id"]) == list(want["id"].iloc[::-1][:25])
+            and np.allclose(curve["cumulative_pnl"].to_numpy(), want["cumulative_pnl"].to_numpy()[rows])
+            and curve["cumulative_pnl"].iloc[-1] == got["cumulative_pnl"].iloc[-1])
+
+
+def check() -> bool:
+    rng = random.Random(0)
+    store = TradeStore()
+    ok = True
+    steps = [("initial load", _rows(500, 0, rng)), ("new trades", _rows(37, 500 * 60, rng)),
+             ("back-dated batch", _rows(20, 100 * 60 + 30, rng)), ("after back-dated", _rows(5, 600 * 60, rng)),
+             ("no new trades", [])]
+    for name, rows in steps:
+        if rows:
+            _insert(rows)
+        added = store.refresh()
+        good = added == len(rows) and _matches(store)
+        ok &= good
+        print(f"{'✅' if good else '❌'} {name}: +{added} rows, {len(store.df)} total")
+    conn = db._get_conn()
+    conn.execute("DELETE FROM trades")
+    conn.execute("DELETE FROM sqlite_sequence WHERE name = 'trades'")
+    conn.commit()
+    conn.close()
+    _insert(_rows(3, 0, rng))
+    store.refresh()
+    good = _matches(store) and len(store.df) == 3
+    ok &= good
+    print(f"{'✅' if good else '❌'} trades table reset: {len(store.df)} rows")
+    return ok
+
+
+def bench(n: int):
+    rng = random.Random(1)
+    _insert(_rows(n, 10 ** 7, rng))
+    store = TradeStore()
+    t0 = time.perf_counter()
+    store.refresh()
+    t_first = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    _full_reload()
+    t_full = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    store.refresh()
+    t_none = time.perf_counter() - t0
+    _insert(_rows(10, 10 ** 8, rng))
+    t0 = time.perf_counter()
+    store.refresh()
+    t_new = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    store.recent(1000)
+    store.pnl_curve(2000)
+    t_view = time.perf_counter() - t0
+    print(f"{len(store)} trades in {len(store._parts)} parts: first load {t_first:.2f}s, "
+          f"former full reload {t_full:.2f}s, refresh with 0 new {t_none * 1e3:.1f}ms, "
+          f"with 10 new {t_new * 1e3:.1f}ms, recent(1000) + pnl_curve(2000) {t_view * 1e3:.1f}ms")
+
+
+def main(n: int = 200000):
+    db.DB_PATH = Path(tempfile.mkdtemp(prefix="test_trade_store_")) / "trades.db"
+    db.init_db()
+    ok = check()
+    bench(n)
+    db.close_all()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000) else 1)
@@ -0,0 +1,100 @@
+# tests/test_db_query_plans.py
+"""
+Migrations and query plans on a throwaway database:
+- migrate() brings a fresh DB and an old-style DB (the former db_init_sqlite
+  schema, account without updated_at) to LATEST_VERSION, and is idempotent.
+- EXPLAIN QUERY PLAN of the hot queries uses the indexes (no full scan, no
+  temp b-tree for the ORDER BY).
+Usage: python -m tests.test_db_query_plans
+"""
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+from src.utils import db_utils_sqlite as db
+from src.utils.db_migrations import LATEST_VERSION, get_version, migrate
+
+# (query, params, text the plan must contain)
+HOT_QUERIES = [
+    ("SELECT * FROM trades WHERE symbol = ? ORDER BY timestamp", ("BTCUSD",), "idx_trades_symbol_ts"),
+    ("SELECT * FROM trades WHERE timestamp >= ?", ("2025-01-01",), "idx_trades_ts"),
+    ("SELECT * FROM trades ORDER BY id DESC LIMIT ?", (100,), "SCAN trades"),  # rowid order, no sort
+    ("SELECT * FROM events WHERE kind = ? AND timestamp >= ? ORDER BY timestamp", ("error", "2025-01-01"),
+     "idx_events_kind_ts"),
+    ("SELECT * FROM events WHERE timestamp >= ?", ("2025-01-01",), "idx_events_ts"),
+    ("SELECT * FROM events ORDER BY id DESC LIMIT ?", (100,), "SCAN events"),
+    ("SELECT key, score FROM news_articles WHERE query = ? AND last_seen >= ?", ("BTC", 0.0),
+     "idx_news_articles_query_seen"),
+    ("SELECT key FROM news_articles WHERE query = ? AND content_hash = ?", ("BTC", "h"),
+     "idx_news_articles_query_hash"),
+    ("UPDATE news_articles SET score = ? WHERE key = ?", (0.5, "k"), "idx_news_articles_key"),
+    ("SELECT digest FROM sentiment_cache ORDER BY last_used LIMIT ?", (10,), "idx_sentiment_cache_last_used"),
+    # keyset pages of iter_trades() / iter_events()
+    ("SELECT id, timestamp, pnl FROM trades WHERE id > ? ORDER BY id LIMIT ?", (1000, 5000), "INTEGER PRIMARY KEY"),
+    ("SELECT id, timestamp, pnl FROM trades WHERE timestamp >= ? AND (timestamp > ? OR id > ?) AND timestamp < ? "
+     "ORDER BY timestamp, id LIMIT ?", ("2025-01-05", "2025-01-05", 10, "2025-01-20", 5000), "idx_trades_ts"),
+    ("SELECT id, timestamp, pnl FROM trades WHERE timestamp >= ? AND (timestamp > ? OR id > ?) AND symbol = ? "
+     "ORDER BY timestamp, id LIMIT ?", ("2025-01-05", "2025-01-05", 10, "S3", 5000), "idx_trades_symbol_ts"),
+    ("SELECT id, timestamp FROM events WHERE timestamp >= ? AND (timestamp > ? OR id > ?) AND kind = ? "
+     "ORDER BY timestamp, id LIMIT ?", ("2025-01-05", "2025-01-05", 10, "error", 5000), "idx_events_kind_ts"),
+]
+
+
+def _plan(conn, sql, params):
+    return " | ".join(r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def _fill(conn, n=2000):
+    conn.executemany("INSERT INTO trades(timestamp, symbol, side, qty, price) VALUES (?, ?, 'buy', 1, 1)",
+                     [(f"2025-01-{i % 28 + 1:02d}T00:00:{i % 60:02d}", f"S{i % 40}") for i in range(n)])
+    conn.executemany("INSERT INTO events(timestamp, kind, payload) VALUES (?, ?, '{}')",
+                     [(f"2025-01-{i % 28 + 1:02d}", ("decision", "error", "order")[i % 3]) for i in range(n)])
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def main():
+    ok = True
+    tmp = Path(tempfile.mkdtemp(prefix="test_db_plans_"))
+
+    # an old-style database: created by the former db_init_sqlite schema
+    db.DB_PATH = tmp / "old.db"
+    raw = sqlite3.connect(db.DB_PATH)
+    raw.executescript("""
+    CREATE TABLE trades (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, symbol TEXT NOT NULL,
+        side TEXT NOT NULL, qty REAL NOT NULL, price REAL NOT NULL, pnl REAL, exec_id TEXT, notes TEXT);
+    CREATE TABLE account (currency TEXT PRIMARY KEY, cash REAL NOT NULL);
+    INSERT INTO account VALUES ('USD', 500.0);
+    """)
+    raw.close()
+    version = migrate(log=None)
+    conn = db._get_conn()
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(account)")}
+    cash = conn.execute("SELECT cash FROM account WHERE currency = 'USD'").fetchone()[0]
+    conn.close()
+    good = version == LATEST_VERSION and "updated_at" in cols and cash == 500.0
+    ok &= good
+    print(f"{'✅' if good else '❌'} old schema upgraded to v{version}, account cash kept ({cash})")
+
+    db.DB_PATH = tmp / "trades.db"
+    db.init_db()
+    again = migrate(log=None)
+    conn = db._get_conn()
+    good = get_version(conn) == again == LATEST_VERSION
+    ok &= good
+    print(f"{'✅' if good else '❌'} fresh DB at v{again}, second migrate() is a no-op")
+
+    _fill(conn)
+    for sql, params, expected in HOT_QUERIES:
+        plan = _plan(conn, sql, params)
+        good = expected in plan and "TEMP B-TREE" not in plan
+        ok &= good
+        print(f"{'✅' if good else '❌'} {sql}\n    {plan}")
+    conn.close()
+    db.close_all()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
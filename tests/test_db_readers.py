@@ -0,0 +1,116 @@
+# tests/test_db_readers.py
+"""
+iter_trades() / iter_events() against plain full queries on a scratch DB:
+same rows in the same order for id ranges, timestamp ranges (with many equal
+timestamps across page boundaries) and symbol/kind filters, in every fmt.
+Then a streamed scan of n trades with peak Python memory (tracemalloc).
+Usage: python -m tests.test_db_readers [n]
+"""
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from src.utils import db_utils_sqlite as db
+
+
+def _fill(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    conn = db._get_conn()
+    rows = []
+    for i in range(n):
+        # coarse timestamps, not monotonic in id: many ties and back-dated rows
+        ts = f"2025-01-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00+00:00"
+        pnl = None if i % 5 == 0 else rng.uniform(-10, 10)
+        rows.append((ts, f"S{rng.randint(0, 9)}", rng.choice(["buy", "sell"]), rng.uniform(0, 2), rng.uniform(1, 100), pnl))
+    conn.executemany("INSERT INTO trades (timestamp, symbol, side, qty, price, pnl) VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.executemany("INSERT INTO events (timestamp, kind, source, payload) VALUES (?, ?, 't', 'x')",
+                     [(r[0], ("info", "error")[j % 2]) for j, r in enumerate(rows[: n // 2])])
+    conn.commit()
+    conn.close()
+
+
+def _expected(sql, params=()):
+    conn = db._get_conn()
+    try:
+        return [tuple(r) for r in conn.execute(sql, params).fetchall()]
+    finally:
+        conn.close()
+
+
+def _null(x):
+    return x is None or x != x  # NULL comes back as None (tuples) or nan (numpy/pandas)
+
+
+def _same(a, b):
+    return len(a) == len(b) and all(x == y or (_null(x) and _null(y)) for ra, rb in zip(a, b) for x, y in zip(ra, rb))
+
+
+def check() -> bool:
+    ok = True
+    cols = ["id", "timestamp", "symbol", "pnl"]
+    since, until = "2025-01-05", "2025-01-20"
+    cases = [
+        ("all trades", dict(), "SELECT id, timestamp, symbol, pnl FROM trades ORDER BY id", ()),
+        ("id range", dict(after_id=100, max_id=2500), "SELECT id, timestamp, symbol, pnl FROM trades "
+         "WHERE id > 100 AND id <= 2500 ORDER BY id", ()),
+        ("time range", dict(since=since, until=until), "SELECT id, timestamp, symbol, pnl FROM trades "
+         "WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp, id", (since, until)),
+        ("symbol + since", dict(symbol="S3", since=since), "SELECT id, timestamp, symbol, pnl FROM trades "
+         "WHERE symbol = 'S3' AND timestamp >= ? ORDER BY timestamp, id", (since,)),
+    ]
+    for name, kw, sql, params in cases:
+        want = _expected(sql, params)
+        for chunk_size in (1, 7, 1000):
+            rows = list(db.iter_trades(columns=cols, chunk_size=chunk_size, **kw))
+            chunks = [c for c in db.iter_trades(columns=cols, chunk_size=chunk_size, fmt="chunks", **kw)]
+            arrays = list(db.iter_trades(columns=cols, chunk_size=chunk_size, fmt="numpy", **kw))
+            frames = list(db.iter_trades(columns=cols, chunk_size=chunk_size, fmt="pandas", **kw))
+            from_np = [tuple(a[c][i].item() if hasattr(a[c][i], "item") else a[c][i] for c in cols)
+                       for a in arrays for i in range(len(a["id"]))]
+            from_pd = [tuple(r) for f in frames for r in f.itertuples(index=False)]
+            good = (_same(rows, want) and _same([r for c in chunks for r in c], want)
+                    and _same(from_np, want) and _same(from_pd, want) and all(len(c) <= chunk_size for c in chunks))
+            ok &= good
+        print(f"{'✅' if good else '❌'} trades {name}: {len(want)} rows")
+    want = _expected("SELECT id, kind FROM events WHERE kind = 'error' AND timestamp < ? ORDER BY timestamp, id", (until,))
+    rows = list(db.iter_events(kind="error", until=until, columns=["id", "kind"], chunk_size=13))
+    good = _same(rows, want)
+    ok &= good
+    print(f"{'✅' if good else '❌'} events kind + until: {len(want)} rows")
+    return ok
+
+
+def bench(n: int):
+    conn = db._get_conn()
+    conn.execute("DELETE FROM trades")
+    conn.executemany("INSERT INTO trades (timestamp, symbol, side, qty, price, pnl) VALUES (?, 'X', 'buy', 1, ?, ?)",
+                     ((f"2025-01-01T00:00:{i % 60:02d}", float(i), float(i % 7)) for i in range(n)))
+    conn.commit()
+    conn.close()
+    t0 = time.perf_counter()
+    total = sum(float(a["pnl"].sum()) for a in db.iter_trades(columns=["id", "pnl"], fmt="numpy"))
+    dt = time.perf_counter() - t0
+    tracemalloc.start()  # separate pass: tracing slows allocation down a lot
+    for _ in db.iter_trades(columns=["id", "pnl"], fmt="numpy"):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"streamed {n} trades in {dt:.2f}s ({n / dt:,.0f} rows/s), pnl sum {total:.0f}, "
+          f"peak traced memory {peak / 1e6:.1f} MB (chunk {db.DB_READ_CHUNK})")
+
+
+def main(n: int = 1000000):
+    db.DB_PATH = Path(tempfile.mkdtemp(prefix="test_db_readers_")) / "trades.db"
+    db.init_db()
+    _fill(5000)
+    ok = check()
+    bench(n)
+    db.close_all()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000) else 1)
@@ -0,0 +1,39 @@
+# tests/test_decide_batch.py
+"""
+decide_batch() must return exactly what decide() returns, element by element,
+including missing/zero prices, threshold edges and qty rounding.
+Usage: python -m tests.test_decide_batch [n]
+"""
+import sys
+
+import numpy as np
+
+from src.agents.decision_agent import BUY_THRESHOLD, SELL_THRESHOLD, decide, decide_batch
+
+
+def main(n: int = 100000):
+    rng = np.random.default_rng(0)
+    agg = rng.uniform(-1, 1, n)
+    agg[::7] = BUY_THRESHOLD
+    agg[::11] = SELL_THRESHOLD
+    price = rng.choice([0.0, -1.0, np.nan, 1e-3, 0.37, 27000.123, 1e9], n) * rng.uniform(0.5, 2, n)
+    cash = rng.choice([0.0, 10000.0, 123.456, 1e12], n) * rng.uniform(0, 1, n)
+    qty = rng.choice([0.0, 0.3, 1e-9, 5e8], n) * rng.uniform(0, 2, n)
+
+    table = decide_batch(agg, price, cash, qty)
+    mismatches = 0
+    for i in range(n):
+        p = None if np.isnan(price[i]) else float(price[i])
+        expected = decide(float(agg[i]), p, float(cash[i]), float(qty[i]))
+        if table[i] != expected:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"❌ agg={agg[i]!r} price={price[i]!r} cash={cash[i]!r} qty={qty[i]!r}\n"
+                      f"   decide={expected}\n   batch ={table[i]}")
+    counts = {a: int((table.action == a).sum()) for a in ("buy", "sell", "hold")}
+    print(f"{'✅' if not mismatches else '❌'} {n - mismatches}/{n} decisions match {counts}")
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000) else 1)
@@ -0,0 +1,79 @@
+# tests/test_event_buffer.py
+"""
+Buffered insert_event() flush rules on a scratch DB: rows stay in memory until
+EVENT_FLUSH_SIZE are pending or the oldest is EVENT_FLUSH_SECONDS old, an
+EVENT_FLUSH_KINDS row flushes at once, a flush inside transaction() is
+deferred, and a failed flush puts the rows back for the next one.
+Usage: python -m tests.test_event_buffer
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.utils import db_utils_sqlite as db
+
+
+def _stored() -> int:
+    conn = db._get_conn()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _report(name: str, good: bool, detail: str) -> bool:
+    print(f"{'✅' if good else '❌'} {name}: {detail}")
+    return good
+
+
+def main():
+    db.DB_PATH = Path(tempfile.mkdtemp(prefix="test_event_buffer_")) / "trades.db"
+    db.init_db()
+    db.EVENT_BUFFER, db.EVENT_FLUSH_SIZE, db.EVENT_FLUSH_SECONDS, db.EVENT_FLUSH_KINDS = True, 10, 3600.0, {"error"}
+    ok = True
+
+    for i in range(9):
+        db.insert_event("info", "test", str(i))
+    ok &= _report("below size", _stored() == 0 and len(db._event_buf) == 9, f"{_stored()} stored, {len(db._event_buf)} buffered")
+    db.insert_event("info", "test", "9")
+    ok &= _report("size reached", _stored() == 10 and not db._event_buf, f"{_stored()} stored")
+
+    db.insert_event("error", "test", "boom")
+    ok &= _report("error kind", _stored() == 11 and not db._event_buf, f"{_stored()} stored")
+    db.insert_event("error", "test", "kept", flush=False)
+    ok &= _report("flush=False", _stored() == 11 and len(db._event_buf) == 1, f"{len(db._event_buf)} buffered")
+
+    db.EVENT_FLUSH_SECONDS = 0.2
+    time.sleep(0.25)
+    db.insert_event("info", "test", "late")  # the oldest buffered row is now past EVENT_FLUSH_SECONDS
+    ok &= _report("age reached", _stored() == 13 and not db._event_buf, f"{_stored()} stored")
+    db.EVENT_FLUSH_SECONDS = 3600.0
+
+    db.insert_event("info", "test", "in tx")
+    with db.transaction():
+        deferred = db.flush_events()
+    ok &= _report("inside transaction()", deferred == 0 and len(db._event_buf) == 1,
+                  f"{deferred} written, {len(db._event_buf)} buffered")
+
+    good_path, db.DB_PATH = db.DB_PATH, Path(tempfile.mkdtemp(prefix="test_event_buffer_")) / "missing" / "x.db"
+    db.close_all()  # drop the pooled connection so the next flush opens the bad path
+    db.insert_event("info", "test", "requeued")
+    try:
+        db.flush_events()
+        raised = False
+    except Exception:
+        raised = True
+    ok &= _report("failed flush", raised and len(db._event_buf) == 2, f"raised={raised}, {len(db._event_buf)} requeued")
+    db.DB_PATH = good_path
+    db.close_all()
+    written = db.flush_events()
+    payloads = [e["payload"] for e in db.fetch_events(2)]
+    ok &= _report("next flush", written == 2 and _stored() == 15 and set(payloads) == {"in tx", "requeued"},
+                  f"{written} written, {_stored()} stored")
+    db.close_all()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,67 @@
+# tests/test_provider_registry.py
+"""
+ProviderRegistry circuit breaker on a fake clock (no DB, no network): failures
+open the circuit, the cooldown leads to a single half-open trial, and a trial
+turned down by our own rate limiter (price_agent._call_provider) is released
+so the next claim() can probe straight away.
+Usage: python -m tests.test_provider_registry
+"""
+import sys
+
+from src.agents import price_agent
+from src.utils import provider_registry as pr
+from src.utils.rate_limiter import RateLimited
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _report(name: str, good: bool, detail: str = "") -> bool:
+    print(f"{'✅' if good else '❌'} {name}{': ' + detail if detail else ''}")
+    return good
+
+
+def _half_open(reg: pr.ProviderRegistry, clock: _Clock, name: str):
+    for _ in range(pr.FAILURE_THRESHOLD):
+        reg.record(name, False)
+    clock.now += pr.COOLDOWN + 1
+
+
+def main():
+    ok = True
+    clock = _Clock()
+    reg = pr.ProviderRegistry(clock=clock)
+
+    for _ in range(pr.FAILURE_THRESHOLD):
+        reg.record("a", False)
+    ok &= _report("open after failures", reg.snapshot()["a"]["state"] == "open" and reg.order(["a", "b"]) == ["b"])
+    clock.now += pr.COOLDOWN + 1
+    first, second = reg.claim("a"), reg.claim("a")
+    ok &= _report("one half-open trial", first and not second, f"claims {first}, {second}")
+    reg.release("a")
+    ok &= _report("release hands the trial back", reg.claim("a"))
+    reg.record("a", True, 12.0)
+    ok &= _report("successful trial closes", reg.snapshot()["a"]["state"] == "closed")
+
+    # the same path through price_agent: the local limiter refuses the trial request
+    _half_open(reg, clock, "b")
+    saved, price_agent._registry = price_agent._registry, reg
+    try:
+        def limited(_):
+            raise RateLimited("local limit")
+        _, err, _ = price_agent._call_provider("b", limited, "BTCUSD")
+        ok &= _report("rate-limited call releases the trial", isinstance(err, RateLimited) and reg.claim("b"),
+                      reg.snapshot()["b"]["state"])
+        ok &= _report("and records nothing", reg.snapshot()["b"]["samples"] == pr.FAILURE_THRESHOLD)
+    finally:
+        price_agent._registry = saved
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,103 @@
+# tests/test_rate_limiter.py
+"""
+SQLite-shared token buckets on a scratch DB: separate processes using the same
+DB draw from one budget, tokens refill with elapsed time (fake clock), and an
+empty bucket makes the price agent raise RateLimited before any request.
+Usage: python -m tests.test_rate_limiter
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from src.utils import db_utils_sqlite as db
+from src.utils import rate_limiter as rl
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# one limiter process: takes as many tokens as it can, prints how many it got
+WORKER = """
+import sys
+from pathlib import Path
+from src.utils import db_utils_sqlite as db
+from src.utils.rate_limiter import try_acquire
+db.DB_PATH = Path(sys.argv[1])
+print(sum(try_acquire("testprov") == 0.0 for _ in range(int(sys.argv[2]))))
+"""
+
+
+class _FakeTime:
+    """Stands in for the time module inside rate_limiter."""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def _report(name: str, good: bool, detail: str) -> bool:
+    print(f"{'✅' if good else '❌'} {name}: {detail}")
+    return good
+
+
+def main():
+    ok = True
+    db.DB_PATH = Path(tempfile.mkdtemp(prefix="test_rate_limiter_")) / "trades.db"
+    db.init_db()
+
+    # two processes, one DB: 10 tokens per hour between them
+    env = dict(os.environ, RATE_LIMIT_TESTPROV="10/3600")
+    procs = [subprocess.Popen([sys.executable, "-c", WORKER, str(db.DB_PATH), "8"], cwd=PROJECT_ROOT, env=env,
+                              stdout=subprocess.PIPE, text=True) for _ in range(2)]
+    got = [int(p.communicate()[0].strip().splitlines()[-1]) for p in procs]
+    ok &= _report("shared budget", sum(got) == 10, f"processes got {got} of 10 tokens")
+
+    # refill follows elapsed time: 6/60s is one token every 10s
+    os.environ["RATE_LIMIT_CLOCKPROV"] = "6/60"
+    real_time, rl.time = rl.time, _FakeTime(1_000_000.0)
+    try:
+        taken = sum(rl.try_acquire("clockprov") == 0.0 for _ in range(10))
+        wait = rl.try_acquire("clockprov")
+        rl.time.now += 25.0
+        refilled = sum(rl.try_acquire("clockprov") == 0.0 for _ in range(10))
+        ok &= _report("refill", taken == 6 and abs(wait - 10.0) < 1e-6 and refilled == 2,
+                      f"{taken} taken, next in {wait:.1f}s, {refilled} after 25s")
+        gave_up = not rl.acquire("clockprov", max_wait=2.0)
+        waited = rl.acquire("clockprov", max_wait=30.0)
+        ok &= _report("acquire(max_wait)", gave_up and waited,
+                      "next token in 5s: gives up with max_wait=2, waits with max_wait=30")
+    finally:
+        rl.time = real_time
+        del os.environ["RATE_LIMIT_CLOCKPROV"]
+
+    # empty alphavantage bucket: the provider call raises RateLimited without a request
+    os.environ["RATE_LIMIT_ALPHAVANTAGE"] = "1/86400"
+    from src.agents import price_agent
+    key, price_agent.ALPHAVANTAGE_KEY = price_agent.ALPHAVANTAGE_KEY, "test-key"
+    get, price_agent.http_client.get = price_agent.http_client.get, lambda *a, **k: (_ for _ in ()).throw(
+        AssertionError("no request expected"))
+    try:
+        rl.try_acquire("alphavantage")  # the only token
+        try:
+            price_agent._alphavantage_global_quote("AAPL")
+            raised = None
+        except Exception as e:
+            raised = e
+        ok &= _report("RateLimited when empty", isinstance(raised, rl.RateLimited), repr(raised))
+    finally:
+        price_agent.ALPHAVANTAGE_KEY, price_agent.http_client.get = key, get
+        del os.environ["RATE_LIMIT_ALPHAVANTAGE"]
+    db.close_all()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
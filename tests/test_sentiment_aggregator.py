@@ -0,0 +1,68 @@
+# tests/test_sentiment_aggregator.py
+"""
+sentiment_aggregator on a scratch DB with explicit timestamps (now=...): a
+score's weight halves every SENTIMENT_HALF_LIFE, add_scores() with no scores
+only decays the state (and writes nothing), the signal drops to 0.0 below
+SENTIMENT_MIN_WEIGHT, and the state survives a restart (reload from the DB).
+Usage: python -m tests.test_sentiment_aggregator
+"""
+import math
+import sys
+import tempfile
+from pathlib import Path
+
+from src.utils import db_utils_sqlite as db
+from src.utils import sentiment_aggregator as agg
+
+T0 = 1_700_000_000.0
+
+
+def _row(ticker: str):
+    conn = db._get_conn()
+    try:
+        return tuple(conn.execute("SELECT weighted_sum, weight, count, updated_at FROM sentiment_agg WHERE ticker = ?",
+                                  (ticker,)).fetchone())
+    finally:
+        conn.close()
+
+
+def _report(name: str, good: bool, detail: str) -> bool:
+    print(f"{'✅' if good else '❌'} {name}: {detail}")
+    return good
+
+
+def main():
+    ok = True
+    db.DB_PATH = Path(tempfile.mkdtemp(prefix="test_sentiment_agg_")) / "trades.db"
+    db.init_db()
+    h = agg.SENTIMENT_HALF_LIFE
+
+    agg.add_scores("BTCUSD", [1.0], now=T0)
+    s = agg.add_scores("BTCUSD", [-1.0], now=T0 + h)
+    # the first score now weighs 0.5: (0.5 * 1 - 1) / (0.5 + 1)
+    ok &= _report("half-life weight", math.isclose(s["weight"], 1.5) and math.isclose(s["mean"], -1 / 3),
+                  f"weight {s['weight']:.3f}, mean {s['mean']:.4f}")
+
+    stored = _row("BTCUSD")
+    s = agg.add_scores("BTCUSD", [], now=T0 + 2 * h)
+    ok &= _report("no scores: decay only", math.isclose(s["weight"], 0.75) and math.isclose(s["mean"], -1 / 3)
+                  and s["count"] == 2 and _row("BTCUSD") == stored,
+                  f"weight {s['weight']:.3f}, mean {s['mean']:.4f}, stored row unchanged")
+
+    s = agg.get_sentiment("BTCUSD", now=T0 + 5 * h)
+    ok &= _report("below min weight", s["weight"] < agg.SENTIMENT_MIN_WEIGHT and s["sentiment"] == 0.0,
+                  f"weight {s['weight']:.4f} -> signal {s['sentiment']}")
+
+    before = agg.get_sentiment("BTCUSD", now=T0 + 2 * h)
+    agg._local.clear()  # a restarted process only has the DB
+    after = agg.add_scores("BTCUSD", [], now=T0 + 2 * h)
+    ok &= _report("reload from DB", before == after, f"weight {after['weight']:.3f}, count {after['count']}")
+    s = agg.add_scores("BTCUSD", [0.5], now=T0 + 2 * h)
+    ok &= _report("continues after reload", math.isclose(s["weight"], 1.75) and s["count"] == 3,
+                  f"weight {s['weight']:.3f}, count {s['count']}")
+    db.close_all()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,74 @@
+# tests/test_sentiment_fast_engine.py
+"""
+Conformance check: FastLexiconScorer must produce the same polarity_scores()
+as vaderSentiment for every sentence below plus a batch of random sentences
+drawn from the lexicon, negators, boosters and punctuation.
+Usage: python -m tests.test_sentiment_fast_engine [n_random]
+"""
+import random
+import sys
+
+from vaderSentiment.vaderSentiment import BOOSTER_DICT, NEGATE, SentimentIntensityAnalyzer
+
+from src.agents.sentiment_agent import FastLexiconScorer
+
+FIXED = [
+    "VADER is smart, handsome, and funny.",
+    "VADER is smart, handsome, and funny!",
+    "VADER is very smart, handsome, and funny.",
+    "VADER is VERY SMART, handsome, and FUNNY.",
+    "VADER is VERY SMART, handsome, and FUNNY!!!",
+    "VADER is VERY SMART, uber handsome, and FRIGGIN FUNNY!!!",
+    "VADER is not smart, handsome, nor funny.",
+    "The book was good.",
+    "At least it isn't a horrible book.",
+    "The book was only kind of good.",
+    "The plot was good, but the characters are uncompelling and the dialog is not great.",
+    "Today SUX!",
+    "Today only kinda sux! But I'll get by, lol",
+    "Make sure you :) or :D today!",
+    "Catch utf-8 emoji such as 💘 and 💋 and 😁",
+    "Not bad at all",
+    "Apple reports strong revenue growth and record profits for Q4.",
+    "Shares plunge after the company misses estimates and cuts guidance",
+    "Bitcoin rallies?? Analysts are not so sure...",
+    "Never so happy with a quarter, without doubt the best results ever",
+    "The stock is the bomb, but the CEO is a bad ass",
+    "no good news, no growth, no or nor profit",
+    "It was the shit, kiss of death for the rivals",
+    "I can't stand this guidance",
+    "",
+    "!!!",
+    "?? ?? ??",
+]
+
+
+def _random_sentences(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    lexicon_words = [w for w in SentimentIntensityAnalyzer().lexicon if " " not in w]
+    fillers = ["the", "stock", "company", "market", "but", "and", "so", "this", "least", "at",
+               "very", "kind", "of", "without", "doubt", "never", "no", "or", "nor", "Q4", "😁", "💔"]
+    pool = lexicon_words + list(NEGATE) + list(BOOSTER_DICT) + fillers
+    for _ in range(n):
+        words = [rng.choice(pool) for _ in range(rng.randint(1, 18))]
+        words = [w.upper() if rng.random() < 0.1 else w for w in words]
+        yield " ".join(words) + rng.choice(["", ".", "!", "!!", "?", "???", "!?!"])
+
+
+def main(n_random: int = 5000):
+    vader = SentimentIntensityAnalyzer()
+    fast = FastLexiconScorer(vader.lexicon, vader.emojis)
+    checked = mismatches = 0
+    for text in FIXED + list(_random_sentences(n_random)):
+        expected, got = vader.polarity_scores(text), fast.polarity_scores(text)
+        checked += 1
+        if any(abs(expected[k] - got[k]) > 1e-9 for k in expected):
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"❌ {text!r}\n   vader={expected}\n   fast ={got}")
+    print(f"{'✅' if not mismatches else '❌'} {checked - mismatches}/{checked} sentences match")
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000) else 1)
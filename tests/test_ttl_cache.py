@@ -0,0 +1,109 @@
+# tests/test_ttl_cache.py
+"""
+TTLCache behaviour on a fake clock: concurrent callers of a cold key share one
+load, an expired entry inside the stale window is served while exactly one
+background refresh runs, a loader exception reaches every waiter but is never
+cached, and ttl_for() gives each value its own TTL.
+Usage: python -m tests.test_ttl_cache
+"""
+import sys
+import threading
+import time
+
+from src.utils.ttl_cache import TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _report(name: str, good: bool, detail: str) -> bool:
+    print(f"{'✅' if good else '❌'} {name}: {detail}")
+    return good
+
+
+def _parallel(n: int, fn) -> list:
+    out, barrier = [None] * n, threading.Barrier(n)
+
+    def run(i):
+        barrier.wait()
+        try:
+            out[i] = fn()
+        except Exception as e:
+            out[i] = e
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def main():
+    ok = True
+    clock = _Clock()
+
+    # cold key: one load for all concurrent callers
+    cache = TTLCache(default_ttl=5.0, clock=clock)
+    calls = []
+
+    def slow_load():
+        calls.append(1)
+        time.sleep(0.1)
+        return "v1"
+    got = _parallel(16, lambda: cache.get_or_load("k", slow_load))
+    ok &= _report("cold key single-flight", len(calls) == 1 and got == ["v1"] * 16,
+                  f"{len(calls)} load(s), {cache.stats()['coalesced']} coalesced")
+
+    # stale-while-revalidate: old value served at once, exactly one refresh
+    cache = TTLCache(default_ttl=5.0, stale_ttl=10.0, clock=clock)
+    cache.get_or_load("k", lambda: "v1")
+    clock.now += 6.0
+    release, refreshes = threading.Event(), []
+
+    def blocked_refresh():
+        refreshes.append(1)
+        release.wait(5)
+        return "v2"
+    got = _parallel(16, lambda: cache.get_or_load("k", blocked_refresh))
+    served_stale = got == ["v1"] * 16
+    release.set()
+    for _ in range(100):
+        if cache.peek("k") == "v2":
+            break
+        time.sleep(0.01)
+    ok &= _report("stale while revalidate", served_stale and len(refreshes) == 1 and cache.peek("k") == "v2",
+                  f"{len(refreshes)} refresh(es), then {cache.peek('k')!r}")
+    clock.now += 100.0
+    ok &= _report("past the stale window", cache.get_or_load("k", lambda: "v3") == "v3", "loaded synchronously")
+
+    # loader errors reach the waiters but are not cached
+    cache = TTLCache(default_ttl=5.0, clock=clock)
+    attempts = []
+
+    def failing():
+        attempts.append(1)
+        time.sleep(0.05)
+        raise RuntimeError("provider down")
+    got = _parallel(8, lambda: cache.get_or_load("k", failing))
+    all_failed = all(isinstance(g, RuntimeError) for g in got)
+    again = cache.get_or_load("k", lambda: "ok")
+    ok &= _report("errors not cached", all_failed and len(attempts) == 1 and again == "ok",
+                  f"{len(attempts)} failing load for 8 callers, next call loaded {again!r}")
+
+    # per-value TTL
+    cache = TTLCache(default_ttl=5.0, ttl_for=lambda v: v["ttl"], clock=clock)
+    cache.put("short", {"ttl": 1.0})
+    cache.put("long", {"ttl": 60.0})
+    clock.now += 2.0
+    ok &= _report("ttl_for", cache.peek("short") is None and cache.peek("long") is not None,
+                  "short expired, long still fresh")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
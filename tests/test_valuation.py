@@ -0,0 +1,78 @@
+# tests/test_valuation.py
+"""
+value_portfolio() must give the same unrealized PnL per symbol as the
+per-symbol compute_unrealized_pnl() path the dashboard used (including flat
+positions, missing avg_price and unpriced symbols), and get_equity_snapshot()
+the matching totals, with unpriced positions kept out of market value and
+reported at cost, also when called without marks (TTL-cached get_marks()).
+Marks are passed in or pre-cached, so no network is used.
+Usage: python -m tests.test_valuation [n_symbols]
+"""
+import math
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.utils import db_utils_sqlite as db
+from src.utils.valuation import _marks_cache, clear_marks_cache, value_portfolio
+
+
+def main(n: int = 300):
+    db.DB_PATH = Path(tempfile.mkdtemp(prefix="test_valuation_")) / "trades.db"
+    db.init_db()
+    rng = random.Random(0)
+    marks = {}
+    for i in range(n):
+        sym = f"SYM{i}"
+        qty = rng.choice([0.0, rng.uniform(0.001, 50)])
+        avg = None if qty == 0 or rng.random() < 0.05 else rng.uniform(1, 1000)
+        db.upsert_position(sym, qty, avg, realized_pnl_delta=rng.uniform(-100, 100))
+        marks[sym] = rng.choice([None, 0.0, rng.uniform(1, 1000), rng.uniform(1, 1000)])
+
+    portfolio = db.get_portfolio()
+    t0 = time.perf_counter()
+    old = {}
+    for sym in portfolio:
+        mp = marks.get(sym)
+        old[sym] = db.compute_unrealized_pnl(sym, mp) if mp else 0.0
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    v = value_portfolio(portfolio, marks)
+    t_new = time.perf_counter() - t0
+
+    bad = [r for r in v["rows"] if not math.isclose(r["unrealized"], old[r["symbol"]], rel_tol=1e-12, abs_tol=1e-9)]
+    ok = not bad
+    print(f"{'✅' if ok else '❌'} {n - len(bad)}/{n} symbols match compute_unrealized_pnl "
+          f"(per-symbol {t_old * 1e3:.1f}ms, vectorized {t_new * 1e3:.1f}ms)")
+    for r in bad[:5]:
+        print("   ", r, old[r["symbol"]])
+
+    snap = db.get_equity_snapshot(marks)
+    priced_value = sum(p["qty"] * marks[s] for s, p in portfolio.items() if marks.get(s))
+    unpriced_cost = sum(p["qty"] * p["avg_price"] for s, p in portfolio.items()
+                        if not marks.get(s) and p["avg_price"] is not None)
+    good = (math.isclose(snap["total_unrealized"], sum(old.values()), rel_tol=1e-9, abs_tol=1e-6)
+            and math.isclose(snap["total_realized"], sum(p["realized_pnl"] or 0.0 for p in portfolio.values()),
+                             rel_tol=1e-9, abs_tol=1e-6)
+            and math.isclose(snap["market_value"], priced_value, rel_tol=1e-9, abs_tol=1e-6)
+            and math.isclose(snap["unpriced_cost"], unpriced_cost, rel_tol=1e-9, abs_tol=1e-6)
+            and math.isclose(snap["equity"], snap["cash"] + snap["market_value"]))
+    ok &= good
+    print(f"{'✅' if good else '❌'} get_equity_snapshot: unrealized {snap['total_unrealized']:.2f} "
+          f"equity {snap['equity']:.2f} ({len(snap['unpriced'])} unpriced, cost {snap['unpriced_cost']:.2f})")
+
+    # no marks: served by valuation.get_marks(), here from a pre-filled cache so no network is used
+    _marks_cache.put(tuple(sorted(s.upper() for s in portfolio)), marks)
+    default = db.get_equity_snapshot()
+    good = all(default[k] == snap[k] for k in ("market_value", "unpriced_cost", "total_unrealized", "equity"))
+    ok &= good
+    print(f"{'✅' if good else '❌'} get_equity_snapshot() with cached marks: equity {default['equity']:.2f}")
+    clear_marks_cache()
+    db.close_all()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main(int(sys.argv[1]) if len(sys.argv) > 1 else 300) else 1)